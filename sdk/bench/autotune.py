@@ -0,0 +1,266 @@
+import io
+import os
+import platform
+import socket
+import tempfile
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+from pdf2image import pdfinfo_from_path
+from sdk.metrics.metrics import Metrics
+from sdk.pdf.page_container import PageContainerReader
+from sdk.pdf.pdf_section_extractor import PDFSectionExtractor
+from sdk.pdf.pdf_to_text import PdfToText
+from sdk.search.arabic_normalizer import ArabicNormalizer
+
+# (layout, columns) candidates of the section extractor: detected blocks, the whole page, two grid columns
+LAYOUTS = (("auto", 1), ("grid", 1), ("grid", 2))
+
+
+def agreement(text, reference, normalizer):
+    """
+    Word-level F1 score of a text against a reference, ignoring word order, vowel marks and letter variants.
+    :return: Score between 0 and 1, or None if the reference has no words.
+    """
+    words = Counter(normalizer.terms(text))
+    reference_words = Counter(normalizer.terms(reference))
+    if not reference_words:
+        return None
+
+    common = sum((words & reference_words).values())
+    return 2 * common / (sum(words.values()) + sum(reference_words.values()))
+
+
+def sample_parts(pdf_paths, pages=8, max_files=4):
+    """
+    Pick the sample pages of a trial: runs of consecutive pages from the middle of up to max_files PDFs,
+    spread over the list, so covers and blank end pages are left out.
+    :return: List of (pdf_path, first_page, last_page) tuples.
+    """
+    step = max(1, len(pdf_paths) / max(1, max_files))
+    files = [pdf_paths[int(index * step)] for index in range(min(max_files, len(pdf_paths)))]
+    per_file = -(-pages // len(files))
+
+    parts = []
+    for pdf_path in files:
+        page_count = pdfinfo_from_path(pdf_path)["Pages"]
+        count = min(per_file, page_count)
+        first_page = (page_count - count) // 2 + 1
+        parts.append((pdf_path, first_page, first_page + count - 1))
+
+    return parts
+
+
+class Autotuner:
+    def __init__(self, input_path, commands=("pdf2text", "sections"), pages=None, max_files=4, lang="ara", engine="subprocess", reference_dpi=400, dpis=(150, 200, 300), psms=(1, 3, 6), layouts=LAYOUTS, max_workers=None, tolerance=0.02):
+        """
+        Pick the fastest settings of `zac pdf2text` and `zac sections` that keep OCR quality, on this machine and corpus.
+
+        A sample of pages is OCRed once at reference_dpi as the quality reference. Quality
+        settings are then tuned one at a time with short timed trials: for sections the
+        section layout, then the page segmentation mode, then the DPI; for pdf2text the DPI.
+        Every trial is scored by its pages/sec and its word agreement with the reference
+        (see agreement()). Among the trials whose agreement is within `tolerance` of the
+        best one, the fastest wins. Finally, with the quality settings fixed, worker counts
+        and OpenMP threads per tesseract process are tried and the highest pages/sec wins;
+        they do not change the text.
+
+        :param input_path: PDF file or folder of PDFs to sample.
+        :param commands: Commands to tune: "pdf2text" and/or "sections".
+        :param pages: Number of sample pages. Defaults to twice the CPU count, at least 8, so every worker gets pages.
+        :param max_files: Number of PDFs of a folder the sample is taken from.
+        :param lang: Language code for OCR.
+        :param engine: OCR engine used by the trials; tune with the engine you convert with.
+        :param reference_dpi: DPI of the quality reference pass.
+        :param dpis: DPI candidates.
+        :param psms: Page segmentation modes tried for sections.
+        :param layouts: (layout, columns) candidates for sections.
+        :param max_workers: Highest worker count tried. Defaults to the CPU count.
+        :param tolerance: Agreement a faster setting may lose against the most accurate one.
+        """
+        self.input_path = input_path
+        self.commands = commands
+        self.cpus = os.cpu_count() or 1
+        self.pages = pages or max(8, 2 * self.cpus)
+        self.max_files = max_files
+        self.lang = lang
+        self.engine = engine
+        self.reference_dpi = reference_dpi
+        self.dpis = dpis
+        self.psms = psms
+        self.layouts = layouts
+        self.max_workers = max_workers or self.cpus
+        self.tolerance = tolerance
+        self.normalizer = ArabicNormalizer()
+        self.parts = []
+        self.reference = {}
+        self.trials = []
+
+    def pdf_paths(self):
+        if os.path.isdir(self.input_path):
+            return [os.path.join(self.input_path, name) for name in sorted(os.listdir(self.input_path)) if name.lower().endswith(".pdf")]
+
+        return [self.input_path]
+
+    def run(self):
+        """
+        :return: Profile dict for save_profile(): the chosen options per command, the sample and every trial.
+        """
+        pdf_paths = self.pdf_paths()
+        if not pdf_paths:
+            raise ValueError(f"No PDF files found in '{self.input_path}'")
+
+        self.parts = sample_parts(pdf_paths, self.pages, self.max_files)
+        print(f"Sample: {', '.join(f'{os.path.basename(pdf)} {first}-{last}' for pdf, first, last in self.parts)}")
+
+        print(f"Reference pass at {self.reference_dpi} DPI")
+        self.reference, _ = self.run_pdf2text({"dpi": self.reference_dpi, "workers": self.max_workers})
+
+        commands = {}
+        if "pdf2text" in self.commands:
+            commands["pdf2text"] = self.tune_pdf2text()
+        if "sections" in self.commands:
+            commands["sections"] = self.tune_sections()
+
+        return {
+            "commands": commands,
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "host": socket.gethostname(),
+                "platform": platform.platform(),
+                "cpu_count": self.cpus,
+                "engine": self.engine,
+                "reference_dpi": self.reference_dpi,
+                "sample": [{"pdf": pdf, "first_page": first, "last_page": last} for pdf, first, last in self.parts],
+            },
+            "trials": self.trials,
+        }
+
+    def tune_pdf2text(self):
+        """
+        :return: Chosen dpi, workers and omp_thread_limit.
+        """
+        settings = {"workers": self.max_workers}
+        settings["dpi"] = self.pick_quality("pdf2text", [dict(settings, dpi=dpi) for dpi in self.dpis])["dpi"]
+
+        options = [{"dpi": settings["dpi"], "workers": workers, "omp_thread_limit": threads} for workers, threads in self.worker_options()]
+        best = self.pick_fastest("pdf2text", options)
+
+        return {"dpi": best["dpi"], "workers": best["workers"], "omp_thread_limit": best["omp_thread_limit"]}
+
+    def tune_sections(self):
+        """
+        :return: Chosen layout, columns, psm, dpi and workers.
+        """
+        settings = {"dpi": max(self.dpis), "psm": self.psms[0], "workers": self.max_workers}
+        best = self.pick_quality("sections", [dict(settings, layout=layout, columns=columns) for layout, columns in self.layouts])
+        settings.update(layout=best["layout"], columns=best["columns"])
+
+        settings["psm"] = self.pick_quality("sections", [dict(settings, psm=psm) for psm in self.psms])["psm"]
+        settings["dpi"] = self.pick_quality("sections", [dict(settings, dpi=dpi) for dpi in self.dpis])["dpi"]
+
+        # OCR threads each start tesseract processes, so more threads than cores can still pay off
+        workers = sorted({1, 2, max(1, self.cpus // 2), self.cpus, 2 * self.cpus} & set(range(1, 2 * self.max_workers + 1)))
+        settings["workers"] = self.pick_fastest("sections", [dict(settings, workers=count) for count in workers])["workers"]
+
+        return settings
+
+    def worker_options(self):
+        """
+        :return: (workers, OpenMP threads per tesseract) pairs that do not oversubscribe the CPUs.
+                 One worker runs without a thread limit.
+        """
+        counts = sorted({1, 2, max(1, self.cpus // 4), max(1, self.cpus // 2), self.cpus} & set(range(1, self.max_workers + 1)))
+        options = [(1, 1)]
+        for workers in counts[1:]:
+            options.extend((workers, threads) for threads in (1, 2, 4) if workers * threads <= self.cpus)
+
+        return options
+
+    def pick_quality(self, command, options):
+        """
+        Run a trial per option and pick the fastest one within `tolerance` of the best agreement.
+        """
+        trials = [self.trial(command, settings) for settings in options]
+        scored = [trial for trial in trials if trial["agreement"] is not None] or trials
+        best_agreement = max(trial["agreement"] or 0 for trial in scored)
+        candidates = [trial for trial in scored if (trial["agreement"] or 0) >= best_agreement - self.tolerance]
+
+        return max(candidates, key=lambda trial: trial["pages_per_sec"])["settings"]
+
+    def pick_fastest(self, command, options):
+        """
+        Run a trial per option and pick the highest pages/sec.
+        """
+        return max((self.trial(command, settings) for settings in options), key=lambda trial: trial["pages_per_sec"])["settings"]
+
+    def trial(self, command, settings):
+        """
+        Convert the sample with one setting.
+        :return: Trial dict with the settings, pages/sec and mean agreement with the reference (None if no sample page has text).
+        """
+        for trial in self.trials:
+            if trial["command"] == command and trial["settings"] == settings:
+                return trial  # Measured by an earlier tuning step
+
+        texts, seconds = self.run_pdf2text(settings) if command == "pdf2text" else self.run_sections(settings)
+
+        scores = [agreement(texts.get(page, ""), reference, self.normalizer) for page, reference in self.reference.items()]
+        scores = [score for score in scores if score is not None]
+        pages = sum(last - first + 1 for pdf, first, last in self.parts)
+
+        trial = {
+            "command": command,
+            "settings": settings,
+            "pages_per_sec": round(pages / seconds, 3),
+            "agreement": round(sum(scores) / len(scores), 4) if scores else None,
+        }
+        self.trials.append(trial)
+        print(f"{command} {settings}: {trial['pages_per_sec']} pages/sec, agreement {trial['agreement']}")
+
+        return trial
+
+    def run_pdf2text(self, settings):
+        """
+        :return: Tuple of ({(pdf, page): text}, seconds).
+        """
+        with tempfile.TemporaryDirectory() as work_dir, redirect_stdout(io.StringIO()):
+            converter = PdfToText(
+                output_folder=work_dir, split_pdf=True, pages_per_split=1, lang=self.lang, engine=self.engine, text_layer=False, metrics=Metrics("off"),
+                dpi=settings["dpi"], workers=settings["workers"], omp_thread_limit=settings.get("omp_thread_limit", 1),
+            )
+            start_time = time.perf_counter()
+            converter.convert_many([(pdf, page, page) for pdf, first, last in self.parts for page in range(first, last + 1)])
+            seconds = time.perf_counter() - start_time
+
+            texts = {}
+            for pdf, first, last in self.parts:
+                for page in range(first, last + 1):
+                    path = converter.output_file_path(pdf, page, page)
+                    if os.path.exists(path):
+                        with open(path, encoding="utf-8") as file:
+                            texts[(pdf, page)] = file.read()
+
+        return texts, seconds
+
+    def run_sections(self, settings):
+        """
+        :return: Tuple of ({(pdf, page): text of the sections in reading order}, seconds).
+        """
+        texts = {}
+        seconds = 0
+        with tempfile.TemporaryDirectory() as work_dir, redirect_stdout(io.StringIO()):
+            for index, (pdf, first, last) in enumerate(self.parts):
+                extractor = PDFSectionExtractor(
+                    pdf, first_page=first, last_page=last, output_folder=os.path.join(work_dir, str(index)), lang=self.lang, engine=self.engine, metrics=Metrics("off"),
+                    ocr_resolution=settings["dpi"], psm=settings["psm"], layout=settings["layout"], num_vertical=settings["columns"], ocr_workers=settings["workers"],
+                )
+                start_time = time.perf_counter()
+                extractor.extract_text_from_sections()
+                seconds += time.perf_counter() - start_time
+
+                reader = PageContainerReader(os.path.join(extractor.output_folder, f"{extractor.base_filename}.sections.jsonl"))
+                for page in reader.pages():
+                    texts[(pdf, page)] = "\n".join(record["text"] for record in reader.read(page))
+
+        return texts, seconds
@@ -0,0 +1,101 @@
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from sdk.ocr.ocr_engine import ENGINES, get_engine
+
+class EngineBenchmark:
+    def __init__(self, image_paths, engines=("subprocess", "tesserocr"), sections=4, pool_size=1, threads=1, repeat=1, lang="ara", config="--psm 1 --oem 3"):
+        """
+        Compare OCR engines on the same crops.
+
+        Every image is cut into `sections` horizontal strips, mimicking the small crops
+        that PDFSectionExtractor sends to Tesseract, where per-call startup cost dominates.
+
+        :param image_paths: Images to OCR.
+        :param engines: Engine names to compare.
+        :param sections: Number of strips each image is cut into.
+        :param pool_size: Warm instances for engines that keep them.
+        :param threads: Number of threads issuing OCR calls.
+        :param repeat: Number of passes over all crops.
+        :param lang: Language code for OCR.
+        :param config: Tesseract options.
+        """
+        self.image_paths = image_paths
+        self.engines = engines
+        self.sections = max(1, sections)
+        self.pool_size = pool_size
+        self.threads = max(1, threads)
+        self.repeat = max(1, repeat)
+        self.lang = lang
+        self.config = config
+
+    def crops(self):
+        crops = []
+        for image_path in self.image_paths:
+            image = Image.open(image_path).convert("L")
+            width, height = image.size
+            step = height / self.sections
+            for i in range(self.sections):
+                crops.append(image.crop((0, int(i * step), width, int((i + 1) * step))))
+        return crops
+
+    def run_engine(self, name, crops):
+        """
+        :return: Dict with the timings of one engine, or the error that prevented it from running.
+        """
+        try:
+            engine = get_engine(name, self.pool_size)
+            # Warm up outside of the timed section, so warm engines are measured warm
+            engine.recognize(crops[0], lang=self.lang, config=self.config)
+        except Exception as e:
+            return {"engine": name, "error": str(e)}
+
+        latencies = []
+
+        def timed(crop):
+            call_start = time.perf_counter()
+            engine.recognize(crop, lang=self.lang, config=self.config)
+            latencies.append(time.perf_counter() - call_start)
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for _ in range(self.repeat):
+                list(executor.map(timed, crops))
+        elapsed = time.perf_counter() - start_time
+
+        latencies.sort()
+        return {
+            "engine": name,
+            "calls": len(latencies),
+            "seconds": round(elapsed, 3),
+            "calls_per_sec": round(len(latencies) / elapsed, 2),
+            "latency_ms_mean": round(statistics.mean(latencies) * 1000, 1),
+            "latency_ms_p50": round(latencies[len(latencies) // 2] * 1000, 1),
+            "latency_ms_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+        }
+
+    def run(self):
+        crops = self.crops()
+        return [self.run_engine(name, crops) for name in self.engines]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare OCR engine backends on section-sized crops")
+    parser.add_argument("images", nargs="+", help="Images to OCR")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), help="Engines to compare")
+    parser.add_argument("--sections", type=int, default=4, help="Number of strips each image is cut into")
+    parser.add_argument("--pool-size", type=int, default=1, help="Warm instances for engines that keep them")
+    parser.add_argument("--threads", type=int, default=1, help="Number of threads issuing OCR calls")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of passes over all crops")
+    parser.add_argument("--lang", default="ara", help="Language code for OCR")
+    args = parser.parse_args()
+
+    benchmark = EngineBenchmark(args.images, args.engines, args.sections, args.pool_size, args.threads, args.repeat, args.lang)
+    for result in benchmark.run():
+        print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import random
+from PIL import Image, ImageDraw, ImageFont, features
+
+# Words from the sample pages in test/data, so fixtures look like dictionary text
+WORDS = [
+    "قال", "النبي", "صلى", "الله", "عليه", "وسلم", "الحديث", "طلقها", "ثلاثا", "قاطعة", "أي", "لا",
+    "فيها", "عن", "من", "في", "على", "وقال", "الأزهري", "أبو", "منصور", "معنى", "قول", "ابن", "سيده",
+    "الشيء", "القطع", "المستأصل", "يقال", "بتت", "الحبل", "فانبت", "الليث", "طلاق", "امرأته", "البتة",
+    "صدقة", "الإبتات", "الجوهري", "وهذا", "شاذ", "باب", "المضاعف", "الخمر", "الشك", "والتقدير",
+]
+
+FONT_CANDIDATES = [
+    r"C:\Windows\Fonts\arial.ttf",
+    r"C:\Windows\Fonts\tahoma.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+]
+
+class FixtureGenerator:
+    def __init__(self, output_folder, font_path=None, seed=1):
+        """
+        Generate deterministic scan-like Arabic test documents.
+
+        Pages are drawn as images (one or two right-to-left columns of dictionary words)
+        and saved as image-only PDFs, like the scanned volumes the converters process.
+        The same seed, font and settings always produce the same pixels.
+
+        :param output_folder: Folder the fixtures are written to.
+        :param font_path: TrueType font with Arabic glyphs. Defaults to the first one found on the system.
+        :param seed: Seed for the word sequence.
+        """
+        self.output_folder = output_folder
+        self.font_path = font_path or next((path for path in FONT_CANDIDATES if os.path.exists(path)), None)
+        self.seed = seed
+
+        if not self.font_path:
+            raise FileNotFoundError("No font with Arabic glyphs found. Pass font_path explicitly.")
+
+        os.makedirs(self.output_folder, exist_ok=True)
+
+    def draw_text(self, draw, position, text, font):
+        """
+        Draw a right-to-left line. Without libraqm Pillow cannot shape Arabic, so the
+        characters are reversed to get the right visual order.
+        """
+        if features.check("raqm"):
+            draw.text(position, text, font=font, fill=0, direction="rtl", anchor="ra")
+        else:
+            draw.text(position, text[::-1], font=font, fill=0, anchor="ra")
+
+    def page(self, page_no, columns=2, dpi=200):
+        """
+        Draw one A4 page.
+        :param page_no: Page number, mixed into the seed so pages differ.
+        :param columns: Number of text columns (1 or 2).
+        :param dpi: Resolution of the page image.
+        :return: Grayscale PIL image.
+        """
+        rng = random.Random(self.seed * 100003 + page_no)
+        width, height = int(8.27 * dpi), int(11.69 * dpi)
+        margin = int(0.6 * dpi)
+        gutter = int(0.3 * dpi)
+        font_size = max(8, int(dpi * 0.16))
+        line_height = int(font_size * 1.8)
+
+        image = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        font = ImageFont.truetype(self.font_path, font_size)
+
+        column_width = (width - 2 * margin - (columns - 1) * gutter) // columns
+
+        # Right-to-left: the first column is the rightmost one
+        for col in range(columns):
+            right = width - margin - col * (column_width + gutter)
+            y = margin
+            while y + line_height < height - margin:
+                line = []
+                while True:
+                    candidate = " ".join(line + [rng.choice(WORDS)])
+                    if draw.textlength(candidate, font=font) > column_width:
+                        break
+                    line = candidate.split(" ")
+                self.draw_text(draw, (right, y), " ".join(line), font)
+                y += line_height
+
+                # Occasional blank line between entries
+                if rng.random() < 0.08:
+                    y += line_height
+
+            if columns > 1 and col < columns - 1:
+                x = right - column_width - gutter // 2
+                draw.line([(x, margin), (x, height - margin)], fill=0, width=1)
+
+        return image
+
+    def pdf(self, pages, columns=2, dpi=200):
+        """
+        Write an image-only PDF, or reuse it if it was generated before.
+        :param pages: Number of pages.
+        :param columns: Number of text columns.
+        :param dpi: Resolution the pages are drawn at.
+        :return: Path to the PDF.
+        """
+        pdf_path = os.path.join(self.output_folder, f"arabic_{columns}col_{pages}p_{dpi}dpi_s{self.seed}.pdf")
+        if os.path.exists(pdf_path):
+            return pdf_path
+
+        images = [self.page(page_no, columns, dpi) for page_no in range(1, pages + 1)]
+        images[0].save(pdf_path, "PDF", save_all=True, append_images=images[1:], resolution=dpi)
+
+        return pdf_path
+
+    def image(self, columns=2, dpi=200, page_no=1):
+        """
+        Write one page as a PNG, or reuse it if it was generated before.
+        :return: Path to the image.
+        """
+        image_path = os.path.join(self.output_folder, f"arabic_{columns}col_{dpi}dpi_p{page_no}_s{self.seed}.png")
+        if not os.path.exists(image_path):
+            self.page(page_no, columns, dpi).save(image_path)
+
+        return image_path
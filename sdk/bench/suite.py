@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from sdk.bench.fixtures import FixtureGenerator
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+
+PIPELINES = ("pdf2text", "pdf2png", "split", "sections")
+
+
+def stage_percentiles(events):
+    """
+    :param events: Trace events of a Metrics("trace") instance, including the ones merged from worker processes.
+    :return: Dict of stage -> span count and p50/p90/p99 latency in milliseconds.
+    """
+    samples = {}
+    for event in events:
+        if event.get("event") == "span":
+            samples.setdefault(event["stage"], []).append(event["seconds"])
+
+    summary = {}
+    for stage, seconds in samples.items():
+        seconds = sorted(seconds)
+        pick = lambda q: round(seconds[min(len(seconds) - 1, int(q * len(seconds)))] * 1000, 2)
+        summary[stage] = {"count": len(seconds), "p50_ms": pick(0.5), "p90_ms": pick(0.9), "p99_ms": pick(0.99)}
+    return summary
+
+
+def peak_rss_mb(who="self"):
+    """
+    :param who: "self" for this process, "children" for the largest of its finished child processes:
+                pool workers and tesseract processes.
+    :return: Peak resident set size in MB, or None where it cannot be measured.
+    """
+    if resource is None:
+        # Windows: the peak working set of this process, if psutil is installed. Finished children are gone.
+        if who != "self":
+            return None
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, "peak_wset", memory.rss) / (1024 * 1024), 1)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_pipeline(pipeline, pdf_path, pages, dpi, workers):
+    """
+    Run one pipeline on one fixture. Executed in a fresh process so peak RSS belongs to this run only.
+    Stage latencies come from the pipeline's own metrics spans, so pages rendered and OCRed in
+    worker processes are counted too.
+    :return: Dict with throughput, stage latencies and peak RSS of this process and of its largest child.
+    """
+    from sdk.metrics.metrics import Metrics
+    from sdk.pdf.pdf_to_text import PdfToText
+    from sdk.pdf.pdf_to_png import PdfToPng
+    from sdk.pdf.split_pdf import SplitPdf
+    from sdk.pdf.pdf_section_extractor import PDFSectionExtractor
+
+    metrics = Metrics("trace")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        start_time = time.perf_counter()
+
+        if pipeline == "pdf2text":
+            converter = PdfToText(pdf_path=pdf_path, dpi=dpi, output_folder=work_dir, split_pdf=False, workers=workers, skip_blank=False, metrics=metrics)
+            converter.convert_many([(pdf_path, None, None)])
+            converter.close()
+        elif pipeline == "pdf2png":
+            converter = PdfToPng(pdf_path=pdf_path, dpi=dpi, output_folder=work_dir, split_pdf=False, metrics=metrics)
+            converter.convert(pdf_path)
+        elif pipeline == "split":
+            splitter = SplitPdf(pdf_path, output_folder=work_dir, metrics=metrics)
+            splitter.split()
+        elif pipeline == "sections":
+            extractor = PDFSectionExtractor(pdf_path, ocr_resolution=dpi, layout="auto", ocr_workers=workers, skip_blank=False, output_folder=work_dir, metrics=metrics)
+            extractor.extract_text_from_sections()
+        else:
+            raise ValueError(f"Unknown pipeline '{pipeline}'. Choose one of: {', '.join(PIPELINES)}")
+
+        seconds = time.perf_counter() - start_time
+
+    return {
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(pages / seconds, 3),
+        "stages": stage_percentiles(metrics.events),
+        "peak_rss_mb": peak_rss_mb(),
+        "children_peak_rss_mb": peak_rss_mb("children"),
+    }
+
+
+class BenchmarkSuite:
+    def __init__(self, fixtures_folder, pipelines=PIPELINES, page_counts=(2, 8), dpis=(150, 300), columns=(1, 2), workers=1, font_path=None):
+        """
+        Throughput benchmark of the converters on generated Arabic fixtures.
+        :param fixtures_folder: Folder for the generated fixtures. They are reused between runs.
+        :param pipelines: Pipelines to measure: pdf2text, pdf2png, split, sections.
+        :param page_counts: Page counts of the generated PDFs.
+        :param dpis: Resolutions the pipelines render at. Fixtures are drawn at the same DPI.
+        :param columns: Column layouts of the generated PDFs.
+        :param workers: Worker count passed to pipelines that support it.
+        :param font_path: Font with Arabic glyphs for the fixtures (optional).
+        """
+        self.fixtures = FixtureGenerator(fixtures_folder, font_path=font_path)
+        self.pipelines = pipelines
+        self.page_counts = page_counts
+        self.dpis = dpis
+        self.columns = columns
+        self.workers = workers
+
+    def run(self):
+        """
+        :return: Result document with machine metadata and one entry per pipeline and fixture.
+        """
+        results = []
+        for columns in self.columns:
+            for pages in self.page_counts:
+                for dpi in self.dpis:
+                    pdf_path = self.fixtures.pdf(pages, columns, dpi)
+                    for pipeline in self.pipelines:
+                        case = {"pipeline": pipeline, "columns": columns, "pages": pages, "dpi": dpi}
+                        print(f"Running {case}")
+                        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                            try:
+                                case.update(executor.submit(run_pipeline, pipeline, pdf_path, pages, dpi, self.workers).result())
+                            except Exception as e:
+                                case["error"] = str(e)
+                        results.append(case)
+
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "workers": self.workers,
+            },
+            "results": results,
+        }
+
+
+def compare(current, baseline, tolerance=0.1):
+    """
+    Compare a result document with a stored baseline.
+    :param tolerance: Allowed relative loss in pages/sec and growth in peak RSS.
+    :return: List of regression messages. Empty if nothing regressed.
+    """
+    key = lambda case: (case["pipeline"], case["columns"], case["pages"], case["dpi"])
+    baseline_cases = {key(case): case for case in baseline["results"] if "error" not in case}
+
+    regressions = []
+    for case in current["results"]:
+        base = baseline_cases.get(key(case))
+        if not base:
+            continue
+        if "error" in case:
+            regressions.append(f"{key(case)}: failed: {case['error']}")
+            continue
+        if case["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance):
+            regressions.append(f"{key(case)}: pages/sec {base['pages_per_sec']} -> {case['pages_per_sec']}")
+        for field, name in (("peak_rss_mb", "peak RSS"), ("children_peak_rss_mb", "peak RSS of child processes")):
+            if case.get(field) and base.get(field) and case[field] > base[field] * (1 + tolerance):
+                regressions.append(f"{key(case)}: {name} {base[field]} MB -> {case[field]} MB")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the converters on generated Arabic fixtures")
+    parser.add_argument("--pipelines", nargs="+", default=list(PIPELINES), choices=PIPELINES)
+    parser.add_argument("--pages", nargs="+", type=int, default=[2, 8], help="Page counts of the fixtures")
+    parser.add_argument("--dpi", nargs="+", type=int, default=[150, 300], help="Render resolutions")
+    parser.add_argument("--columns", nargs="+", type=int, default=[1, 2], help="Column layouts of the fixtures")
+    parser.add_argument("--workers", type=int, default=1, help="Workers for pipelines that support them")
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "zac-bench-fixtures"), help="Folder for generated fixtures")
+    parser.add_argument("--font", help="TrueType font with Arabic glyphs")
+    parser.add_argument("--out", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    suite = BenchmarkSuite(args.fixtures, args.pipelines, args.pages, args.dpi, args.columns, args.workers, args.font)
+    results = suite.run()
+
+    with open(args.out, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Saved results: {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import json
+import os
+
+# Written by `zac autotune`, read by every zac command. ZAC_PROFILE points to another file.
+PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".config", "zac", "profile.json")
+
+
+def profile_path():
+    """
+    :return: Path of the tuning profile: $ZAC_PROFILE, or ~/.config/zac/profile.json.
+    """
+    return os.environ.get("ZAC_PROFILE") or PROFILE_PATH
+
+
+def load_profile(path=None):
+    """
+    Read a tuning profile.
+    :param path: Profile file. Defaults to profile_path().
+    :return: Dict of command name -> option defaults, e.g. {"pdf2text": {"dpi": 300, "workers": 4}}.
+             Empty if there is no profile or it cannot be read.
+    """
+    path = path or profile_path()
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, encoding="utf-8") as file:
+            profile = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring the tuning profile '{path}': {e}")
+        return {}
+
+    return profile.get("commands", {})
+
+
+def save_profile(profile, path=None):
+    """
+    Write a tuning profile atomically.
+    :param profile: Dict with a "commands" entry of command name -> option defaults, plus any details.
+    :param path: Profile file. Defaults to profile_path().
+    :return: Path of the written file.
+    """
+    path = path or profile_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(profile, file, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+    return path
@@ -0,0 +1,492 @@
+import argparse
+import os
+import sys
+from sdk.metrics.metrics import LEVELS
+from sdk.cli.profile import load_profile, profile_path
+
+# Subcommands import their converters when they run, so `zac img2text` never loads
+# pdf2image or OpenCV (NumPy still comes in with pytesseract) and `zac --help` loads nothing heavy at all.
+
+
+def input_paths(path):
+    """
+    :return: (pdf_path, folder_path) for a PDF file or a folder of PDFs.
+    """
+    if os.path.isdir(path):
+        return None, path
+
+    return path, None
+
+
+def make_metrics(args):
+    from sdk.metrics.metrics import Metrics
+
+    return Metrics(args.metrics, jsonl_path=args.metrics_jsonl, prometheus_path=args.metrics_prom)
+
+
+def make_dpi_estimator(args):
+    if not args.auto_dpi:
+        return None
+
+    from sdk.img.dpi_estimator import DpiEstimator
+
+    return DpiEstimator(target_x_height=args.target_x_height, min_dpi=args.min_dpi, max_dpi=args.max_dpi)
+
+
+def pdf2text(args):
+    from sdk.pdf.pdf_to_text import PdfToText
+
+    pdf_path, folder_path = input_paths(args.input)
+    converter = PdfToText(
+        pdf_path=pdf_path,
+        folder_path=folder_path,
+        output_folder=args.out,
+        dpi=args.dpi,
+        split_pdf=args.pages_per_split > 0,
+        workers=args.workers,
+        omp_thread_limit=args.omp_thread_limit,
+        lang=args.lang,
+        window_size=args.window_size,
+        pages_per_split=max(1, args.pages_per_split),
+        export_split=args.export_split,
+        cache_path=args.cache,
+        resume=args.resume,
+        engine=args.engine,
+        engine_pool_size=args.engine_pool_size,
+        skip_blank=args.skip_blank,
+        blank_threshold=args.blank_threshold,
+        metrics=make_metrics(args),
+        text_layer=args.text_layer,
+        output_extension=args.format,
+        dpi_estimator=make_dpi_estimator(args),
+        raster=args.raster,
+        index_path=args.index,
+    )
+
+    try:
+        if args.status:
+            converter.status()
+        else:
+            converter.start()
+    finally:
+        converter.close()
+
+
+def pdf2png(args):
+    from sdk.pdf.pdf_to_png import PdfToPng
+
+    pdf_path, folder_path = input_paths(args.input)
+    converter = PdfToPng(
+        pdf_path=pdf_path,
+        folder_path=folder_path,
+        output_folder=args.out,
+        dpi=args.dpi,
+        window_size=args.window_size,
+        resume=args.resume,
+        metrics=make_metrics(args),
+        grayscale=args.grayscale,
+    )
+    converter.start()
+
+
+def sections(args):
+    from sdk.pdf.pdf_section_extractor import PDFSectionExtractor
+
+    # The first of two passes only has to find the weak lines, so it can run at a low resolution
+    dpi = args.dpi or (150 if args.two_pass else 300)
+
+    metrics = make_metrics(args)
+    extractor = PDFSectionExtractor(
+        args.input,
+        num_vertical=args.columns,
+        num_horizontal=args.rows,
+        ocr_resolution=dpi,
+        window_size=args.window_size,
+        cache_path=args.cache,
+        engine=args.engine,
+        engine_pool_size=args.engine_pool_size,
+        threshold=args.threshold,
+        layout=args.layout,
+        skip_blank=args.skip_blank,
+        blank_threshold=args.blank_threshold,
+        ocr_workers=args.workers,
+        metrics=metrics,
+        output_folder=args.out,
+        lang=args.lang,
+        overlays=args.overlays,
+        dpi_estimator=make_dpi_estimator(args),
+        two_pass=args.two_pass,
+        refine_dpi=args.refine_dpi,
+        min_line_conf=args.min_line_conf,
+        raster=args.raster,
+        index_path=args.index,
+        psm=args.psm,
+    )
+    errors = extractor.extract_text_from_sections()
+    metrics.print_summary()
+
+    return 1 if errors else 0
+
+
+def img2text(args):
+    from sdk.img.img_to_text import ImageToTextConverter
+
+    converter = ImageToTextConverter(tesseract_path=args.tesseract, cache_path=args.cache, engine=args.engine, engine_pool_size=args.engine_pool_size)
+
+    failed = 0
+    for image_path in args.images:
+        text, boxes_path = converter.convert_image_to_text(image_path, lang=args.lang, overlay=args.overlays, overlay_folder=args.out)
+        if text is None:
+            failed += 1
+            continue
+
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            text_path = os.path.join(args.out, os.path.splitext(os.path.basename(image_path))[0] + ".txt")
+            with open(text_path, "w", encoding="utf-8") as file:
+                file.write(text)
+            print(f"Saved file: {text_path}")
+        else:
+            print(text)
+
+    converter.close()
+    return 1 if failed else 0
+
+
+def split(args):
+    from sdk.pdf.split_pdf import SplitPdf
+
+    metrics = make_metrics(args)
+    split_pdfs = SplitPdf(args.input, output_folder=args.out, pages_per_split=args.pages_per_split, metrics=metrics).split()
+    metrics.print_summary()
+    metrics.flush()
+
+    return 0 if split_pdfs else 1
+
+
+def render_overlay(args):
+    from sdk.img.overlay import OverlayRenderer
+
+    renderer = OverlayRenderer(encoder=args.encoder, level=args.level, width=args.width)
+    for path in renderer.render(args.boxes, output_folder=args.out, pdf_path=args.pdf, pages=args.pages):
+        print(f"Saved file: {path}")
+
+
+def queue_init(args):
+    from sdk.pdf.work_queue import WorkQueue
+
+    queue = WorkQueue(args.queue)
+    queue.set_settings({
+        "dpi": args.dpi,
+        "lang": args.lang,
+        "output_folder": os.path.abspath(args.out) if args.out else None,
+        "cache_path": args.cache,
+        "engine": args.engine,
+        "engine_pool_size": args.engine_pool_size,
+        "skip_blank": args.skip_blank,
+        "blank_threshold": args.blank_threshold,
+        "text_layer": args.text_layer,
+        "raster": args.raster,
+        "auto_dpi": {"target_x_height": args.target_x_height, "min_dpi": args.min_dpi, "max_dpi": args.max_dpi} if args.auto_dpi else None,
+    })
+
+    added = queue.add_folder(args.input) if os.path.isdir(args.input) else queue.add_pdf(args.input)
+    print(f"Added {added} page(s) to '{args.queue}'")
+    queue.print_status()
+
+
+def queue_work(args):
+    from sdk.pdf.work_queue import run_workers
+
+    metrics = make_metrics(args)
+    done, failed = run_workers(args.queue, processes=args.processes, batch_size=args.batch_size, metrics=metrics)
+    print(f"Converted {done} page(s), {failed} failed attempt(s)")
+    metrics.print_summary()
+    metrics.flush()
+
+
+def queue_status(args):
+    from sdk.pdf.work_queue import WorkQueue
+
+    WorkQueue(args.queue).print_status()
+
+
+def queue_retry(args):
+    from sdk.pdf.work_queue import WorkQueue
+
+    print(f"Re-queued {WorkQueue(args.queue).retry_failed()} failed page(s)")
+
+
+def index(args):
+    from sdk.pdf.page_container import PageContainerReader
+    from sdk.search.search_index import SearchIndex
+
+    search_index = SearchIndex(args.index)
+    for path in args.containers:
+        units = words = 0
+        for record in PageContainerReader(path):
+            # Containers written before records carried the PDF path only have its file name
+            name = search_index.unit_name(record["path"]) if "path" in record else record["pdf"]
+            words += search_index.add(name, record["page"], record.get("text", ""), record.get("section", ""), commit=False)
+            units += 1
+            if units % 500 == 0:
+                search_index.commit()
+        search_index.commit()
+        print(f"Indexed {units} page(s) or section(s), {words} word(s) from '{path}'")
+
+    stats = search_index.stats()
+    print(f"Index '{args.index}': {stats['units']} page(s) or section(s), {stats['terms']} distinct word(s)")
+
+
+def search(args):
+    import time
+    from sdk.search.search_index import SearchIndex
+
+    if not os.path.exists(args.index):
+        print(f"Index '{args.index}' does not exist. Build it with `zac pdf2text --index`, `zac sections --index` or `zac index`.")
+        return 1
+
+    start_time = time.perf_counter()
+    hits, total = SearchIndex(args.index).search(" ".join(args.query), limit=args.limit, phrase=args.phrase, prefix=args.prefix)
+    milliseconds = (time.perf_counter() - start_time) * 1000
+
+    for hit in hits:
+        section = f" section {hit['section']}" if hit["section"] else ""
+        print(f"{hit['pdf']} page {hit['page']}{section}: {hit['snippet']}")
+    shown = f", showing the first {len(hits)}" if total > len(hits) else ""
+    print(f"{total} hit(s) in {milliseconds:.1f} ms{shown}")
+
+    return 0 if hits else 1
+
+
+def autotune(args):
+    from sdk.bench.autotune import Autotuner
+    from sdk.cli.profile import save_profile
+
+    tuner = Autotuner(
+        args.input,
+        commands=args.commands,
+        pages=args.pages,
+        max_files=args.max_files,
+        lang=args.lang,
+        engine=args.engine,
+        reference_dpi=args.reference_dpi,
+        dpis=args.dpis,
+        psms=args.psms,
+        max_workers=args.max_workers,
+        tolerance=args.tolerance,
+    )
+    profile = tuner.run()
+
+    # Keep the tuned options of commands that were not tuned this time
+    profile["commands"] = {**load_profile(args.out), **profile["commands"]}
+    for command, options in profile["commands"].items():
+        print(f"{command}: {', '.join(f'{name}={value}' for name, value in options.items())}")
+    print(f"Saved profile: {save_profile(profile, args.out)}")
+
+
+def add_metrics_args(parser):
+    parser.add_argument("--metrics", default="summary", choices=LEVELS, help="Per-stage timing: off, summary (aggregates only) or trace (every span)")
+    parser.add_argument("--metrics-jsonl", help="Append trace events and a summary line to this JSON-lines file")
+    parser.add_argument("--metrics-prom", help="Write the aggregates to this Prometheus textfile")
+
+
+def add_ocr_args(parser, workers_help):
+    parser.add_argument("--workers", type=int, default=1, help=workers_help)
+    parser.add_argument("--lang", default="ara", help="Language code for OCR")
+    parser.add_argument("--cache", help="Path to an OCR cache file; images seen before are not OCRed again")
+    parser.add_argument("--engine", default="subprocess", choices=["subprocess", "tesserocr"], help="OCR engine backend")
+    parser.add_argument("--engine-pool-size", type=int, default=1, help="Number of warm OCR engine instances (tesserocr)")
+
+
+def add_dpi_args(parser):
+    parser.add_argument("--auto-dpi", action="store_true", help="Pick the DPI of every page from a low-resolution probe of its text size; --dpi is used for pages without text")
+    parser.add_argument("--target-x-height", type=int, default=20, help="Text height in pixels that auto DPI aims for")
+    parser.add_argument("--min-dpi", type=int, default=100, help="Lowest DPI auto DPI picks")
+    parser.add_argument("--max-dpi", type=int, default=400, help="Highest DPI auto DPI picks")
+
+
+def add_raster_args(parser):
+    parser.add_argument("--raster", default="pgm", choices=["pgm", "pil"], help="Render pages to memory-mapped grayscale PGM files (less memory, no decoding) or to RGB PIL images")
+
+
+def add_index_args(parser):
+    parser.add_argument("--index", help="Search index file; every finished page or section is added to it for `zac search`")
+
+
+def add_blank_args(parser):
+    parser.add_argument("--no-skip-blank", dest="skip_blank", action="store_false", help="OCR everything, even blank pages and sections")
+    parser.add_argument("--blank-threshold", type=float, default=0.002, help="Minimum share of ink pixels for a page or section to be OCRed")
+
+
+def build_parser(profile=None):
+    """
+    :param profile: Tuned option defaults per command, from load_profile(). Options given on the command line still win.
+    """
+    profile = profile or {}
+    parser = argparse.ArgumentParser(prog="zac", description="Zawjen CLI: OCR and conversion of Arabic PDFs and images")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    command = subparsers.add_parser("pdf2text", help="OCR a PDF, or every PDF in a folder, to text files")
+    command.add_argument("input", help="PDF file or folder of PDFs")
+    command.add_argument("-o", "--out", help="Output folder. Defaults to out/<name> next to the PDF")
+    command.add_argument("--dpi", type=int, default=200, help="Resolution for rendering pages")
+    add_ocr_args(command, "Number of processes used to render and OCR pages")
+    command.add_argument("--omp-thread-limit", type=int, default=1, help="OpenMP threads per tesseract process when --workers is above 1")
+    command.add_argument("--window-size", type=int, default=4, help="Number of pages rendered and held in memory at once")
+    command.add_argument("--pages-per-split", type=int, default=1, help="Pages per output file; 0 writes one file per PDF")
+    command.add_argument("--export-split", action="store_true", help="Also write each page range as a separate PDF file")
+    command.add_argument("--resume", action="store_true", help="Skip pages that a previous run of the same job already finished")
+    command.add_argument("--status", action="store_true", help="Show the progress of the job and exit")
+    command.add_argument("--no-text-layer", dest="text_layer", action="store_false", help="OCR every page, even pages with a usable embedded text layer")
+    add_dpi_args(command)
+    add_raster_args(command)
+    add_index_args(command)
+    command.add_argument("--format", default="txt", choices=["txt", "jsonl"], help="Plain text files, or one indexed JSON-lines container of page records per PDF")
+    add_blank_args(command)
+    add_metrics_args(command)
+    command.set_defaults(handler=pdf2text, **profile.get("pdf2text", {}))
+
+    command = subparsers.add_parser("pdf2png", help="Render the pages of a PDF, or every PDF in a folder, to PNG files")
+    command.add_argument("input", help="PDF file or folder of PDFs")
+    command.add_argument("-o", "--out", help="Output folder. Defaults to out/<name> next to the PDF")
+    command.add_argument("--dpi", type=int, default=200, help="Resolution for rendering pages")
+    command.add_argument("--window-size", type=int, default=4, help="Number of pages rendered and held in memory at once")
+    command.add_argument("--resume", action="store_true", help="Skip pages that a previous run of the same job already finished")
+    command.add_argument("--grayscale", action="store_true", help="Write grayscale PNGs, encoded straight from memory-mapped PGM renders")
+    add_metrics_args(command)
+    command.set_defaults(handler=pdf2png)
+
+    command = subparsers.add_parser("sections", help="OCR the columns and blocks of a PDF section by section")
+    command.add_argument("input", help="PDF file")
+    command.add_argument("-o", "--out", help="Output folder for <name>.sections.jsonl. Defaults to out/<name> next to the PDF")
+    command.add_argument("--dpi", type=int, help="Resolution for rendering pages. Defaults to 300, or to 150 for the first pass of --two-pass")
+    add_ocr_args(command, "Number of OCR threads")
+    command.add_argument("--layout", default="grid", choices=["grid", "auto"], help="Fixed grid of sections, or detected columns and blocks")
+    command.add_argument("--columns", type=int, default=1, help="Number of grid columns")
+    command.add_argument("--rows", type=int, default=1, help="Number of grid rows")
+    command.add_argument("--psm", type=int, default=1, help="Tesseract page segmentation mode for each section")
+    command.add_argument("--threshold", default="global", choices=["global", "section"], help="Binarize once per page or once per section")
+    command.add_argument("--window-size", type=int, default=4, help="Number of pages rendered and held in memory at once")
+    command.add_argument("--overlays", action="store_true", help="Store word boxes for `zac render-overlay`")
+    command.add_argument("--two-pass", action="store_true", help="OCR at --dpi first, then OCR only low-confidence lines again at --refine-dpi")
+    command.add_argument("--refine-dpi", type=int, default=400, help="Resolution of the second pass. Pages already OCRed at this resolution or above are not refined")
+    command.add_argument("--min-line-conf", type=int, default=60, help="Lines with a lower mean word confidence (0-100) get the second pass")
+    add_dpi_args(command)
+    add_raster_args(command)
+    add_index_args(command)
+    add_blank_args(command)
+    add_metrics_args(command)
+    # Let the extractor size its OCR threads and engine pool from the CPU count, unless a profile says otherwise
+    command.set_defaults(handler=sections, **{"workers": None, "engine_pool_size": None, **profile.get("sections", {})})
+
+    command = subparsers.add_parser("img2text", help="OCR images and print or save their text")
+    command.add_argument("images", nargs="+", help="Image files")
+    command.add_argument("-o", "--out", help="Folder for <name>.txt (and <name>_ocr.json) files. Text is printed when omitted")
+    command.add_argument("--lang", default="ara", help="Language code for OCR")
+    command.add_argument("--cache", help="Path to an OCR cache file; images seen before are not OCRed again")
+    command.add_argument("--engine", default="subprocess", choices=["subprocess", "tesserocr"], help="OCR engine backend")
+    command.add_argument("--engine-pool-size", type=int, default=1, help="Number of warm OCR engine instances (tesserocr)")
+    command.add_argument("--tesseract", help="Path to the tesseract executable if it is not on PATH")
+    command.add_argument("--overlays", action="store_true", help="Save word boxes to <name>_ocr.json for `zac render-overlay`")
+    command.set_defaults(handler=img2text)
+
+    command = subparsers.add_parser("split", help="Split a PDF into smaller PDF files")
+    command.add_argument("input", help="PDF file")
+    command.add_argument("-o", "--out", help="Output folder. Defaults to out/<name>/pdf next to the PDF")
+    command.add_argument("--pages-per-split", type=int, default=1, help="Pages per split file")
+    add_metrics_args(command)
+    command.set_defaults(handler=split)
+
+    command = subparsers.add_parser("render-overlay", help="Draw stored OCR boxes over their pages or images")
+    command.add_argument("boxes", help="<name>.sections.jsonl from `zac sections --overlays`, or <name>_ocr.json from `zac img2text --overlays`")
+    command.add_argument("-o", "--out", help="Output folder. Defaults to overlay/ next to the box data")
+    command.add_argument("--pdf", help="PDF of a sections file. Defaults to the PDF two folders up from out/<name>/")
+    command.add_argument("--pages", type=int, nargs="+", help="Pages of a sections file to render. Defaults to all")
+    command.add_argument("--encoder", default="png", choices=["png", "jpeg", "webp"], help="Image encoder")
+    command.add_argument("--level", type=int, help="PNG compression level 0-9 (default 1, fast) or JPEG/WebP quality 1-100")
+    command.add_argument("--width", type=int, default=2, help="Line width of the boxes in pixels")
+    command.set_defaults(handler=render_overlay)
+
+    command = subparsers.add_parser("queue", help="Spread pdf2text over many worker processes or hosts through a shared queue file")
+    queue_commands = command.add_subparsers(dest="queue_command", metavar="queue_command", required=True)
+
+    queue_command = queue_commands.add_parser("init", help="Add every page of a PDF or folder to the queue, with the settings workers use")
+    queue_command.add_argument("input", help="PDF file or folder of PDFs, on a path every worker can read")
+    queue_command.add_argument("--queue", required=True, help="Queue file, on a mount every worker shares")
+    queue_command.add_argument("-o", "--out", help="Output folder. Defaults to out/<name> next to each PDF")
+    queue_command.add_argument("--dpi", type=int, default=200, help="Resolution for rendering pages")
+    queue_command.add_argument("--lang", default="ara", help="Language code for OCR")
+    queue_command.add_argument("--cache", help="Path to an OCR cache file; prefer a local path on each host")
+    queue_command.add_argument("--engine", default="subprocess", choices=["subprocess", "tesserocr"], help="OCR engine backend")
+    queue_command.add_argument("--engine-pool-size", type=int, default=1, help="Number of warm OCR engine instances (tesserocr)")
+    queue_command.add_argument("--no-text-layer", dest="text_layer", action="store_false", help="OCR every page, even pages with a usable embedded text layer")
+    add_dpi_args(queue_command)
+    add_raster_args(queue_command)
+    add_blank_args(queue_command)
+    queue_command.set_defaults(handler=queue_init)
+
+    queue_command = queue_commands.add_parser("work", help="Convert pages from the queue until none are left")
+    queue_command.add_argument("--queue", required=True, help="Queue file")
+    queue_command.add_argument("--processes", type=int, default=1, help="Worker processes on this host")
+    queue_command.add_argument("--batch-size", type=int, default=1, help="Pages claimed per queue transaction")
+    add_metrics_args(queue_command)
+    queue_command.set_defaults(handler=queue_work)
+
+    queue_command = queue_commands.add_parser("status", help="Show pages per state, throughput and failures")
+    queue_command.add_argument("--queue", required=True, help="Queue file")
+    queue_command.set_defaults(handler=queue_status)
+
+    queue_command = queue_commands.add_parser("retry", help="Put failed pages back into the queue")
+    queue_command.add_argument("--queue", required=True, help="Queue file")
+    queue_command.set_defaults(handler=queue_retry)
+
+    command = subparsers.add_parser("index", help="Add the pages or sections of JSON-lines containers to a search index")
+    command.add_argument("containers", nargs="+", help="<name>.jsonl from `zac pdf2text --format jsonl` or <name>.sections.jsonl from `zac sections`")
+    command.add_argument("--index", required=True, help="Search index file. Created if missing; pages indexed before are replaced")
+    command.set_defaults(handler=index)
+
+    command = subparsers.add_parser("search", help="Find words in a search index, with their pages and sections")
+    command.add_argument("query", nargs="+", help="Words to find; vowel marks and letter variants are ignored")
+    command.add_argument("--index", required=True, help="Search index file")
+    command.add_argument("--phrase", action="store_true", help="Only match the words next to each other, in order")
+    command.add_argument("--prefix", action="store_true", help="Also match words that start with the query words")
+    command.add_argument("--limit", type=int, default=20, help="Maximum number of hits shown")
+    command.set_defaults(handler=search)
+
+    command = subparsers.add_parser("autotune", help="Time short trials on sample pages and save the fastest settings that keep OCR quality as defaults")
+    command.add_argument("input", help="PDF file or folder of PDFs to sample")
+    command.add_argument("-o", "--out", help=f"Profile file. Defaults to $ZAC_PROFILE or {profile_path()}")
+    command.add_argument("--commands", nargs="+", default=["pdf2text", "sections"], choices=["pdf2text", "sections"], help="Commands to tune")
+    command.add_argument("--pages", type=int, help="Number of sample pages. Defaults to twice the CPU count, at least 8")
+    command.add_argument("--max-files", type=int, default=4, help="Number of PDFs of a folder to take sample pages from")
+    command.add_argument("--lang", default="ara", help="Language code for OCR")
+    command.add_argument("--engine", default="subprocess", choices=["subprocess", "tesserocr"], help="OCR engine the trials use")
+    command.add_argument("--reference-dpi", type=int, default=400, help="DPI of the quality reference pass")
+    command.add_argument("--dpis", type=int, nargs="+", default=[150, 200, 300], help="DPI candidates")
+    command.add_argument("--psms", type=int, nargs="+", default=[1, 3, 6], help="Page segmentation modes tried for sections")
+    command.add_argument("--max-workers", type=int, help="Highest worker count tried. Defaults to the CPU count")
+    command.add_argument("--tolerance", type=float, default=0.02, help="Word agreement with the reference a faster setting may lose")
+    command.set_defaults(handler=autotune)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of the `zac` command.
+    :param argv: Arguments without the program name. Defaults to sys.argv[1:].
+    :return: Exit status.
+    """
+    profile = load_profile()
+    args = build_parser(profile).parse_args(argv)
+
+    tuned = {name: value for name, value in profile.get(args.command, {}).items() if getattr(args, name, None) == value}
+    if tuned:
+        print(f"Tuned defaults from {profile_path()}: {', '.join(f'{name}={value}' for name, value in tuned.items())}")
+
+    return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
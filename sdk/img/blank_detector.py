@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+class BlankDetector:
+    def __init__(self, min_ink=0.002, min_components=3, downsample=4, ink_level=160, min_component_area=2):
+        """
+        Cheap pre-OCR gate for blank pages, divider pages and sections that are only margin.
+
+        The image is shrunk by `downsample`, then judged on its share of ink pixels and on
+        the number of connected ink components. Text produces many small components; a
+        blank page has almost no ink, and a stray speck or rule only a few components.
+
+        :param min_ink: Minimum share of ink pixels for an image to be OCRed.
+        :param min_components: Minimum number of ink components for an image to be OCRed.
+        :param downsample: Factor the image is shrunk by before measuring.
+        :param ink_level: Gray levels below this count as ink.
+        :param min_component_area: Smaller components (in downsampled pixels) are ignored as noise.
+        """
+        self.min_ink = min_ink
+        self.min_components = min_components
+        self.downsample = max(1, downsample)
+        self.ink_level = ink_level
+        self.min_component_area = min_component_area
+
+    def measure(self, image):
+        """
+        :param image: PIL image or NumPy array.
+        :return: Tuple of (ink share, number of ink components).
+        """
+        if not isinstance(image, np.ndarray):  # np.memmap has a `mode` too, so test for arrays
+            image = image.convert("L")
+        array = np.asarray(image)
+        if array.ndim == 3:
+            array = cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+
+        height, width = array.shape
+        ink_level = self.ink_level
+        if self.downsample > 1 and height >= self.downsample and width >= self.downsample:
+            array = cv2.resize(array, (width // self.downsample, height // self.downsample), interpolation=cv2.INTER_AREA)
+            # A one-pixel stroke only darkens its block by 1/downsample of its ink, so a block holding
+            # that much darkness is ink. A lone speck pixel darkens it less and stays background.
+            ink_level = 255 - (255 - self.ink_level) / self.downsample
+
+        ink = (array < ink_level).astype(np.uint8)
+        density = float(ink.mean()) if ink.size else 0.0
+        if density < self.min_ink:
+            return density, 0
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        components = int(np.count_nonzero(stats[1:, cv2.CC_STAT_AREA] >= self.min_component_area))
+
+        return density, components
+
+    def is_blank(self, image, min_components=None):
+        """
+        :param image: PIL image or NumPy array.
+        :param min_components: Overrides the minimum number of ink components, e.g. 1 for a detected
+                               text block, which can be a page number of one or two characters.
+        :return: True if the image has no text worth sending to OCR.
+        """
+        density, components = self.measure(image)
+        min_components = self.min_components if min_components is None else min_components
+        return density < self.min_ink or components < min_components
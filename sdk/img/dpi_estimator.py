@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+class DpiEstimator:
+    def __init__(self, target_x_height=20, probe_dpi=72, min_dpi=100, max_dpi=400, step=25, ink_level=160, min_components=20):
+        """
+        Pick a render resolution per page from a cheap low-resolution probe.
+
+        The probe is binarized and split into connected ink components. Components that are
+        too small (dots, diacritics, noise) or too large (rules, images, frames) are dropped,
+        and the median height of the rest is taken as the x-height of the body text. The
+        chosen DPI is the lowest one at which that height reaches `target_x_height` pixels,
+        rounded up to a multiple of `step`: large type is rendered with fewer pixels, small
+        footnote type with more.
+
+        :param target_x_height: Text height in pixels that Tesseract should see.
+        :param probe_dpi: Resolution of the probe render.
+        :param min_dpi: Lowest DPI chosen.
+        :param max_dpi: Highest DPI chosen.
+        :param step: Chosen DPIs are multiples of this, so neighbouring pages usually share one render call.
+        :param ink_level: Gray levels below this count as ink.
+        :param min_components: Pages with fewer text-sized components are rendered at the fallback DPI.
+        """
+        self.target_x_height = target_x_height
+        self.probe_dpi = probe_dpi
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+        self.step = max(1, step)
+        self.ink_level = ink_level
+        self.min_components = min_components
+
+    def x_height(self, image):
+        """
+        :param image: PIL image or NumPy array of the probe.
+        :return: Median height in pixels of the text-sized ink components, or None if there are too few.
+        """
+        if not isinstance(image, np.ndarray):  # np.memmap has a `mode` too, so test for arrays
+            image = image.convert("L")
+        array = np.asarray(image)
+        if array.ndim == 3:
+            array = cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+
+        ink = (array < self.ink_level).astype(np.uint8)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        page_height, page_width = array.shape
+        text = (heights >= 2) & (stats[1:, cv2.CC_STAT_AREA] >= 3) & (heights <= page_height / 20) & (widths <= page_width / 4)
+        if np.count_nonzero(text) < self.min_components:
+            return None
+
+        return float(np.median(heights[text]))
+
+    def estimate(self, image, fallback_dpi=None):
+        """
+        :param image: Probe of the page rendered at probe_dpi.
+        :param fallback_dpi: DPI for pages without measurable text. Defaults to min_dpi.
+        :return: DPI to render the page at.
+        """
+        x_height = self.x_height(image)
+        if x_height is None:
+            return max(self.min_dpi, min(self.max_dpi, fallback_dpi or self.min_dpi))
+
+        dpi = self.probe_dpi * self.target_x_height / x_height
+        dpi = int(-(-dpi // self.step) * self.step)  # Round up to a multiple of step
+
+        return max(self.min_dpi, min(self.max_dpi, dpi))
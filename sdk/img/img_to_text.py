@@ -1,69 +1,84 @@
-from PIL import Image, ImageDraw
+from PIL import Image
 import pytesseract
+import json
 import os
+from sdk.ocr.ocr_cache import OcrCache
+from sdk.ocr.ocr_result import OcrResult
+from sdk.ocr.ocr_engine import get_engine
 
 class ImageToTextConverter:
-    def __init__(self, tesseract_path=None):
+    def __init__(self, tesseract_path=None, cache_path=None, engine="subprocess", engine_pool_size=1):
         """
         Initialize the ImageToTextConverter.
         :param tesseract_path: Path to the Tesseract executable if it's not in the PATH.
+        :param cache_path: Path to an OCR cache file (optional).
+        :param engine: OCR engine: "subprocess" or "tesserocr".
+        :param engine_pool_size: Number of warm engine instances for engines that keep them.
         """
         if tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
 
-    def convert_image_to_text(self, image_path, lang="ara"):
+        self.cache = OcrCache(cache_path) if cache_path else None
+        self.engine = get_engine(engine, engine_pool_size)
+
+    def convert_image_to_text(self, image_path, lang="ara", overlay=False, overlay_folder=None):
         """
         Convert an image to text using Tesseract OCR with support for Arabic.
         :param image_path: Path to the image file.
         :param lang: Language code for OCR (default is "ara" for Arabic).
-        :return: Extracted text.
+        :param overlay: Save the word boxes to <name>_ocr.json so `zac render-overlay` can draw them later.
+        :param overlay_folder: Folder for the box file. Defaults to the folder of the image.
+        :return: Extracted text and the path of the box file (None without overlay).
         """
         try:
             # Open the image file using Pillow
             image = Image.open(image_path)
 
-            # Extract text from image using pytesseract
-            text = pytesseract.image_to_string(image, lang=lang)
-
-            # Get detailed OCR data (text and bounding boxes)
-            ocr_data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
-
-            # Annotate the image by drawing green rectangles around detected text
-            annotated_image = self.annotate_image(image, ocr_data)
+            if self.cache:
+                result = OcrResult.from_dict(self.cache.fetch(image, lambda: self.run_ocr(image, lang).to_dict(), engine=self.engine.name, lang=lang, config="", output="ocr_result"))
+            else:
+                result = self.run_ocr(image, lang)
 
-            # Generate the annotated image path with original extension and "_ocr" suffix
-            base_name, ext = os.path.splitext(image_path)  # Split the extension
-            annotated_image_path = f"{base_name}_ocr{ext}"  # Append _ocr to the base name
+            boxes_path = self.save_boxes(image_path, result, overlay_folder) if overlay else None
 
-            # Save the annotated image
-            annotated_image.save(annotated_image_path)
-
-            return text, annotated_image_path
+            return result.text, boxes_path
 
         except Exception as e:
             print(f"Error processing image: {e}")
             return None, None
 
-    def annotate_image(self, image, ocr_data):
+    def run_ocr(self, image, lang):
         """
-        Annotate the image with green rectangles around detected text.
+        Run Tesseract once on an image; text, lines and boxes all come from the same pass.
         :param image: PIL image object.
-        :param ocr_data: OCR data with bounding box information.
-        :return: Annotated PIL image.
+        :param lang: Language code for OCR.
+        :return: OcrResult.
+        """
+        return self.engine.recognize(image, lang=lang)
+
+    def close(self):
+        """
+        Write the pending cache lookups and close the cache.
         """
-        # Convert the image to RGB to ensure we can draw on it
-        image = image.convert("RGB")
+        if self.cache:
+            self.cache.close()
+            self.cache = None
 
-        # Create a drawing context on the image
-        draw = ImageDraw.Draw(image)
+    def save_boxes(self, image_path, result, folder=None):
+        """
+        Save the word boxes of an image for OverlayRenderer instead of drawing them now.
+        :param image_path: Path to the image file.
+        :param result: OcrResult of the image.
+        :param folder: Folder for the box file. Defaults to the folder of the image.
+        :return: Path of <name>_ocr.json.
+        """
+        base_name = os.path.splitext(os.path.basename(image_path))[0]
+        folder = folder or os.path.dirname(os.path.abspath(image_path))
+        os.makedirs(folder, exist_ok=True)
 
-        # Loop through each word in the OCR data and draw a rectangle around it
-        for i in range(len(ocr_data["text"])):
-            text = ocr_data["text"][i]
-            if text.strip():  # Only consider non-empty text
-                # Get the coordinates for the bounding box
-                x, y, w, h = ocr_data["left"][i], ocr_data["top"][i], ocr_data["width"][i], ocr_data["height"][i]
-                draw.rectangle([x, y, x + w, y + h], outline="green", width=2)
+        boxes_path = os.path.join(folder, f"{base_name}_ocr.json")
+        with open(boxes_path, "w", encoding="utf-8") as file:
+            json.dump({"image": os.path.abspath(image_path), "boxes": [list(box) for box in result.boxes()]}, file)
 
-        return image
+        return boxes_path
 
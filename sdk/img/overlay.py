@@ -0,0 +1,160 @@
+import json
+import os
+import numpy as np
+from PIL import Image
+from sdk.pdf.page_container import PageContainerReader
+from sdk.pdf.page_source import PageSource
+
+# Encoder -> (PIL format, file extension, option set by `level`, default level, fixed options).
+# The defaults favour speed: PNG level 1 encodes several times faster than the PIL default of 6.
+ENCODERS = {
+    "png": ("PNG", ".png", "compress_level", 1, {}),
+    "jpeg": ("JPEG", ".jpg", "quality", 85, {}),
+    "webp": ("WEBP", ".webp", "quality", 80, {"method": 0}),
+}
+
+WORD_COLOR = (0, 160, 0)
+SECTION_COLOR = (0, 90, 255)
+
+
+class OverlayRenderer:
+    def __init__(self, encoder="png", level=None, width=2):
+        """
+        Render OCR boxes over the image or page they were recognized on, on demand.
+
+        The converters only store box data (see PDFSectionExtractor and ImageToTextConverter
+        with overlays=True); nothing is drawn or encoded while OCR runs.
+
+        All boxes of an image are drawn in one vectorized pass: the pixel indices of every box
+        edge are generated with NumPy and assigned at once, instead of one draw call per word.
+
+        :param encoder: "png", "jpeg" or "webp".
+        :param level: PNG compression level (0-9) or JPEG/WebP quality (1-100). Defaults per encoder.
+        :param width: Line width of the boxes in pixels.
+        """
+        if encoder not in ENCODERS:
+            raise ValueError(f"Unknown encoder '{encoder}'. Use one of: {', '.join(ENCODERS)}")
+
+        self.encoder = encoder
+        self.level = level
+        self.width = max(1, width)
+
+    def edge_pixels(self, shape, boxes):
+        """
+        :param shape: (height, width) of the image.
+        :param boxes: Sequence of (left, top, right, bottom) boxes.
+        :return: (rows, cols) index arrays of every pixel on the outline of any box.
+        """
+        height, width = shape
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        left, top, right, bottom = boxes.T
+        inset = self.width - 1
+
+        # Top, bottom, left and right edge of every box as inclusive bands, cut to the image
+        band_top = np.maximum(np.concatenate([top, bottom - inset, top, top]), 0)
+        band_bottom = np.minimum(np.concatenate([top + inset, bottom, bottom, bottom]), height - 1)
+        band_left = np.maximum(np.concatenate([left, left, left, right - inset]), 0)
+        band_right = np.minimum(np.concatenate([right, right, left + inset, right]), width - 1)
+
+        valid = (band_top <= band_bottom) & (band_left <= band_right)
+        band_top, band_left = band_top[valid], band_left[valid]
+        band_width = band_right[valid] - band_left + 1
+        counts = (band_bottom[valid] - band_top + 1) * band_width
+
+        # Position of every pixel inside its band, without a loop over the bands
+        band = np.repeat(np.arange(len(counts)), counts)
+        position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        return band_top[band] + position // band_width[band], band_left[band] + position % band_width[band]
+
+    def draw(self, image, boxes, color=WORD_COLOR):
+        """
+        :param image: PIL image, or NumPy array (grayscale or RGB).
+        :param boxes: Sequence of (left, top, right, bottom) boxes.
+        :param color: RGB color of the boxes.
+        :return: RGB NumPy array with the boxes drawn. The input is not modified.
+        """
+        if isinstance(image, Image.Image):
+            array = np.array(image.convert("RGB"))
+        else:
+            array = np.asarray(image)
+            array = np.repeat(array[:, :, None], 3, axis=2) if array.ndim == 2 else array.copy()
+
+        if len(boxes):
+            array[self.edge_pixels(array.shape[:2], boxes)] = color
+
+        return array
+
+    def save(self, array, path):
+        """
+        Encode an RGB array with the selected encoder.
+        :param path: Output path without extension; the encoder's extension is added.
+        :return: Path of the written file.
+        """
+        image_format, extension, option, default_level, options = ENCODERS[self.encoder]
+        path = path + extension
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        Image.fromarray(array).save(path, image_format, **{option: default_level if self.level is None else self.level}, **options)
+
+        return path
+
+    def render(self, boxes_path, output_folder=None, pdf_path=None, pages=None):
+        """
+        Render overlays from stored box data.
+        :param boxes_path: A <name>.sections.jsonl container, or a <name>_ocr.json box file of an image.
+        :param output_folder: Folder for the overlays. Defaults to overlay/ next to the box data.
+        :param pdf_path: PDF the sections came from (containers only). Defaults to the PDF named in the
+                         records, two folders up from out/<name>/.
+        :param pages: Page numbers to render (containers only). Defaults to all pages.
+        :return: List of written files.
+        """
+        output_folder = output_folder or os.path.join(os.path.dirname(os.path.abspath(boxes_path)), "overlay")
+
+        if boxes_path.endswith(".jsonl"):
+            return self.render_sections(boxes_path, output_folder, pdf_path, pages)
+
+        return [self.render_image(boxes_path, output_folder)]
+
+    def render_image(self, boxes_path, output_folder):
+        """
+        Draw the word boxes of an image OCRed by ImageToTextConverter.
+        :return: Path of the overlay.
+        """
+        with open(boxes_path, encoding="utf-8") as file:
+            data = json.load(file)
+
+        with Image.open(data["image"]) as image:
+            array = self.draw(image, data["boxes"])
+
+        name = os.path.splitext(os.path.basename(data["image"]))[0]
+        return self.save(array, os.path.join(output_folder, f"{name}_ocr"))
+
+    def render_sections(self, container_path, output_folder, pdf_path=None, pages=None):
+        """
+        Re-render the pages of a section container and draw section outlines and word boxes.
+        :return: Paths of the overlays, one per page.
+        """
+        reader = PageContainerReader(container_path)
+        pages = sorted(set(pages) & set(reader.pages())) if pages else reader.pages()
+
+        paths = []
+        for page in pages:
+            records = reader.read(page)
+            if not records:
+                continue
+
+            if not any("boxes" in record for record in records):
+                print(f"Page {page} has no word boxes; run `zac sections` with --overlays to store them. Drawing sections only.")
+
+            pdf = pdf_path or os.path.join(os.path.dirname(os.path.abspath(container_path)), "..", "..", records[0]["pdf"])
+            dpi = records[0].get("dpi", 300)
+            _, image = next(iter(PageSource(pdf, dpi=dpi, window_size=1, first_page=page, last_page=page)))
+
+            array = self.draw(image, [record["bbox"] for record in records if record.get("bbox")], SECTION_COLOR)
+            array = self.draw(array, [box for record in records for box in record.get("boxes", [])])
+
+            name = os.path.splitext(records[0]["pdf"])[0]
+            paths.append(self.save(array, os.path.join(output_folder, f"{name}_page{page}")))
+
+        return paths
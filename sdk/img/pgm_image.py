@@ -0,0 +1,64 @@
+import mmap
+import os
+import weakref
+import numpy as np
+
+def read_pgm(path, remove=False):
+    """
+    Memory-map a binary (P5) PGM file as a read-only NumPy array, without decoding or copying the pixels.
+    Pages are read from the OS page cache as they are touched; nothing is held on the Python heap.
+    :param path: Path to the PGM file, e.g. written by `pdftoppm -gray`.
+    :param remove: Delete the file once the array and every view of it are gone.
+    :return: 2-D np.memmap of shape (height, width), uint8 (or big-endian uint16 for maxval > 255).
+    """
+    with open(path, "rb") as file:
+        header = file.read(512)
+
+    if not header.startswith(b"P5"):
+        raise ValueError(f"'{path}' is not a binary PGM file")
+
+    fields = []
+    position = 2
+
+    # Header: magic, width, height, maxval, separated by whitespace and # comments, then one whitespace byte
+    while len(fields) < 3:
+        while position < len(header) and header[position:position + 1].isspace():
+            position += 1
+        if header[position:position + 1] == b"#":
+            position = header.index(b"\n", position) + 1
+            continue
+        start = position
+        while position < len(header) and header[position:position + 1].isdigit():
+            position += 1
+        if start == position:
+            raise ValueError(f"'{path}' has an invalid PGM header")
+        fields.append(int(header[start:position]))
+
+    width, height, maxval = fields
+    dtype = np.uint8 if maxval < 256 else np.dtype(">u2")
+    array = np.memmap(path, dtype=dtype, mode="r", offset=position + 1, shape=(height, width))
+
+    if remove:
+        # The mmap is closed before its finalizer runs, so the file can be deleted on Windows too
+        weakref.finalize(array.base, _remove_file, path)
+
+    return array
+
+
+def pgm_path(image):
+    """
+    :param image: Any image passed to an OCR engine.
+    :return: Path of the PGM file if the image is a whole page mapped by read_pgm(), otherwise None.
+             Engines that read files can then hand the path to Tesseract instead of encoding the pixels again.
+    """
+    if isinstance(image, np.memmap) and isinstance(image.base, mmap.mmap) and str(image.filename).endswith(".pgm"):
+        return image.filename
+
+    return None
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,290 @@
+import json
+import os
+import threading
+import time
+
+LEVELS = ("off", "summary", "trace")
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Span:
+    def __init__(self, metrics, stage, scope, labels):
+        """
+        Times one stage of one document, page or section. Use through Metrics.span().
+        """
+        self.metrics = metrics
+        self.stage = stage
+        self.scope = scope
+        self.labels = labels
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start_time, self.scope, error=exc_type is not None, **self.labels)
+        return False
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Metrics:
+    def __init__(self, level="summary", jsonl_path=None, prometheus_path=None, namespace="zac", flush_events=1000, flush_seconds=10.0):
+        """
+        Timing spans and counters for the conversion pipelines.
+
+        A span times one stage (render, split, preprocess, layout, ocr, write) of one
+        document, page or section. Counters track pages, bytes, cache hits, skips and errors.
+
+        In "summary" mode a span only updates in-memory aggregates of its stage and scope
+        (count, total, max and fixed histogram buckets), which is cheap enough to leave on in
+        production. "trace" mode also keeps every span as an event with its labels (file,
+        page, section) and writes the events as JSON lines. With a jsonl_path, pending events
+        are appended to it every `flush_events` events or `flush_seconds` seconds, so a long
+        run does not hold its whole trace in memory. "off" records nothing.
+
+        :param level: "off", "summary" or "trace".
+        :param jsonl_path: File that trace events and a summary line per flush() are appended to (optional).
+        :param prometheus_path: Prometheus textfile rewritten on every flush() (optional).
+        :param namespace: Prefix of the Prometheus metric names.
+        :param flush_events: Trace events held in memory before they are appended to jsonl_path.
+        :param flush_seconds: Longest time trace events are held before they are appended to jsonl_path.
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Unknown metrics level '{level}'. Use one of: {', '.join(LEVELS)}")
+
+        self.level = level
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.namespace = namespace
+        self.stages = {}
+        self.counters = {}
+        self.events = []
+        self.flush_events = flush_events
+        self.flush_seconds = flush_seconds
+        self.events_written_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.file_lock = threading.Lock()  # Keeps the lines of concurrent writers apart
+
+    @property
+    def enabled(self):
+        return self.level != "off"
+
+    def span(self, stage, scope="page", **labels):
+        """
+        Context manager timing one stage.
+        :param stage: Stage name: render, split, preprocess, layout, ocr, write or convert.
+        :param scope: What the span covers: document, page or section.
+        :param labels: Identifiers kept on trace events, e.g. pdf="a.pdf", page=3.
+        """
+        if self.level == "off":
+            return _NO_SPAN
+
+        return Span(self, stage, scope, labels)
+
+    def observe(self, stage, seconds, scope="page", error=False, **labels):
+        """
+        Record a duration measured elsewhere, e.g. in a worker process.
+        :param stage: Stage name.
+        :param seconds: Duration of the stage.
+        :param scope: document, page or section.
+        :param error: The stage raised an exception.
+        :param labels: Identifiers kept on trace events.
+        """
+        if self.level == "off":
+            return
+
+        bucket = next((index for index, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))
+
+        with self.lock:
+            aggregate = self.stages.get((stage, scope))
+            if aggregate is None:
+                # count, total seconds, max seconds, errors, bucket counts (last one is +Inf)
+                aggregate = self.stages[(stage, scope)] = [0, 0.0, 0.0, 0, [0] * (len(BUCKETS) + 1)]
+            aggregate[0] += 1
+            aggregate[1] += seconds
+            aggregate[2] = max(aggregate[2], seconds)
+            aggregate[3] += error
+            aggregate[4][bucket] += 1
+
+            if self.level == "trace":
+                event = {"event": "span", "time": time.time(), "stage": stage, "scope": scope, "seconds": round(seconds, 6)}
+                if error:
+                    event["error"] = True
+                event.update(labels)
+                self.events.append(event)
+            due = self.events_due()
+
+        if due:
+            self.write_events()
+
+    def count(self, name, value=1):
+        """
+        Increase a counter.
+        :param name: Counter name, e.g. pages, bytes_written, cache_hits, pages_skipped.
+        :param value: Amount to add.
+        """
+        if self.level == "off":
+            return
+
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def drain(self):
+        """
+        Take the aggregates and events recorded so far and reset them.
+        Worker processes drain their metrics after every task and the parent merges them.
+        :return: Picklable dict for merge().
+        """
+        with self.lock:
+            data = {"stages": self.stages, "counters": self.counters, "events": self.events}
+            self.stages, self.counters, self.events = {}, {}, []
+
+        return data
+
+    def merge(self, data):
+        """
+        Add the output of another instance's drain().
+        """
+        if self.level == "off" or not data:
+            return
+
+        with self.lock:
+            for key, (count, total, maximum, errors, buckets) in data["stages"].items():
+                aggregate = self.stages.setdefault(key, [0, 0.0, 0.0, 0, [0] * (len(BUCKETS) + 1)])
+                aggregate[0] += count
+                aggregate[1] += total
+                aggregate[2] = max(aggregate[2], maximum)
+                aggregate[3] += errors
+                aggregate[4] = [a + b for a, b in zip(aggregate[4], buckets)]
+
+            for name, value in data["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+            if self.level == "trace":
+                self.events.extend(data["events"])
+            due = self.events_due()
+
+        if due:
+            self.write_events()
+
+    def events_due(self):
+        """
+        :return: True if the pending trace events should be appended to jsonl_path now. Call with the lock held.
+        """
+        if not self.jsonl_path or not self.events:
+            return False
+
+        return len(self.events) >= self.flush_events or time.monotonic() - self.events_written_at >= self.flush_seconds
+
+    def write_events(self, summary=False):
+        """
+        Append the pending trace events, and a summary line if asked, to the JSON-lines file.
+        """
+        with self.lock:
+            events, self.events = self.events, []
+            self.events_written_at = time.monotonic()
+
+        with self.file_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+            with open(self.jsonl_path, "a", encoding="utf-8") as file:
+                for event in events:
+                    file.write(json.dumps(event, ensure_ascii=False) + "\n")
+                if summary:
+                    file.write(json.dumps({"event": "summary", "time": time.time(), **self.summary()}) + "\n")
+
+    def summary(self):
+        """
+        :return: Dict with per-stage count, total, mean and max seconds (keyed "stage/scope") and the counters.
+        """
+        with self.lock:
+            stages = {
+                f"{stage}/{scope}": {
+                    "count": count,
+                    "total": round(total, 4),
+                    "mean": round(total / count, 4) if count else 0.0,
+                    "max": round(maximum, 4),
+                    "errors": errors,
+                }
+                for (stage, scope), (count, total, maximum, errors, buckets) in sorted(self.stages.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+
+        return {"stages": stages, "counters": counters}
+
+    def flush(self):
+        """
+        Write pending trace events and a summary line to the JSON-lines file and
+        rewrite the Prometheus textfile. Paths that are not set are skipped.
+        """
+        if self.level == "off":
+            return
+
+        if self.jsonl_path:
+            self.write_events(summary=True)
+
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+
+    def prometheus(self):
+        """
+        :return: The aggregates in the Prometheus text exposition format.
+        """
+        name = f"{self.namespace}_stage_seconds"
+        lines = [f"# HELP {name} Time spent per pipeline stage.", f"# TYPE {name} histogram"]
+
+        with self.lock:
+            for (stage, scope), (count, total, maximum, errors, buckets) in sorted(self.stages.items()):
+                labels = f'stage="{stage}",scope="{scope}"'
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS + ("+Inf",), buckets):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {count}")
+
+            errors_name = f"{self.namespace}_stage_errors_total"
+            lines += [f"# HELP {errors_name} Stage runs that raised an error.", f"# TYPE {errors_name} counter"]
+            for (stage, scope), aggregate in sorted(self.stages.items()):
+                lines.append(f'{errors_name}{{stage="{stage}",scope="{scope}"}} {aggregate[3]}')
+
+            for counter, value in sorted(self.counters.items()):
+                counter_name = f"{self.namespace}_{counter}_total"
+                lines += [f"# TYPE {counter_name} counter", f"{counter_name} {value}"]
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Write the Prometheus textfile atomically, so the node exporter never reads a partial file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(self.prometheus())
+        os.replace(temp_path, path)
+
+    def print_summary(self):
+        """
+        Print the time spent per stage and the counters.
+        """
+        if self.level == "off":
+            return
+
+        summary = self.summary()
+        for key, stage in summary["stages"].items():
+            errors = f", {stage['errors']} error(s)" if stage["errors"] else ""
+            print(f"[{stage['total']:.2f}s] {key}: {stage['count']} run(s), mean {stage['mean'] * 1000:.1f} ms, max {stage['max'] * 1000:.1f} ms{errors}")
+        if summary["counters"]:
+            print(", ".join(f"{name}: {value}" for name, value in summary["counters"].items()))
@@ -0,0 +1,135 @@
+import math
+import cv2
+import numpy as np
+from sdk.ocr.ocr_result import OcrResult, OcrWord
+
+class LineRefiner:
+    def __init__(self, engine, lang="ara", min_line_conf=60, max_refine_share=0.5, padding=4, cache=None, metrics=None, config="--psm 1 --oem 3"):
+        """
+        Second OCR pass over the weak lines of a fast first pass.
+
+        Lines whose mean word confidence is below `min_line_conf` are cut from a
+        high-resolution render of the page, binarized on their own (Otsu per crop, after
+        a blur and a small opening) and OCRed again as single lines. A line is replaced
+        only if the second pass is more confident. When most lines of a region are weak,
+        the whole region is OCRed again in one call instead.
+
+        :param engine: OcrEngine used for the second pass.
+        :param lang: Language code for OCR.
+        :param min_line_conf: Lines with a lower mean confidence (0-100) are OCRed again.
+        :param max_refine_share: Above this share of weak lines, the whole region is OCRed again.
+        :param padding: Margin around each line crop, in first-pass pixels.
+        :param cache: OcrCache for the second pass (optional).
+        :param metrics: Metrics counting refined and improved lines (optional).
+        :param config: Tesseract config of the first pass, used when the whole region is OCRed again.
+        """
+        self.engine = engine
+        self.lang = lang
+        self.min_line_conf = min_line_conf
+        self.max_refine_share = max_refine_share
+        self.padding = padding
+        self.cache = cache
+        self.metrics = metrics
+        self.config = config
+
+    def weak_lines(self, result):
+        """
+        :return: Lines of the result with a mean confidence below min_line_conf.
+        """
+        return [line for line in result.lines() if line.conf < self.min_line_conf]
+
+    def refine(self, result, region, page, scale):
+        """
+        Re-OCR the weak lines of a first-pass result and merge both passes.
+        :param result: First-pass OcrResult with boxes relative to `region`.
+        :param region: (left, top, right, bottom) of the OCRed region in first-pass page pixels.
+        :param page: Callable returning the page as a grayscale NumPy array at the high resolution.
+                     Only called if there is something to refine.
+        :param scale: High resolution divided by the first-pass resolution. Nothing is refined unless it is above 1.
+        :return: Merged OcrResult with boxes relative to `region` in first-pass pixels.
+        """
+        if scale <= 1:
+            return result
+
+        lines = result.lines()
+        weak = self.weak_lines(result)
+        if not weak:
+            return result
+
+        self.count("lines_refined", len(weak))
+        page = page()
+
+        if len(weak) > self.max_refine_share * len(lines):
+            width, height = region[2] - region[0], region[3] - region[1]
+            second = self.recognize(page, region, (0, 0, width, height), scale, self.config)
+            if second.words and second.mean_conf > result.mean_conf:
+                self.count("lines_improved", len(weak))
+                return second
+            return result
+
+        words = []
+        weak_keys = {line.key for line in weak}
+        for line in lines:
+            if line.key not in weak_keys:
+                words.extend(line.words)
+                continue
+
+            second = self.recognize(page, region, line.box, scale, "--psm 7 --oem 3")
+            if second.words and second.mean_conf > line.conf:
+                # Keep the first-pass block, paragraph and line numbers so the text layout stays the same
+                block, par, line_num = line.key
+                words.extend(OcrWord(word.text, word.left, word.top, word.width, word.height, word.conf, block, par, line_num) for word in second.words)
+                self.count("lines_improved")
+            else:
+                words.extend(line.words)
+
+        return OcrResult(words)
+
+    def recognize(self, page, region, box, scale, config):
+        """
+        OCR one box of a region from the high-resolution page.
+        :param box: (left, top, right, bottom) relative to the region, in first-pass pixels.
+        :return: OcrResult with boxes relative to the region, in first-pass pixels.
+        """
+        height, width = page.shape[:2]
+        left = max(0, int((region[0] + box[0] - self.padding) * scale))
+        top = max(0, int((region[1] + box[1] - self.padding) * scale))
+        right = min(width, int(math.ceil((region[0] + box[2] + self.padding) * scale)))
+        bottom = min(height, int(math.ceil((region[1] + box[3] + self.padding) * scale)))
+        if right <= left or bottom <= top:
+            return OcrResult([])
+
+        crop = self.preprocess(page[top:bottom, left:right])
+        result = self.run_ocr(crop, config)
+
+        return OcrResult([
+            OcrWord(
+                word.text,
+                int(round((left + word.left) / scale - region[0])), int(round((top + word.top) / scale - region[1])),
+                int(round(word.width / scale)), int(round(word.height / scale)),
+                word.conf, word.block, word.par, word.line,
+            )
+            for word in result.words
+        ])
+
+    def preprocess(self, crop):
+        """
+        Blur, Otsu threshold of the crop alone, noise removal; black text on white.
+        """
+        blur = cv2.GaussianBlur(crop, (3, 3), 0)
+        _, thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+
+        return cv2.bitwise_not(opening, dst=opening)
+
+    def run_ocr(self, image, config):
+        if not self.cache:
+            return self.engine.recognize(image, lang=self.lang, config=config)
+
+        return OcrResult.from_dict(self.cache.fetch(
+            image, lambda: self.engine.recognize(image, lang=self.lang, config=config).to_dict(), engine=self.engine.name, lang=self.lang, config=config, preprocessing="refine-gauss3-otsu-open2", output="ocr_result"
+        ))
+
+    def count(self, name, value=1):
+        if self.metrics:
+            self.metrics.count(name, value)
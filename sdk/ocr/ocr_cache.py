@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+class OcrCache:
+    def __init__(self, cache_path=None, max_size=1024 * 1024 * 1024, metrics=None, flush_every=256, flush_seconds=5.0):
+        """
+        Persistent OCR result cache stored in a single SQLite file.
+
+        Entries are keyed by a hash of the image pixels plus the engine, OCR and preprocessing
+        parameters, so a page that did not change comes back without running Tesseract.
+        When the stored results grow beyond `max_size` bytes, the least recently used
+        entries are evicted. The total size is kept in a counter row that every put()
+        updates, so checking it does not scan the table.
+
+        Lookups do not write. Access times and hit/miss counters are collected in memory
+        and written with the next put(), or after `flush_every` lookups or `flush_seconds`,
+        whichever comes first. flush() and close() write what is left.
+
+        :param cache_path: Path to the SQLite file. Defaults to ~/.cache/zac/ocr_cache.sqlite.
+        :param max_size: Maximum total size of the stored results in bytes.
+        :param metrics: Metrics that count cache hits and misses (optional).
+        :param flush_every: Lookups collected before their access times are written.
+        :param flush_seconds: Longest time lookups are held before their access times are written.
+        """
+        self.cache_path = cache_path or os.path.join(os.path.expanduser("~"), ".cache", "zac", "ocr_cache.sqlite")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.metrics = metrics
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+
+        # Lookups not yet written: key -> last access time, and counter -> increment
+        self.accessed = {}
+        self.lookups = {"hits": 0, "misses": 0}
+        self.last_flush = time.monotonic()
+
+        cache_dir = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.cache_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # Caches written before the size counter existed are summed once
+        self.connection.execute("INSERT OR IGNORE INTO counters (name, value) SELECT 'size', COALESCE(SUM(size), 0) FROM entries")
+        self.connection.commit()
+
+    def key(self, image, **params):
+        """
+        Build the cache key for an image and the parameters used to OCR it.
+        :param image: PIL image or NumPy array.
+        :param params: Engine, OCR and preprocessing parameters (engine, lang, config, ...).
+        :return: Hex digest.
+        """
+        digest = hashlib.sha256()
+
+        if isinstance(image, np.ndarray):
+            digest.update(f"{image.dtype}:{image.shape}".encode())
+            # Contiguous arrays (whole pages, memory-mapped or not) are hashed in place; views are copied once
+            digest.update(np.ascontiguousarray(image).data)
+        else:
+            digest.update(f"{image.mode}:{image.size}".encode())
+            digest.update(image.tobytes())
+        digest.update(json.dumps(params, sort_keys=True).encode())
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached result.
+        :param key: Cache key from key().
+        :return: The stored value, or None on a miss.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            counter = "hits" if row else "misses"
+
+            if row:
+                self.hits += 1
+                self.accessed[key] = time.time()
+            else:
+                self.misses += 1
+            self.lookups[counter] += 1
+
+            if sum(self.lookups.values()) >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_seconds:
+                self.write_lookups()
+                self.connection.commit()
+
+        if self.metrics:
+            self.metrics.count(f"cache_{counter}")
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, value):
+        """
+        Store a result and evict old entries if the cache is over its size limit.
+        :param key: Cache key from key().
+        :param value: JSON-serializable OCR result.
+        """
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+
+        with self.lock:
+            # Take the write lock before reading the old size, so processes sharing the file keep the total exact
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, data, size, time.time()),
+                )
+                self.connection.execute("UPDATE counters SET value = value + ? WHERE name = 'size'", (size - (row[0] if row else 0),))
+                self.write_lookups()
+                self.evict()
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                raise
+
+    def fetch(self, image, compute, **params):
+        """
+        Return the cached result for an image, computing and storing it on a miss.
+        :param image: PIL image or NumPy array that is about to be OCRed.
+        :param compute: Callable returning the OCR result for the image.
+        :param params: Engine, OCR and preprocessing parameters that affect the result.
+        """
+        key = self.key(image, **params)
+        value = self.get(key)
+
+        if value is None:
+            value = compute()
+            self.put(key, value)
+
+        return value
+
+    def write_lookups(self):
+        """
+        Write the access times and hit/miss counts collected by get().
+        Must be called with the lock held; the caller commits.
+        """
+        if self.accessed:
+            self.connection.executemany("UPDATE entries SET last_access = ? WHERE key = ?", [(access, key) for key, access in self.accessed.items()])
+        self.connection.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [(name, count) for name, count in self.lookups.items() if count],
+        )
+        self.accessed = {}
+        self.lookups = {"hits": 0, "misses": 0}
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        """
+        Write the lookups collected since the last write.
+        """
+        with self.lock:
+            self.write_lookups()
+            self.connection.commit()
+
+    def evict(self):
+        """
+        Delete least recently used entries until the total size is within max_size.
+        Must be called with the lock held.
+        """
+        total_size = self.connection.execute("SELECT value FROM counters WHERE name = 'size'").fetchone()[0]
+        if total_size <= self.max_size:
+            return
+
+        evicted = []
+        evicted_size = 0
+        for key, size in self.connection.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if total_size - evicted_size <= self.max_size:
+                break
+            evicted.append((key,))
+            evicted_size += size
+
+        self.connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self.connection.execute("UPDATE counters SET value = value - ? WHERE name = 'size'", (evicted_size,))
+
+    def stats(self):
+        """
+        :return: Dict with the hits and misses of this instance, the totals recorded in the cache file, and its size.
+        """
+        self.flush()
+
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            totals = dict(self.connection.execute("SELECT name, value FROM counters").fetchall())
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": totals.get("hits", 0),
+            "total_misses": totals.get("misses", 0),
+            "entries": entries,
+            "size": totals.get("size", 0),
+        }
+
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,229 @@
+import queue
+import shlex
+import threading
+import numpy as np
+import pytesseract
+from sdk.ocr.ocr_result import OcrResult
+from sdk.img.pgm_image import pgm_path
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+
+class OcrEngine:
+    """
+    Common interface of the OCR backends. All OCR call sites go through an engine,
+    so the backend can be swapped without touching the converters.
+    """
+    name = None
+
+    def recognize(self, image, lang="ara", config=""):
+        """
+        OCR an image and return words, lines, boxes and confidences.
+        :param image: PIL image or NumPy array.
+        :param lang: Language code for OCR.
+        :param config: Tesseract options such as "--psm 1 --oem 3".
+        :return: OcrResult.
+        """
+        raise NotImplementedError
+
+    def image_to_string(self, image, lang="ara", config=""):
+        """
+        OCR an image and return plain text only.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SubprocessEngine(OcrEngine):
+    """
+    Runs a new `tesseract` process for every call through pytesseract.
+    Memory-mapped PGM pages (see read_pgm) are passed to tesseract by path instead of being encoded to a temporary PNG.
+    """
+    name = "subprocess"
+
+    def recognize(self, image, lang="ara", config=""):
+        ocr_data = pytesseract.image_to_data(pgm_path(image) or image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+        return OcrResult.from_data(ocr_data)
+
+    def image_to_string(self, image, lang="ara", config=""):
+        return pytesseract.image_to_string(pgm_path(image) or image, lang=lang, config=config)
+
+
+class TesserocrEngine(OcrEngine):
+    """
+    Keeps warm libtesseract instances in-process through tesserocr, so the traineddata
+    and the LSTM model are loaded once per instance instead of once per call.
+    Up to `pool_size` calls run concurrently; tesserocr releases the GIL while recognizing.
+    """
+    name = "tesserocr"
+
+    def __init__(self, pool_size=1, tessdata_path=None):
+        """
+        :param pool_size: Number of warm engine instances per (lang, config) pair.
+        :param tessdata_path: Folder containing the traineddata files (optional).
+        """
+        try:
+            import tesserocr
+        except ImportError as e:
+            raise ImportError("The tesserocr engine requires the 'tesserocr' package: pip install tesserocr") from e
+
+        self.tesserocr = tesserocr
+        self.pool_size = max(1, pool_size or 1)
+        self.tessdata_path = tessdata_path
+        self.pools = {}
+        self.created = {}
+        self.instances = set()  # Instances created since the last close()
+        self.lock = threading.Lock()
+
+    def create_api(self, lang, config):
+        """
+        Start a libtesseract instance for the given language and config.
+        """
+        kwargs, variables = api_options(lang, config, self.tessdata_path)
+        api = self.tesserocr.PyTessBaseAPI(**kwargs)
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+
+        return api
+
+    def acquire(self, lang, config):
+        """
+        Take an idle instance for (lang, config), creating one while the pool is not full.
+        """
+        key = (lang, config)
+        while True:
+            with self.lock:
+                pool = self.pools.setdefault(key, queue.Queue())
+                create = pool.empty() and self.created.get(key, 0) < self.pool_size
+                if create:
+                    self.created[key] = self.created.get(key, 0) + 1
+
+            if create:
+                try:
+                    api = self.create_api(lang, config)
+                except Exception:
+                    # Give the slot back, or callers would wait for an instance that never comes
+                    with self.lock:
+                        if key in self.created:
+                            self.created[key] -= 1
+                    raise
+
+                with self.lock:
+                    self.instances.add(api)
+                return key, api
+
+            # Check again now and then: a slot freed by a failed start is not put into the pool
+            try:
+                return key, pool.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def release(self, key, api):
+        """
+        Put an instance back into its pool. Instances that come back after close() are ended instead.
+        """
+        with self.lock:
+            pool = self.pools.get(key) if api in self.instances else None
+            if pool is not None:
+                pool.put(api)
+                return
+
+        api.End()
+
+    def run(self, image, lang, config, read):
+        key, api = self.acquire(lang, config)
+        try:
+            if pgm_path(image):
+                api.SetImageFile(pgm_path(image))
+            elif not isinstance(image, np.ndarray):
+                api.SetImage(image)
+            else:
+                channels = 1 if image.ndim == 2 else image.shape[2]
+                api.SetImageBytes(image.tobytes(), image.shape[1], image.shape[0], channels, image.shape[1] * channels)
+            return read(api)
+        finally:
+            api.Clear()
+            self.release(key, api)
+
+    def recognize(self, image, lang="ara", config=""):
+        return self.run(image, lang, config, lambda api: OcrResult.from_tsv(TSV_HEADER + api.GetTSVText(0)))
+
+    def image_to_string(self, image, lang="ara", config=""):
+        return self.run(image, lang, config, lambda api: api.GetUTF8Text())
+
+    def close(self):
+        """
+        End the idle instances. Instances still in use are ended when they are released.
+        """
+        with self.lock:
+            for pool in self.pools.values():
+                while not pool.empty():
+                    pool.get().End()
+            self.pools = {}
+            self.created = {}
+            self.instances = set()
+
+
+def parse_config(config):
+    """
+    Split pytesseract-style options ("--psm 1 --oem 3 -c name=value").
+    :return: Dict with "psm" and "oem" as ints when given, and "variables" as a dict of name -> value.
+    """
+    options = {"variables": {}}
+    args = shlex.split(config or "")
+    for i, arg in enumerate(args):
+        if arg in ("--psm", "--oem") and i + 1 < len(args):
+            options[arg[2:]] = int(args[i + 1])
+        elif arg == "-c" and i + 1 < len(args) and "=" in args[i + 1]:
+            name, value = args[i + 1].split("=", 1)
+            options["variables"][name] = value
+
+    return options
+
+
+def api_options(lang, config, tessdata_path=None):
+    """
+    Translate a pytesseract config for tesserocr.PyTessBaseAPI.
+    tesserocr's PSM and OEM are plain classes of int constants, not enums, so the ints are passed as they are.
+    :return: Tuple of (PyTessBaseAPI keyword arguments, dict of Tesseract variables to set).
+    """
+    options = parse_config(config)
+    kwargs = {"lang": lang}
+    if tessdata_path:
+        kwargs["path"] = tessdata_path
+    if "psm" in options:
+        kwargs["psm"] = options["psm"]
+    if "oem" in options:
+        kwargs["oem"] = options["oem"]
+
+    return kwargs, options["variables"]
+
+
+ENGINES = {
+    SubprocessEngine.name: SubprocessEngine,
+    TesserocrEngine.name: TesserocrEngine,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine(name="subprocess", pool_size=1):
+    """
+    Return the shared engine for a backend, creating it on first use.
+    Converters in the same process share it, so warm instances are reused across call sites.
+    :param name: Backend name: "subprocess" or "tesserocr".
+    :param pool_size: Number of warm instances for backends that keep them.
+    """
+    if isinstance(name, OcrEngine):
+        return name
+
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine '{name}'. Choose one of: {', '.join(ENGINES)}")
+
+    with _engines_lock:
+        key = (name, pool_size)
+        if key not in _engines:
+            _engines[key] = ENGINES[name]() if name == SubprocessEngine.name else ENGINES[name](pool_size=pool_size)
+
+        return _engines[key]
@@ -0,0 +1,165 @@
+import csv
+import io
+
+class OcrWord:
+    def __init__(self, text, left, top, width, height, conf, block=0, par=0, line=0):
+        """
+        A single recognized word.
+        :param text: Recognized text.
+        :param left: Left edge of the bounding box in pixels.
+        :param top: Top edge of the bounding box in pixels.
+        :param width: Width of the bounding box.
+        :param height: Height of the bounding box.
+        :param conf: Tesseract confidence (0-100).
+        :param block: Block number the word belongs to.
+        :param par: Paragraph number within the block.
+        :param line: Line number within the paragraph.
+        """
+        self.text = text
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.conf = conf
+        self.block = block
+        self.par = par
+        self.line = line
+
+    @property
+    def box(self):
+        """
+        :return: (left, top, right, bottom) of the word.
+        """
+        return self.left, self.top, self.left + self.width, self.top + self.height
+
+    def to_list(self):
+        return [self.text, self.left, self.top, self.width, self.height, self.conf, self.block, self.par, self.line]
+
+
+class OcrLine:
+    def __init__(self, words):
+        """
+        Words that Tesseract placed on the same line.
+        :param words: List of OcrWord in reading order.
+        """
+        self.words = words
+
+    @property
+    def text(self):
+        return " ".join(word.text for word in self.words)
+
+    @property
+    def conf(self):
+        """
+        :return: Mean word confidence of the line.
+        """
+        return sum(word.conf for word in self.words) / len(self.words)
+
+    @property
+    def box(self):
+        """
+        :return: (left, top, right, bottom) enclosing all words of the line.
+        """
+        boxes = [word.box for word in self.words]
+        return min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)
+
+    @property
+    def key(self):
+        return self.words[0].block, self.words[0].par, self.words[0].line
+
+
+class OcrResult:
+    def __init__(self, words):
+        """
+        Text, lines, bounding boxes and confidences from a single Tesseract pass.
+        :param words: List of OcrWord in reading order.
+        """
+        self.words = words
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Build a result from the dictionary returned by pytesseract.image_to_data(output_type=Output.DICT).
+        Only word-level rows with text are kept.
+        """
+        words = []
+        for i in range(len(data["text"])):
+            text = str(data["text"][i]).strip()
+            if int(data["level"][i]) != 5 or not text:
+                continue
+
+            words.append(OcrWord(
+                text,
+                int(data["left"][i]), int(data["top"][i]), int(data["width"][i]), int(data["height"][i]),
+                float(data["conf"][i]),
+                int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i]),
+            ))
+
+        return cls(words)
+
+    @classmethod
+    def from_tsv(cls, tsv):
+        """
+        Build a result from Tesseract TSV output (the `tsv` config / GetTSVText).
+        """
+        rows = csv.DictReader(io.StringIO(tsv), delimiter="\t", quoting=csv.QUOTE_NONE)
+        data = {}
+        for row in rows:
+            for column, value in row.items():
+                data.setdefault(column, []).append(value if value is not None else "")
+
+        return cls.from_data(data) if data else cls([])
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a result stored with to_dict().
+        """
+        return cls([OcrWord(*word) for word in data["words"]])
+
+    def to_dict(self):
+        """
+        :return: JSON-serializable representation of the result.
+        """
+        return {"words": [word.to_list() for word in self.words]}
+
+    def lines(self):
+        """
+        :return: List of OcrLine in reading order.
+        """
+        lines = []
+        for word in self.words:
+            if lines and lines[-1].key == (word.block, word.par, word.line):
+                lines[-1].words.append(word)
+            else:
+                lines.append(OcrLine([word]))
+
+        return lines
+
+    @property
+    def text(self):
+        """
+        Plain text with one line per OCR line and a blank line between paragraphs.
+        """
+        parts = []
+        previous = None
+        for line in self.lines():
+            if previous is not None and line.key[:2] != previous:
+                parts.append("")
+            parts.append(line.text)
+            previous = line.key[:2]
+
+        return "\n".join(parts)
+
+    def boxes(self):
+        """
+        :return: List of (left, top, right, bottom) word boxes.
+        """
+        return [word.box for word in self.words]
+
+    @property
+    def mean_conf(self):
+        """
+        :return: Mean word confidence, or None if nothing was recognized.
+        """
+        return sum(word.conf for word in self.words) / len(self.words) if self.words else None
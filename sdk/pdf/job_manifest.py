@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+class JobManifest:
+    def __init__(self, manifest_path):
+        """
+        Append-only record of a conversion job: which pages of which files are done,
+        where their output went and the checksum of that output.
+
+        Every event is one JSON line, so recording a page costs one small append and a
+        crash loses at most the line being written. Loading replays the lines.
+
+        :param manifest_path: Path to the manifest file. Created if missing.
+        """
+        self.manifest_path = manifest_path
+        self.files = {}
+        self.outputs = {}
+        self.sizes = {}
+        self.elapsed = 0.0
+        self.session_start = time.time()
+        self.session_pages = 0
+        self.verified = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(manifest_path):
+            self.load()
+
+        os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+        self.append({"event": "session", "time": self.session_start})
+
+    def load(self):
+        """
+        Replay the events of an existing manifest.
+        """
+        session_start = session_end = None
+
+        with open(self.manifest_path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # Partially written last line of a crashed run
+
+                if event["event"] == "session":
+                    if session_start is not None:
+                        self.elapsed += session_end - session_start
+                    session_start = session_end = event["time"]
+                elif event["event"] == "file":
+                    self.files.setdefault(event["pdf"], {"pages": event["pages"], "done": {}})["pages"] = event["pages"]
+                elif event["event"] == "output":
+                    pages = self.files.setdefault(event["pdf"], {"pages": None, "done": {}})["done"]
+                    for page_no in range(event["first"], event["last"] + 1):
+                        pages[page_no] = event["output"]
+                    self.outputs[event["output"]] = event["sha256"]
+                    if event.get("size") is not None:
+                        self.sizes[event["output"]] = max(self.sizes.get(event["output"], 0), event["size"])
+                    session_end = event["time"]
+
+        if session_start is not None:
+            self.elapsed += session_end - session_start
+
+    def append(self, event):
+        with self.lock:
+            with open(self.manifest_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def checksum(self, path):
+        """
+        :return: SHA-256 hex digest of a file.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def start_file(self, pdf_path, total_pages):
+        """
+        Register a PDF and its page count.
+        :param pdf_path: Path to the PDF file.
+        :param total_pages: Number of pages in the PDF.
+        """
+        pdf_path = os.path.abspath(pdf_path)
+        if self.files.get(pdf_path, {}).get("pages") == total_pages:
+            return
+
+        self.files.setdefault(pdf_path, {"pages": total_pages, "done": {}})["pages"] = total_pages
+        self.append({"event": "file", "pdf": pdf_path, "pages": total_pages, "time": time.time()})
+
+    def mark_done(self, pdf_path, first_page, last_page, output_path, append_only=False):
+        """
+        Record that a page range was converted and written to output_path.
+        :param pdf_path: Path to the PDF file.
+        :param first_page: First page of the range (1-based).
+        :param last_page: Last page of the range (inclusive).
+        :param output_path: File holding the output of the range.
+        :param append_only: output_path is a container that later pages are appended to. Its size is
+                            recorded instead of a checksum, and it stays intact as long as it is not truncated.
+        """
+        pdf_path = os.path.abspath(pdf_path)
+        output_path = os.path.abspath(output_path)
+        sha256 = None if append_only else self.checksum(output_path)
+        size = os.path.getsize(output_path) if append_only else None
+
+        pages = self.files.setdefault(pdf_path, {"pages": None, "done": {}})["done"]
+        for page_no in range(first_page, last_page + 1):
+            pages[page_no] = output_path
+        self.outputs[output_path] = sha256
+        if append_only:
+            self.sizes[output_path] = max(self.sizes.get(output_path, 0), size)
+        self.verified[output_path] = True
+        self.session_pages += last_page - first_page + 1
+
+        event = {
+            "event": "output", "pdf": pdf_path, "first": first_page, "last": last_page,
+            "output": output_path, "sha256": sha256, "time": time.time(),
+        }
+        if append_only:
+            event["size"] = size
+        self.append(event)
+
+    def is_done(self, pdf_path, first_page=None, last_page=None):
+        """
+        Check whether every page of a range was converted and its output is still intact.
+        :param pdf_path: Path to the PDF file.
+        :param first_page: First page of the range. Defaults to the first page.
+        :param last_page: Last page of the range. Defaults to the last page.
+        """
+        entry = self.files.get(os.path.abspath(pdf_path))
+        if not entry or (last_page is None and not entry["pages"]):
+            return False
+
+        for page_no in range(first_page or 1, (last_page or entry["pages"]) + 1):
+            output_path = entry["done"].get(page_no)
+            if not output_path or not self.output_intact(output_path):
+                return False
+
+        return True
+
+    def output_intact(self, output_path):
+        """
+        Compare an output file with the checksum recorded for it. Each file is hashed once per run.
+        Append-only containers only need to be at least as large as when their last range was recorded.
+        """
+        if output_path not in self.verified:
+            if output_path in self.sizes:
+                self.verified[output_path] = os.path.exists(output_path) and os.path.getsize(output_path) >= self.sizes[output_path]
+            else:
+                self.verified[output_path] = os.path.exists(output_path) and self.checksum(output_path) == self.outputs.get(output_path)
+
+        return self.verified[output_path]
+
+    def status(self):
+        """
+        :return: Dict with file and page progress and the throughput over all sessions of the job.
+        """
+        total_pages = sum(entry["pages"] or 0 for entry in self.files.values())
+        done_pages = sum(len(entry["done"]) for entry in self.files.values())
+        done_files = sum(1 for entry in self.files.values() if entry["pages"] and len(entry["done"]) >= entry["pages"])
+        elapsed = self.elapsed + (time.time() - self.session_start if self.session_pages else 0)
+
+        return {
+            "files": len(self.files),
+            "files_done": done_files,
+            "pages": total_pages,
+            "pages_done": done_pages,
+            "pages_remaining": total_pages - done_pages,
+            "elapsed": round(elapsed, 2),
+            "pages_per_sec": round(done_pages / elapsed, 3) if elapsed > 0 else None,
+        }
+
+    def print_status(self):
+        status = self.status()
+        print(f"Manifest: {self.manifest_path}")
+        print(f"Files: {status['files_done']}/{status['files']} done")
+        print(f"Pages: {status['pages_done']}/{status['pages']} done, {status['pages_remaining']} remaining")
+        if status["pages_per_sec"] is not None:
+            print(f"Throughput: {status['pages_per_sec']} pages/sec over {status['elapsed']}s")
@@ -0,0 +1,84 @@
+import numpy as np
+
+class LayoutDetector:
+    def __init__(self, ink_threshold=0.01, min_gutter=0.015, min_column_width=0.08, min_block_gap=0.02, min_block_height=0.006, padding=8, rtl=True):
+        """
+        Find text columns and blocks on a binarized page from its projection profiles.
+
+        Column boundaries come from the vertical profile (ink per pixel column), block
+        boundaries from the horizontal profile inside each column. Runs that are too thin
+        to be text, such as dotted column separators and horizontal rules, are dropped.
+        Sizes are fractions of the page width or height so they do not depend on the DPI.
+
+        :param ink_threshold: Minimum share of ink pixels for a pixel column or row to count as text.
+        :param min_gutter: Minimum width of the white space between two columns.
+        :param min_column_width: Narrower ink runs are not treated as columns.
+        :param min_block_gap: Minimum height of the white space between two blocks of a column.
+        :param min_block_height: Lower ink runs are not treated as blocks.
+        :param padding: Pixels added around every region.
+        :param rtl: Order columns right to left (Arabic reading order).
+        """
+        self.ink_threshold = ink_threshold
+        self.min_gutter = min_gutter
+        self.min_column_width = min_column_width
+        self.min_block_gap = min_block_gap
+        self.min_block_height = min_block_height
+        self.padding = padding
+        self.rtl = rtl
+
+    def runs(self, mask, min_gap, min_length):
+        """
+        Find runs of True in a 1-D mask, merging runs separated by fewer than min_gap False values.
+        :return: List of (start, end) with end exclusive.
+        """
+        edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if not len(starts):
+            return []
+
+        # Merge runs whose gap is smaller than min_gap
+        keep = np.concatenate(([True], starts[1:] - ends[:-1] >= min_gap))
+        starts = starts[keep]
+        ends = ends[np.concatenate((keep[1:], [True]))]
+
+        long_enough = ends - starts >= min_length
+        return list(zip(starts[long_enough].tolist(), ends[long_enough].tolist()))
+
+    def detect(self, page_array):
+        """
+        Detect the text regions of a page.
+        :param page_array: Binarized (or grayscale) page with dark text on a light background.
+        :return: List of (col, block, (left, top, right, bottom)) in reading order.
+        """
+        height, width = page_array.shape[:2]
+        ink = page_array < 128
+
+        column_profile = ink.mean(axis=0)
+        columns = self.runs(
+            column_profile > self.ink_threshold,
+            max(1, int(self.min_gutter * width)),
+            max(1, int(self.min_column_width * width)),
+        )
+        if self.rtl:
+            columns.reverse()
+
+        regions = []
+        for col, (left, right) in enumerate(columns):
+            row_profile = ink[:, left:right].mean(axis=1)
+            blocks = self.runs(
+                row_profile > self.ink_threshold,
+                max(1, int(self.min_block_gap * height)),
+                max(1, int(self.min_block_height * height)),
+            )
+
+            for block, (top, bottom) in enumerate(blocks):
+                bbox = (
+                    max(0, left - self.padding),
+                    max(0, top - self.padding),
+                    min(width, right + self.padding),
+                    min(height, bottom + self.padding),
+                )
+                regions.append((col, block, bbox))
+
+        return regions
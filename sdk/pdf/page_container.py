@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+
+class PageContainerReader:
+    def __init__(self, path):
+        """
+        Random access to the records of a page container by page number.
+
+        Only the index is loaded; each record is read with one seek. If the index is missing
+        or does not match the data file (for example after a crash), it is rebuilt by
+        scanning the data file once and written back.
+
+        :param path: Path to the container (.jsonl) file.
+        """
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.entries = {}
+        self.end = 0
+
+        if not self.load_index():
+            self.rebuild_index()
+
+    def load_index(self):
+        """
+        :return: True if the index exists and covers exactly the complete records of the data file.
+        """
+        if not os.path.exists(self.index_path) or not os.path.exists(self.path):
+            return False
+
+        entries = {}
+        end = 0
+        with open(self.index_path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    return False
+                entries.setdefault(entry["page"], {})[entry.get("section")] = (entry["offset"], entry["length"])
+                end = max(end, entry["offset"] + entry["length"])
+
+        if end != os.path.getsize(self.path):
+            return False
+
+        self.entries, self.end = entries, end
+        return True
+
+    def rebuild_index(self):
+        """
+        Scan the data file, drop a partially written last record and rewrite the index.
+        """
+        self.entries, self.end = {}, 0
+        if not os.path.exists(self.path):
+            return
+
+        lines = []
+        with open(self.path, "rb") as file:
+            offset = 0
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # Partially written last record of a crashed run
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.entries.setdefault(record["page"], {})[record.get("section")] = (offset, len(line))
+                lines.append(json.dumps({"page": record["page"], "section": record.get("section"), "offset": offset, "length": len(line)}) + "\n")
+                offset += len(line)
+            self.end = offset
+
+        with open(self.index_path, "w", encoding="utf-8") as file:
+            file.writelines(lines)
+
+    def pages(self):
+        """
+        :return: Sorted page numbers that have records.
+        """
+        return sorted(self.entries)
+
+    def read(self, page):
+        """
+        :param page: Page number.
+        :return: Records of the page (one per section, or a single one for whole pages), sorted by their
+                 "order" field if they have one, else in the order they were written. A record written
+                 again for the same page and section replaces the earlier one.
+        """
+        records = []
+        with open(self.path, "rb") as file:
+            for offset, length in sorted(self.entries.get(page, {}).values()):
+                file.seek(offset)
+                records.append(json.loads(file.read(length)))
+
+        return sorted(records, key=lambda record: record.get("order", 0))
+
+    def text(self, page):
+        """
+        :return: Text of a page, its sections joined by blank lines.
+        """
+        return "\n\n".join(record["text"] for record in self.read(page) if record.get("text"))
+
+    def __iter__(self):
+        """
+        Yield all records in page order, reading one page at a time.
+        """
+        for page in self.pages():
+            yield from self.read(page)
+
+
+class PageContainerWriter:
+    def __init__(self, path, append=False):
+        """
+        Stream per-page or per-section records into one JSON-lines container file.
+
+        Every record is appended as one line and flushed right away, together with its entry
+        in the page-offset index (`<path>.idx`), so memory stays flat however long the book
+        and a crash loses at most the record being written. PageContainerReader reads
+        single pages back through the index.
+
+        :param path: Path to the container file. Parent folders are created.
+        :param append: Keep the records of a previous run (for resumed jobs) instead of starting a new file.
+        """
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.lock = threading.Lock()
+        self.bytes_written = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        if append and os.path.exists(path):
+            # Validates the index and drops a partial last record before appending
+            end = PageContainerReader(path).end
+            self.data = open(path, "r+b")
+            self.data.truncate(end)
+            self.data.seek(end)
+            self.index = open(self.index_path, "a", encoding="utf-8")
+        else:
+            self.data = open(path, "wb")
+            self.index = open(self.index_path, "w", encoding="utf-8")
+
+    def write(self, record):
+        """
+        Append one record.
+        :param record: JSON-serializable dict with at least "page"; "section" identifies sections of a page.
+        :return: Byte offset of the record in the container.
+        """
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+        with self.lock:
+            offset = self.data.tell()
+            self.data.write(line)
+            self.data.flush()
+            self.index.write(json.dumps({"page": record["page"], "section": record.get("section"), "offset": offset, "length": len(line)}) + "\n")
+            self.index.flush()
+            self.bytes_written += len(line)
+
+        return offset
+
+    def close(self):
+        with self.lock:
+            self.data.close()
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
@@ -0,0 +1,157 @@
+import glob
+import os
+import tempfile
+import time
+import uuid
+from pdf2image import convert_from_path, pdfinfo_from_path
+from sdk.img.pgm_image import read_pgm
+
+class PageSource:
+    def __init__(self, pdf_path, dpi=200, window_size=4, first_page=1, last_page=None, grayscale=False, thread_count=1, metrics=None, dpi_estimator=None, raster="pil", skip_errors=False):
+        """
+        Lazily render the pages of a PDF, a few pages at a time.
+
+        Only one window of `window_size` pages is decoded at any moment, so peak memory
+        depends on the window size and the DPI, not on the length of the document.
+
+        :param pdf_path: Path to the input PDF file.
+        :param dpi: Resolution for converting PDF pages to images.
+        :param window_size: Number of pages rendered by one poppler call.
+        :param first_page: First page to render (1-based).
+        :param last_page: Last page to render (inclusive). Defaults to the last page of the PDF.
+        :param grayscale: Render pages in grayscale.
+        :param thread_count: Number of poppler threads used per window.
+        :param metrics: Metrics that receive a render span per page (optional).
+        :param dpi_estimator: DpiEstimator choosing the DPI of every page from a low-resolution probe of its
+                              window (optional). `dpi` is then only used for pages without measurable text.
+                              The chosen DPIs are kept in `page_dpi`.
+        :param raster: "pil" yields PIL images decoded by pdf2image. "pgm" has poppler write grayscale PGM files
+                       (`pdftoppm -gray`) and yields them memory-mapped as read-only NumPy arrays, with no decoding
+                       and no copy of the pixels. Each file is deleted once the page and its views are released.
+        :param skip_errors: When poppler fails on a window, render its pages one by one and skip the pages that still
+                            fail, keeping their errors in `page_errors`, instead of raising.
+        """
+        self.pdf_path = pdf_path
+        self.dpi = dpi
+        self.window_size = max(1, window_size or 1)
+        self.first_page = first_page or 1
+        self.last_page = last_page
+        self.grayscale = grayscale
+        self.thread_count = thread_count
+        self.metrics = metrics
+        self.dpi_estimator = dpi_estimator
+        self.page_dpi = {}
+        self.skip_errors = skip_errors
+        self.page_errors = {}
+
+        if raster not in ("pil", "pgm"):
+            raise ValueError(f"Unknown raster '{raster}'. Use 'pil' or 'pgm'.")
+        self.raster = raster
+
+    def page_count(self):
+        """
+        :return: Number of pages in the PDF.
+        """
+        return pdfinfo_from_path(self.pdf_path)["Pages"]
+
+    def windows(self):
+        """
+        Yield the (first_page, last_page) range of every window.
+        """
+        last_page = self.last_page or self.page_count()
+        for window_start in range(self.first_page, last_page + 1, self.window_size):
+            yield window_start, min(window_start + self.window_size - 1, last_page)
+
+    def __iter__(self):
+        """
+        Yield (page_no, image) tuples in page order. Images are PIL images, or NumPy arrays with the pgm raster.
+        The source drops its reference to a page as soon as the consumer asks for the next one.
+        """
+        for window_start, window_end in self.windows():
+            try:
+                runs = self.dpi_runs(window_start, window_end)
+            except Exception:
+                if not self.skip_errors:
+                    raise
+                runs = [(window_start, window_end, self.dpi)]  # Without a probe, render the window at the fixed DPI
+
+            for run_start, run_end, dpi in runs:
+                pages = self.render_run(dpi, run_start, run_end)
+                if self.metrics:
+                    self.metrics.count("pages_rendered", len(pages))
+                    self.metrics.count("pixels_rendered", sum(_pixel_count(page) for page_no, page in pages))
+
+                for index in range(len(pages)):
+                    (page_no, page), pages[index] = pages[index], None
+                    self.page_dpi[page_no] = dpi
+                    yield page_no, page
+                    page = None
+
+    def render_run(self, dpi, first_page, last_page):
+        """
+        Render a run of pages. With skip_errors, a failed run is rendered again page by page,
+        since one broken page fails the whole poppler call.
+        :return: List of (page_no, page) tuples of the pages that rendered.
+        """
+        try:
+            pages = self.render("render", dpi, first_page, last_page, self.grayscale)
+        except Exception as e:
+            if not self.skip_errors:
+                raise
+            if first_page == last_page:
+                self.page_errors[first_page] = str(e)
+                return []
+            return [page for page_no in range(first_page, last_page + 1) for page in self.render_run(dpi, page_no, page_no)]
+
+        return list(enumerate(pages, first_page))
+
+    def render(self, stage, dpi, first_page, last_page, grayscale):
+        """
+        Render a range of pages in one poppler call; each page gets an equal share of its time.
+        """
+        start_time = time.perf_counter()
+        if self.raster == "pgm":
+            # pdftoppm writes the files; they are mapped, not decoded
+            output_file = f"zac-{uuid.uuid4()}"
+            try:
+                paths = convert_from_path(self.pdf_path, dpi, first_page=first_page, last_page=last_page, thread_count=self.thread_count, grayscale=True, output_folder=tempfile.gettempdir(), output_file=output_file, paths_only=True)
+            except Exception:
+                # Pages written before poppler failed are not handed out, so nobody else deletes them
+                for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{output_file}*.pgm")):
+                    os.remove(path)
+                raise
+            pages = [read_pgm(path, remove=True) for path in paths]
+        else:
+            pages = convert_from_path(self.pdf_path, dpi, first_page=first_page, last_page=last_page, thread_count=self.thread_count, grayscale=grayscale)
+
+        if self.metrics:
+            seconds = (time.perf_counter() - start_time) / max(1, len(pages))
+            for offset in range(len(pages)):
+                self.metrics.observe(stage, seconds, "page", pdf=self.pdf_path, page=first_page + offset, dpi=dpi)
+
+        return pages
+
+    def dpi_runs(self, window_start, window_end):
+        """
+        :return: (first_page, last_page, dpi) runs of consecutive pages of a window that share a DPI.
+        """
+        if not self.dpi_estimator:
+            return [(window_start, window_end, self.dpi)]
+
+        probes = self.render("probe", self.dpi_estimator.probe_dpi, window_start, window_end, True)
+        runs = []
+        for page_no, probe in enumerate(probes, window_start):
+            dpi = self.dpi_estimator.estimate(probe, self.dpi)
+            if runs and runs[-1][2] == dpi:
+                runs[-1][1] = page_no
+            else:
+                runs.append([page_no, page_no, dpi])
+
+        return [tuple(run) for run in runs]
+
+
+def _pixel_count(page):
+    """
+    :return: Number of pixels of a PIL image or NumPy array.
+    """
+    return page.width * page.height if hasattr(page, "width") else page.shape[0] * page.shape[1]
@@ -1,10 +1,11 @@
 import os
-import time
-from pdf2image import convert_from_path
+from pdf2image import pdfinfo_from_path
 from sdk.pdf.split_pdf import SplitPdf
+from sdk.pdf.job_manifest import JobManifest
+from sdk.metrics.metrics import Metrics
 
 class PdfConverter:
-    def __init__(self, pdf_path=None, dpi=200, folder_path=None, output_folder=None, split_pdf=True, output_extension=None):
+    def __init__(self, pdf_path=None, dpi=200, folder_path=None, output_folder=None, split_pdf=True, output_extension=None, workers=1, window_size=4, pages_per_split=1, export_split=False, resume=False, manifest=None, metrics=None):
         """
         Initialize the converter with paths and settings.
 
@@ -12,7 +13,14 @@ class PdfConverter:
         :param dpi: Resolution for converting PDF to images.
         :param folder_path: Path to a folder containing PDF files (optional).
         :param output_folder: Folder to save PNG images (optional).
-        :param split_pdf: Whether to split the PDF into smaller parts before processing.
+        :param split_pdf: Whether to process the PDF in page ranges of `pages_per_split` pages, each with its own output file.
+        :param workers: Number of worker processes used by converters that support parallel mode.
+        :param window_size: Number of pages rendered and held in memory at once.
+        :param pages_per_split: Number of pages per range when split_pdf is set.
+        :param export_split: Also write every page range as a separate PDF file under out/<name>/pdf.
+        :param resume: Skip pages that the job manifest records as done with unchanged output.
+        :param manifest: JobManifest shared with the converter that created this one (optional).
+        :param metrics: Metrics receiving the timing spans and counters. Defaults to an in-memory summary.
         """
         self.pdf_path = pdf_path
         self.dpi = dpi
@@ -20,22 +28,19 @@ class PdfConverter:
         self.split_pdf = split_pdf
         self.output_extension = output_extension
         self.output_folder = output_folder
-
-        if not self.output_folder:
+        self.workers = max(1, workers or 1)
+        self.window_size = window_size
+        self.pages_per_split = pages_per_split
+        self.export_split = export_split
+        self.resume = resume
+        self.manifest = manifest
+        self.metrics = metrics or Metrics()
+
+        if not self.output_folder and self.pdf_path:
             base_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
             self.output_folder = os.path.join(os.path.dirname(self.pdf_path), "out", base_name)
             os.makedirs(self.output_folder, exist_ok=True)
 
-    def time_spent(self, message, start_time):
-        """
-        Print the time spent for an operation.
-
-        :param message: Message to display.
-        :param start_time: Start time of the operation.
-        """
-        spent = time.time() - start_time
-        print(f"[{spent:.2f}s] {message}")
-
     def convert_single_pdf(self):
         """
         Converts a single PDF and saves them to the output folder.
@@ -44,51 +49,146 @@ class PdfConverter:
             print("Error: No PDF file specified.")
             return
 
+        if not self.manifest:
+            self.manifest = JobManifest(self.manifest_path())
+
         try:
-            start_time = time.time()
-            if self.split_pdf:
-                split_pdfs = self.split()
+            with self.metrics.span("convert", "document", pdf=self.pdf_path):
+                if self.split_pdf:
+                    if self.export_split:
+                        self.split()
+
+                    parts = self.page_ranges()
+                else:
+                    self.page_count(self.pdf_path)
+                    parts = [(self.pdf_path, None, None)]
+
+                if self.resume and self.manifest:
+                    pending = [part for part in parts if not self.manifest.is_done(*part)]
+                    if len(pending) < len(parts):
+                        print(f"Resuming {self.pdf_path}: skipping {len(parts) - len(pending)} of {len(parts)} finished part(s)")
+                    parts = pending
+
+                self.convert_many(parts)
+
+            self.metrics.count("documents")
+            self.metrics.count("bytes_read", os.path.getsize(self.pdf_path))
+            print(f"Conversion completed: {self.pdf_path}")
+        except Exception as e:
+            print(f"An error occurred while processing '{self.pdf_path}': {e}")
+
+    def page_ranges(self):
+        """
+        Address the PDF by page index instead of writing split files.
+        :return: List of (pdf_path, first_page, last_page) tuples covering the whole PDF.
+        """
+        splitter = SplitPdf(self.pdf_path, pages_per_split=self.pages_per_split)
+        total_pages = self.page_count(self.pdf_path)
 
-                for split_pdf in split_pdfs:
-                    self.extract_from_pdf(split_pdf)
+        return [(self.pdf_path, first_page, last_page) for first_page, last_page in splitter.page_ranges(total_pages)]
+
+    def part_runs(self, parts):
+        """
+        Group parts that continue each other in the same PDF, so their pages can be rendered in shared
+        windows instead of starting poppler again for every part.
+        :param parts: List of (pdf_path, first_page, last_page) tuples, as from page_ranges().
+        :return: List of runs, each a list of consecutive parts. Parts without page bounds are runs of their own.
+        """
+        runs = []
+        for part in parts:
+            pdf_path, first_page, last_page = part
+            previous = runs[-1][-1] if runs else None
+            if previous and first_page and previous[0] == pdf_path and previous[2] and previous[2] + 1 == first_page:
+                runs[-1].append(part)
             else:
-                self.extract_from_pdf(self.pdf_path)
+                runs.append([part])
 
-            self.time_spent(f"Conversion completed: {self.pdf_path}", start_time)
-        except Exception as e:
-            print(f"An error occurred while processing '{self.pdf_path}': {e}")
+        return runs
+
+    def page_count(self, pdf_path):
+        """
+        Number of pages in a PDF. Registers the file with the job manifest.
+        :param pdf_path: Path to the PDF file.
+        """
+        total_pages = pdfinfo_from_path(pdf_path)["Pages"]
+        if self.manifest:
+            self.manifest.start_file(pdf_path, total_pages)
+
+        return total_pages
+
+    def record_output(self, pdf_path, first_page, last_page, output_path, append_only=False):
+        """
+        Record a finished page range in the job manifest.
+        :param pdf_path: Path to the PDF file.
+        :param first_page: First page of the range (1-based).
+        :param last_page: Last page of the range (inclusive).
+        :param output_path: File holding the output of the range.
+        :param append_only: output_path is a container that later ranges are appended to.
+        """
+        if self.manifest:
+            self.manifest.mark_done(pdf_path, first_page, last_page, output_path, append_only)
+
+    def manifest_path(self):
+        """
+        :return: Path of the job manifest: out/<name>/manifest.jsonl for a PDF, out/manifest.jsonl for a folder.
+        """
+        if self.pdf_path:
+            return os.path.join(self.output_folder, "manifest.jsonl")
+
+        return os.path.join(self.output_folder or os.path.join(self.folder_path, "out"), "manifest.jsonl")
+
+    def status(self):
+        """
+        Print the progress recorded in the job manifest.
+        """
+        if not os.path.exists(self.manifest_path()):
+            print(f"No job manifest found at '{self.manifest_path()}'.")
+            return
+
+        JobManifest(self.manifest_path()).print_status()
 
     def split(self):
         """
-        Split the PDF into smaller parts.
+        Export the PDF as smaller PDF files. Conversion does not need them; see page_ranges().
         :return: List of paths to the split PDFs.
         """
 
-        splitter = SplitPdf(self.pdf_path)
+        splitter = SplitPdf(self.pdf_path, pages_per_split=self.pages_per_split, metrics=self.metrics)
 
         print(f"Starting PDF splitting: {self.pdf_path}")
-        start_time = time.time()
-        split_pdfs = splitter.split()
-        self.time_spent(f"PDF splitting completed: {self.pdf_path}", start_time)
+        return splitter.split()
 
-        return split_pdfs
+    def convert_many(self, parts):
+        """
+        Converts a list of PDF parts one after another.
+        Subclasses may override this to spread the work across processes.
+        :param parts: List of (pdf_path, first_page, last_page) tuples. None page bounds mean the whole file.
+        """
+        for pdf_path, first_page, last_page in parts:
+            self.extract_from_pdf(pdf_path, first_page, last_page)
 
-    def extract_from_pdf(self, pdf_path):
+    def extract_from_pdf(self, pdf_path, first_page=None, last_page=None):
         """
-        Extracts PNG images from a single PDF file.
+        Extracts output from a single PDF file or a page range of it.
         :param pdf_path: Path to the PDF file.
+        :param first_page: First page to convert (1-based, optional).
+        :param last_page: Last page to convert (inclusive, optional).
         """
         try:
-            self.convert(pdf_path)
+            self.convert(pdf_path, first_page, last_page)
 
         except Exception as e:
+            self.metrics.count("part_errors")
             print(f"An error occurred during {self.output_extension} extraction: {e}")
 
-    def convert(self, pdf_path):
+    def convert(self, pdf_path, first_page=None, last_page=None):
         pass
 
-    def output_file_path(self, pdf_path):
+    def output_file_path(self, pdf_path, first_page=None, last_page=None):
         base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        if first_page:
+            base_name = SplitPdf(pdf_path, pages_per_split=self.pages_per_split).part_name(first_page, last_page or first_page)
+
         ext_folder = os.path.join(self.output_folder, self.output_extension)
         os.makedirs(ext_folder, exist_ok=True)
         output_file_path = os.path.join(self.output_folder, self.output_extension, f"{base_name}.{self.output_extension}")
@@ -107,21 +207,23 @@ class PdfConverter:
             print(f"Error: The folder '{self.folder_path}' does not exist.")
             return
 
-        # Get all PDF files in the folder
-        pdf_files = [f for f in os.listdir(self.folder_path) if f.lower().endswith('.pdf')]
+        if not self.manifest:
+            self.manifest = JobManifest(self.manifest_path())
+
+        # Get all PDF files in the folder, in a stable order so resumed jobs continue where they stopped
+        pdf_files = sorted(f for f in os.listdir(self.folder_path) if f.lower().endswith('.pdf'))
         if not pdf_files:
             print(f"No PDF files found in folder '{self.folder_path}'.")
             return
 
         print(f"Found {len(pdf_files)} PDF(s) in '{self.folder_path}'.")
-        total_start_time = time.time()
         for pdf_file in pdf_files:
             pdf_path = os.path.join(self.folder_path, pdf_file)
 
             # Create a new instance for each PDF file
             self.convert_all(pdf_path)
 
-        self.time_spent(f"All PDFs in folder processed: {self.folder_path}", total_start_time)
+        print(f"All PDFs in folder processed: {self.folder_path}")
 
     def convert_all(self, pdf_path):
         pass
@@ -136,3 +238,7 @@ class PdfConverter:
             self.convert_all_pdfs_in_folder()
         else:
             print("Error: Either a PDF file or a folder containing PDFs must be specified.")
+            return
+
+        self.metrics.print_summary()
+        self.metrics.flush()
@@ -1,18 +1,29 @@
-import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter, ImageDraw
+from PIL import Image, ImageEnhance, ImageFilter
 import os
 import re
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import time
+import threading
 import cv2
 import numpy as np
-from pdf2image import convert_from_path
+from collections import OrderedDict
+from sdk.pdf.page_source import PageSource
+from sdk.ocr.ocr_cache import OcrCache
+from sdk.ocr.ocr_result import OcrResult
+from sdk.ocr.ocr_engine import get_engine
+from sdk.pdf.layout_detector import LayoutDetector
+from sdk.img.blank_detector import BlankDetector
+from sdk.pdf.staged_pipeline import Stage, StagedPipeline
+from sdk.metrics.metrics import Metrics
+from sdk.pdf.page_container import PageContainerWriter
+from sdk.ocr.line_refiner import LineRefiner
+from sdk.search.search_index import SearchIndex
 
 # Initialize logger
 logging.basicConfig(level=logging.INFO)
 
 class PDFSectionExtractor:
-    def __init__(self, pdf_path, num_vertical=1, num_horizontal=1, use_ocr=True, ocr_resolution=300):
+    def __init__(self, pdf_path, num_vertical=1, num_horizontal=1, use_ocr=True, ocr_resolution=300, window_size=4, cache_path=None, engine="subprocess", engine_pool_size=None, threshold="global", layout="grid", layout_detector=None, skip_blank=True, blank_threshold=0.002, ocr_workers=None, preprocess_workers=1, write_workers=1, queue_size=None, metrics=None, output_folder=None, lang="ara", overlays=False, dpi_estimator=None, two_pass=False, refine_dpi=400, min_line_conf=60, raster="pgm", index_path=None, psm=1, first_page=None, last_page=None):
         """
         Initialize the extractor with the PDF path and section settings.
         :param pdf_path: Path to the input PDF file.
@@ -20,104 +31,339 @@ class PDFSectionExtractor:
         :param num_horizontal: Number of horizontal sections (rows).
         :param use_ocr: If True, use OCR for scanned PDFs.
         :param ocr_resolution: DPI resolution for OCR processing.
+        :param window_size: Number of pages rendered and held in memory at once.
+        :param cache_path: Path to an OCR cache file (optional).
+        :param engine: OCR engine: "subprocess" or "tesserocr".
+        :param engine_pool_size: Number of warm engine instances. Defaults to the number of OCR workers.
+        :param threshold: "global" binarizes the whole page with one Otsu threshold before cropping;
+                          "section" picks a threshold per section.
+        :param layout: "grid" cuts pages into num_vertical x num_horizontal sections;
+                       "auto" OCRs only the columns and blocks found by the layout detector.
+        :param layout_detector: LayoutDetector used in auto mode (optional).
+        :param skip_blank: Do not OCR sections that the blank detector finds empty.
+        :param blank_threshold: Minimum share of ink pixels for a section to be OCRed.
+        :param ocr_workers: Threads running OCR. Defaults to the number of CPUs.
+        :param preprocess_workers: Threads preprocessing pages and laying out sections.
+        :param write_workers: Threads saving section text and images.
+        :param queue_size: Maximum number of pages or sections waiting in front of each stage.
+                           Defaults to twice the number of OCR workers.
+        :param metrics: Metrics receiving the timing spans and counters. Defaults to an in-memory summary.
+        :param output_folder: Folder for the section container. Defaults to out/<name> next to the PDF.
+        :param lang: Language code for OCR.
+        :param overlays: Store the word boxes of every section so `zac render-overlay` can draw them later.
+        :param dpi_estimator: DpiEstimator picking the DPI of every page from a low-resolution probe (optional).
+                              ocr_resolution is then only used for pages without measurable text.
+        :param two_pass: Treat the OCR at ocr_resolution as a fast first pass and OCR lines whose confidence is
+                         below min_line_conf again from a render at refine_dpi (see LineRefiner).
+        :param refine_dpi: Resolution of the second pass. Pages whose first pass was at refine_dpi or above are not refined.
+        :param min_line_conf: Lines with a lower mean word confidence (0-100) get the second pass.
+        :param raster: "pgm" renders pages to grayscale PGM files and preprocesses the memory-mapped pixels
+                       directly; "pil" decodes RGB PIL images and converts them to grayscale first.
+        :param index_path: Path to a search index file. Every section is added to it as soon as it is written (optional).
+        :param psm: Tesseract page segmentation mode of the section OCR.
+        :param first_page: First page to extract (1-based). Defaults to the first page.
+        :param last_page: Last page to extract (inclusive). Defaults to the last page.
         """
         self.pdf_path = pdf_path
         self.num_vertical = num_vertical
         self.num_horizontal = num_horizontal
         self.use_ocr = use_ocr
         self.ocr_resolution = ocr_resolution
+        self.window_size = window_size
+        self.metrics = metrics or Metrics()
+        self.cache = OcrCache(cache_path, metrics=self.metrics) if cache_path else None
+        self.ocr_workers = ocr_workers or os.cpu_count() or 1
+        self.preprocess_workers = preprocess_workers
+        self.write_workers = write_workers
+        self.queue_size = queue_size or 2 * self.ocr_workers
+        self.engine = get_engine(engine, engine_pool_size or self.ocr_workers)
+        self.threshold = threshold
+        self.layout = layout
+        self.layout_detector = layout_detector or LayoutDetector()
+        self.detection_times = {}
+        self.blank_detector = BlankDetector(min_ink=blank_threshold) if skip_blank else None
+        self.skipped_sections = []
         self.base_filename = os.path.splitext(os.path.basename(pdf_path))[0]
+        self.output_folder = output_folder or os.path.join(os.path.dirname(pdf_path), "out", self.base_filename)
+        self.lang = lang
+        self.overlays = overlays
+        self.dpi_estimator = dpi_estimator
+        self.page_dpis = {}
+        self.refine_dpi = refine_dpi
+        self.refiner = LineRefiner(self.engine, lang, min_line_conf, cache=self.cache, metrics=self.metrics, config=f"--psm {psm} --oem 3") if two_pass else None
+        self.refine_pages = OrderedDict()
+        self.refine_locks = {}
+        self.refine_lock = threading.Lock()
+        self.container = None
+        self.raster = raster
+        self.index = SearchIndex(index_path) if index_path else None
+        self.psm = psm
+        self.first_page = first_page
+        self.last_page = last_page
+
+        os.makedirs(self.output_folder, exist_ok=True)
+
+        if threshold not in ("global", "section"):
+            raise ValueError(f"Unknown threshold mode '{threshold}'. Use 'global' or 'section'.")
+
+        if layout not in ("grid", "auto"):
+            raise ValueError(f"Unknown layout mode '{layout}'. Use 'grid' or 'auto'.")
 
     def extract_text_from_sections(self):
         """
         Extract text from multiple sections in a PDF.
-        Saves each section in a separate text file and annotated image.
-        """
-        pages = convert_from_path(self.pdf_path, dpi=self.ocr_resolution)  # Convert PDF pages to images
-        for page_num, pil_image in enumerate(pages, start=1):
-            width, height = pil_image.size
-
-            # If only one vertical section and one horizontal section, extract the whole page
-            if self.num_vertical == 1 and self.num_horizontal == 1:
-                text, annotated_image = self.extract_text_using_ocr(pil_image, resolution=self.ocr_resolution)
-                self.save_section_image(annotated_image, page_num, 0, 0)
-                self.save_section_text(text, page_num, 0, 0)
-                continue
-
-            section_width = width / self.num_vertical
-            section_height = height / self.num_horizontal
-
-            with ThreadPoolExecutor() as executor:
-                futures = []
-                for row in range(self.num_horizontal):
-                    for col in range(self.num_vertical):
-                        left = col * section_width
-                        top = row * section_height
-                        right = (col + 1) * section_width
-                        bottom = (row + 1) * section_height
-                        bbox = (left, top, right, bottom)
-
-                        futures.append(executor.submit(self.process_section, pil_image, bbox, page_num, row, col))
-
-                for future in futures:
-                    future.result()
+        Streams every section as a record into <output_folder>/<name>.sections.jsonl (read it back by
+        page with PageContainerReader). No images are written; see OverlayRenderer.
+
+        Pages flow through a document-wide pipeline (render -> preprocess -> OCR -> write) with
+        bounded queues between the stages, so OCR of one page overlaps with rendering and
+        preprocessing of the next and with writing the previous one.
+        """
+        pages = PageSource(self.pdf_path, dpi=self.ocr_resolution, window_size=self.window_size, first_page=self.first_page, last_page=self.last_page, metrics=self.metrics, dpi_estimator=self.dpi_estimator, raster=self.raster)  # Render PDF pages lazily
+        self.page_dpis = pages.page_dpi  # Filled in before each page enters the pipeline
+
+        pipeline = StagedPipeline([
+            Stage("preprocess", self.preprocess_stage, self.preprocess_workers),
+            Stage("ocr", self.ocr_stage, self.ocr_workers),
+            Stage("write", self.write_stage, self.write_workers),
+        ], queue_size=self.queue_size)
+
+        try:
+            with self.metrics.span("convert", "document", pdf=self.pdf_path):
+                errors = pipeline.run(pages)
+        finally:
+            self.close_container()
+            if self.cache:
+                self.cache.flush()
+            if self.index:
+                self.index.close()
+                self.index = None
+
+        if self.dpi_estimator:
+            self.report_page_dpis()
+
+        self.metrics.count("documents")
+        self.metrics.flush()
+
+        return errors
+
+    def report_page_dpis(self):
+        """
+        Print the DPI chosen for every page and the pixels relative to ocr_resolution.
+        """
+        if not self.page_dpis:
+            return
+
+        by_dpi = {}
+        for page_num, dpi in sorted(self.page_dpis.items()):
+            by_dpi.setdefault(dpi, []).append(str(page_num))
+
+        # Pixels grow with the square of the DPI
+        share = sum(dpi * dpi for dpi in self.page_dpis.values()) / (len(self.page_dpis) * self.ocr_resolution ** 2)
+        dpis = "; ".join(f"{dpi} for {', '.join(pages)}" for dpi, pages in sorted(by_dpi.items()))
+        print(f"DPI of pages in '{self.pdf_path}': {dpis} ({share:.0%} of the pixels at {self.ocr_resolution} DPI)")
+
+    def preprocess_stage(self, page):
+        """
+        Pipeline stage: preprocess a rendered page and emit one task per section.
+        :param page: (page_num, image) from the page source.
+        """
+        page_num, image = page
+
+        # Preprocess the whole page once; sections are slices of this array
+        with self.metrics.span("preprocess", "page", pdf=self.pdf_path, page=page_num):
+            page_array = self.preprocess_page(image)
+        image = None
+        self.metrics.count("pages")
+
+        for order, (row, col, bbox) in enumerate(self.page_sections(page_array, page_num)):
+            yield page_array, bbox, page_num, row, col, order
+
+    def ocr_stage(self, task):
+        """
+        Pipeline stage: OCR one section.
+        """
+        page_array, bbox, page_num, row, col, order = task
+        yield (page_num, row, col, bbox, order) + self.ocr_section(page_array, bbox, page_num, row, col)
+
+    def write_stage(self, section):
+        """
+        Pipeline stage: save the record of one section.
+        """
+        page_num, row, col, bbox, order, result, skipped = section
+        if result is not None:
+            self.save_section(result, skipped, page_num, row, col, bbox, order)
+        return ()
+
+    def page_sections(self, page_array, page_num):
+        """
+        Decide which parts of a page to OCR.
+        :param page_array: Page preprocessed by preprocess_page().
+        :param page_num: Page number.
+        :return: List of (row, col, bbox) tuples. In auto mode row is the block index within column col.
+        """
+        height, width = page_array.shape[:2]
+
+        if self.layout == "auto":
+            start_time = time.perf_counter()
+            regions = self.layout_detector.detect(page_array)
+            self.detection_times[page_num] = time.perf_counter() - start_time
+            self.metrics.observe("layout", self.detection_times[page_num], "page", pdf=self.pdf_path, page=page_num, regions=len(regions))
+
+            return [(block, col, bbox) for col, block, bbox in regions]
+
+        section_width = width / self.num_vertical
+        section_height = height / self.num_horizontal
+
+        sections = []
+        for row in range(self.num_horizontal):
+            for col in range(self.num_vertical):
+                left = col * section_width
+                top = row * section_height
+                right = (col + 1) * section_width
+                bottom = (row + 1) * section_height
+                sections.append((row, col, (left, top, right, bottom)))
+
+        return sections
     
-    def process_section(self, pil_image, bbox, page_num, row, col):
+    def process_section(self, page_array, bbox, page_num, row, col):
         """
         Process a single section of the page for text extraction and OCR.
+        :param page_array: Page preprocessed by preprocess_page().
+        """
+        result, skipped = self.ocr_section(page_array, bbox, page_num, row, col)
+        if result is not None:
+            self.save_section(result, skipped, page_num, row, col, bbox)
+
+    def ocr_section(self, page_array, bbox, page_num, row, col):
+        """
+        OCR a single section of the page.
+        :param page_array: Page preprocessed by preprocess_page().
+        :return: OcrResult and whether the section was skipped as blank, or (None, None) on error.
         """
         try:
-            # Log bbox for debugging
-            logging.info(f"Processing section {page_num}, section {row}_{col}, bbox: {bbox}")
+            # Slicing gives a view into the page array, no pixels are copied
+            left, top, right, bottom = (int(round(value)) for value in bbox)
+            section = page_array[top:bottom, left:right]
+
+            # Detected blocks hold ink by construction and can be a lone page number, so only the
+            # ink share gates them; whole pages and grid cells also need a few components of text
+            min_components = 1 if self.layout == "auto" else None
+            if self.blank_detector and self.blank_detector.is_blank(section, min_components):
+                self.skipped_sections.append((page_num, row, col))
+                self.metrics.count("sections_skipped")
+                return OcrResult([]), True
 
-            cropped_image = pil_image.crop(bbox)
-            section_text, annotated_image = self.extract_text_using_ocr(cropped_image)
+            dpi = self.page_dpis.get(page_num, self.ocr_resolution)
+            with self.metrics.span("ocr", "section", pdf=self.pdf_path, page=page_num, section=f"{row}_{col}"):
+                if self.threshold == "section":
+                    section = self.binarize(section)
 
-            self.save_section_image(annotated_image, page_num, row, col)
-            self.save_section_text(section_text, page_num, row, col)
+                result = self.extract_text_using_ocr(section, resolution=dpi)
+
+            # With --auto-dpi the first pass can already be at refine_dpi; a second pass would not see more pixels
+            if self.refiner and self.refine_dpi > dpi:
+                with self.metrics.span("refine", "section", pdf=self.pdf_path, page=page_num, section=f"{row}_{col}"):
+                    result = self.refiner.refine(result, (left, top, right, bottom), lambda: self.refine_page(page_num), self.refine_dpi / dpi)
+
+            return result, False
         except Exception as e:
             logging.error(f"Error processing page {page_num}, section {row}_{col}: {e}")
+            self.metrics.count("section_errors")
+            return None, None
+
+    def refine_page(self, page_num):
+        """
+        Render a page in grayscale at refine_dpi for the second pass, once for all of its sections.
+        The last window_size pages are kept.
+        :return: NumPy array of the page.
+        """
+        with self.refine_lock:
+            page_lock = self.refine_locks.setdefault(page_num, threading.Lock())
+
+        with page_lock:
+            with self.refine_lock:
+                page = self.refine_pages.get(page_num)
+            if page is not None:
+                return page
+
+            with self.metrics.span("refine_render", "page", pdf=self.pdf_path, page=page_num, dpi=self.refine_dpi):
+                _, page = next(iter(PageSource(self.pdf_path, self.refine_dpi, window_size=1, first_page=page_num, last_page=page_num, grayscale=True, raster=self.raster)))
+                page = page if isinstance(page, np.ndarray) else np.asarray(page.convert("L"))
+
+            with self.refine_lock:
+                self.refine_pages[page_num] = page
+                while len(self.refine_pages) > max(1, self.window_size):
+                    evicted, _ = self.refine_pages.popitem(last=False)
+                    self.refine_locks.pop(evicted, None)
+
+        return page
+
+    def save_section(self, result, skipped, page_num, row, col, bbox=None, order=0):
+        """
+        Save the record of a section and add its text to the search index, if one is set.
+        :param skipped: The section was blank and not OCRed.
+        :param bbox: (left, top, right, bottom) of the section on the page.
+        :param order: Position of the section in the reading order of its page.
+        """
+        with self.metrics.span("write", "section", pdf=self.pdf_path, page=page_num, section=f"{row}_{col}"):
+            self.save_section_text(result, page_num, row, col, bbox, order, skipped)
+        self.metrics.count("sections")
+
+        if self.index:
+            with self.metrics.span("index", "section", pdf=self.pdf_path, page=page_num, section=f"{row}_{col}"):
+                self.metrics.count("words_indexed", self.index.add(self.index.unit_name(self.pdf_path), page_num, result.text, f"{row}_{col}"))
 
     def extract_text_using_ocr(self, image, resolution=300):
         """
         Extracts text using OCR with enhanced preprocessing.
-        :param image: PIL image object.
+        :param image: PIL image object, or a NumPy array that is already binarized.
         :param resolution: Resolution for OCR processing.
-        :return: Extracted text and annotated image.
+        :return: OcrResult.
         """
-        logging.info(f"Processing image with resolution: {resolution}")
-
         # Preprocessing: Adaptive binarization & denoising
-        preprocessed_image = self.preprocess_image(image)
+        preprocessed_image = image if isinstance(image, np.ndarray) else self.preprocess_image(image)
 
         # OCR processing with adaptive PSM and OEM options
-        ocr_data = pytesseract.image_to_data(
-            preprocessed_image, lang="ara", config="--psm 1 --oem 3", output_type=pytesseract.Output.DICT
-        )
+        lang, config = self.lang, f"--psm {self.psm} --oem 3"
 
-        # Annotate detected text areas
-        annotated_image = self.draw_text_boxes(preprocessed_image, ocr_data)
+        def run_ocr():
+            return self.engine.recognize(preprocessed_image, lang=lang, config=config)
 
-        # Extracted text
-        extracted_text = "\n".join(ocr_data["text"]).strip()
+        if self.cache:
+            result = OcrResult.from_dict(self.cache.fetch(
+                preprocessed_image, lambda: run_ocr().to_dict(), engine=self.engine.name, lang=lang, config=config, preprocessing="gauss3-otsu-open3", output="ocr_result", threshold=self.threshold
+            ))
+        else:
+            result = run_ocr()
 
-        return extracted_text, annotated_image
+        return result
 
-    def preprocess_image(self, image):
+    def preprocess_page(self, image):
         """
-        Apply preprocessing to enhance OCR accuracy (i2OCR-style).
-        :param image: PIL image object.
-        :return: Preprocessed image.
+        Run the page-level part of the preprocessing once per page.
+        With global thresholding the page is fully binarized; with per-section thresholding
+        it is only converted to grayscale and blurred, and binarize() runs on each section.
+        :param image: PIL image object, or grayscale NumPy array (e.g. a memory-mapped PGM page).
+        :return: NumPy array of the page.
         """
-        # Convert to grayscale using PIL
-        image = image.convert("L")
-
-        # Convert PIL image to OpenCV format for further processing
-        open_cv_image = np.array(image)
+        # Grayscale arrays go to OpenCV as they are; PIL images are converted to grayscale first
+        gray = image if isinstance(image, np.ndarray) else np.asarray(image.convert("L"))
 
         # Gaussian blur
-        blur = cv2.GaussianBlur(open_cv_image, (3, 3), 0)
+        blur = cv2.GaussianBlur(gray, (3, 3), 0)
 
+        if self.threshold == "section":
+            return blur
+
+        return self.binarize(blur)
+
+    def binarize(self, blur):
+        """
+        Otsu threshold, noise removal and inversion of a blurred grayscale array.
+        :param blur: NumPy array (page or section view).
+        :return: New NumPy array with black text on white.
+        """
         # Otsu's thresholding
         _, thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
 
@@ -125,61 +371,76 @@ class PDFSectionExtractor:
         kernel = np.ones((3, 3), np.uint8)
         opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
 
-        # Invert image
-        invert = 255 - opening
-
-        # Convert back to PIL for compatibility with pytesseract
-        preprocessed_image = Image.fromarray(invert)
+        # Invert image in place
+        return cv2.bitwise_not(opening, dst=opening)
 
-        return preprocessed_image
-
-    def draw_text_boxes(self, image, ocr_data):
+    def preprocess_image(self, image):
         """
-        Draw green bounding boxes around detected text areas.
+        Apply preprocessing to enhance OCR accuracy (i2OCR-style).
         :param image: PIL image object.
-        :param ocr_data: OCR detection data.
-        :return: Annotated PIL image.
+        :return: Preprocessed image.
         """
-        # Convert image to RGB to ensure drawing works
-        image = image.convert("RGB")
-
-        draw = ImageDraw.Draw(image)
+        blur = cv2.GaussianBlur(np.asarray(image.convert("L")), (3, 3), 0)
 
-        for i in range(len(ocr_data["text"])):  
-            if ocr_data["text"][i].strip():  # Ignore empty text detections
-                x, y, w, h = (
-                    ocr_data["left"][i],
-                    ocr_data["top"][i],
-                    ocr_data["width"][i],
-                    ocr_data["height"][i],
-                )
-                draw.rectangle([x, y, x + w, y + h], outline="green", width=2)
+        # Convert back to PIL for compatibility with the OCR engines
+        return Image.fromarray(self.binarize(blur))
 
-        return image
-
-    def save_section_text(self, text, page_num, row, col):
+    def save_section_text(self, result, page_num, row, col, bbox=None, order=0, skipped=False):
         """
-        Save the extracted text to a separate file.
-        :param text: Extracted text.
+        Append the extracted text of a section, one OCR line per line, to the section container.
+        :param result: OcrResult of the section.
         :param page_num: Page number.
         :param row: Row index.
         :param col: Column index.
+        :param bbox: (left, top, right, bottom) of the section on the page.
+        :param order: Position of the section in the reading order of its page.
+        :param skipped: The section was blank and not OCRed.
         """
-        section_filename = f"{self.base_filename}_page{page_num}_section{row}_{col}.txt"
-        with open(section_filename, "w", encoding="utf-8") as file:
-            file.write(text)
+        bbox = [int(round(value)) for value in bbox] if bbox else None
+        record = {
+            "pdf": os.path.basename(self.pdf_path),
+            "path": os.path.abspath(self.pdf_path),
+            "page": page_num,
+            "section": f"{row}_{col}",
+            "row": row,
+            "col": col,
+            "order": order,
+            "bbox": bbox,
+            "text": result.text,
+            "conf": result.mean_conf,
+            "skipped": skipped,
+            "dpi": self.page_dpis.get(page_num, self.ocr_resolution),
+        }
+
+        if self.overlays:
+            # Word boxes in page pixels at the page's DPI
+            left, top = bbox[:2] if bbox else (0, 0)
+            record["boxes"] = [[x0 + left, y0 + top, x1 + left, y1 + top] for x0, y0, x1, y1 in result.boxes()]
+
+        container = self.section_container()
+        written = container.bytes_written
+        container.write(record)
+        self.metrics.count("bytes_written", container.bytes_written - written)
 
-    def save_section_image(self, image, page_num, row, col):
+    def section_container(self):
         """
-        Save the annotated section image with green OCR boxes.
-        :param image: Annotated PIL image.
-        :param page_num: Page number.
-        :param row: Row index.
-        :param col: Column index.
+        :return: PageContainerWriter for <output_folder>/<name>.sections.jsonl, opened on first use.
         """
-        section_filename = f"{self.base_filename}_page{page_num}_section{row}_{col}.png"
-        image.save(section_filename)
+        if self.container is None:
+            self.container = PageContainerWriter(os.path.join(self.output_folder, f"{self.base_filename}.sections.jsonl"))
+
+        return self.container
+
+    def close_container(self):
+        if self.container is not None:
+            self.container.close()
+            print(f"Saved file: {self.container.path}")
+            self.container = None
 
 # Example Usage:
 # extractor = PDFSectionExtractor("example.pdf", num_vertical=2, num_horizontal=1, use_ocr=True, ocr_resolution=300)
 # extractor.extract_text_from_sections()
+#
+# Detect columns and blocks instead of using a fixed grid:
+# extractor = PDFSectionExtractor("example.pdf", layout="auto")
+# extractor.extract_text_from_sections()
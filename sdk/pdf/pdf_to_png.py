@@ -1,26 +1,43 @@
-import time
-from pdf2image import convert_from_path
+import os
+import cv2
 from sdk.pdf.pdf_converter import PdfConverter
-from sdk.pdf.split_pdf import SplitPdf
+from sdk.pdf.page_source import PageSource
 
 class PdfToPng(PdfConverter):
-    def __init__(self, pdf_path=None, dpi=200, folder_path=None, output_folder=None, split_pdf=True, output_extension="png"):
-        super().__init__(pdf_path, dpi, folder_path, output_folder, split_pdf, output_extension)
+    def __init__(self, pdf_path=None, dpi=200, folder_path=None, output_folder=None, split_pdf=True, output_extension="png", window_size=4, pages_per_split=1, export_split=False, resume=False, manifest=None, metrics=None, grayscale=False):
+        """
+        :param grayscale: Write grayscale PNGs. Pages are then rendered to PGM files by poppler and encoded straight
+                          from the memory-mapped pixels, without decoding them into PIL images first.
+        """
+        super().__init__(pdf_path, dpi, folder_path, output_folder, split_pdf, output_extension, window_size=window_size, pages_per_split=pages_per_split, export_split=export_split, resume=resume, manifest=manifest, metrics=metrics)
+        self.grayscale = grayscale
 
-    def convert(self, pdf_path):
-        start_time = time.time()
+    def convert_many(self, parts):
+        """
+        Convert runs of consecutive parts in one go. Every page is saved and recorded on its own anyway,
+        so one-page parts still render `window_size` pages per poppler call.
+        """
+        for run in self.part_runs(parts):
+            self.extract_from_pdf(run[0][0], run[0][1], run[-1][2])
 
-        pages = convert_from_path(pdf_path, self.dpi)
-        self.time_spent(f"Converted PDF to {self.output_extension} in", start_time)
+    def convert(self, pdf_path, first_page=None, last_page=None):
+        # Render PDF pages lazily, one window at a time
+        pages = PageSource(pdf_path, self.dpi, window_size=self.window_size, first_page=first_page, last_page=last_page, metrics=self.metrics, raster="pgm" if self.grayscale else "pil")
 
-        for idx, page in enumerate(pages, start=1):
-            page_start = time.time()
-            output_file_path = self.output_file_path(pdf_path)
+        for idx, page in pages:
+            output_file_path = self.output_file_path(pdf_path, idx, idx)
 
-            page.save(output_file_path, "PNG")
-            self.time_spent(f"Saved page as {output_file_path} in", page_start)
+            with self.metrics.span("write", "page", pdf=pdf_path, page=idx):
+                if self.grayscale:
+                    # imencode + tofile instead of imwrite, which cannot open non-ASCII paths on Windows
+                    cv2.imencode(".png", page)[1].tofile(output_file_path)
+                else:
+                    page.save(output_file_path, "PNG")
+            self.record_output(pdf_path, idx, idx, output_file_path)
+            self.metrics.count("pages")
+            self.metrics.count("bytes_written", os.path.getsize(output_file_path))
+            print(f"Saved page as {output_file_path}")
 
     def convert_all(self, pdf_path):
-        converter = PdfToPng(pdf_path=pdf_path, dpi=self.dpi, output_folder=self.output_folder, split_pdf=self.split_pdf)
+        converter = PdfToPng(pdf_path=pdf_path, dpi=self.dpi, output_folder=self.output_folder, split_pdf=self.split_pdf, window_size=self.window_size, pages_per_split=self.pages_per_split, export_split=self.export_split, resume=self.resume, manifest=self.manifest, metrics=self.metrics, grayscale=self.grayscale)
         converter.convert_single_pdf()
-
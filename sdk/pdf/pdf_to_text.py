@@ -1,36 +1,538 @@
-import pytesseract
-from pdf2image import convert_from_path
+import os
+import socket
 import time
+from pdf2image import pdfinfo_from_path
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
 from sdk.pdf.pdf_converter import PdfConverter
-from sdk.pdf.split_pdf import SplitPdf
+from sdk.pdf.page_source import PageSource
+from sdk.ocr.ocr_cache import OcrCache
+from sdk.ocr.ocr_engine import get_engine
+from sdk.img.blank_detector import BlankDetector
+from sdk.metrics.metrics import Metrics
+from sdk.pdf.text_layer import TextLayerProbe
+from sdk.pdf.page_container import PageContainerWriter
+from sdk.search.search_index import SearchIndex
+
+_worker_cache = None
+_worker_engine = None
+_worker_metrics = None
+_worker_document = None  # (pdf_path, pdfplumber document) of the file this worker read last
+
+
+def _init_ocr_worker(omp_thread_limit, cache_path=None, engine="subprocess", engine_pool_size=1, metrics_level="summary"):
+    """
+    Pool initializer: cap the OpenMP threads of every tesseract process started by this worker,
+    so that N workers do not each spin up one OpenMP thread per core.
+    :param omp_thread_limit: Maximum number of OpenMP threads per tesseract process.
+    :param cache_path: Path to the OCR cache file (optional). Each worker opens its own connection.
+    :param engine: OCR engine name. Each worker keeps its own warm engine.
+    :param engine_pool_size: Number of warm instances per worker for engines that keep them.
+    :param metrics_level: Metrics level of the parent. Workers hand their metrics back with every page.
+    """
+    global _worker_cache, _worker_engine, _worker_metrics
+    os.environ["OMP_THREAD_LIMIT"] = str(omp_thread_limit)
+    _worker_metrics = Metrics(metrics_level)
+    _worker_cache = OcrCache(cache_path, metrics=_worker_metrics) if cache_path else None
+    if _worker_cache:
+        # Pool workers skip atexit handlers but run multiprocessing finalizers, so the last lookups are written
+        Finalize(_worker_cache, _worker_cache.close, exitpriority=10)
+    _worker_engine = get_engine(engine, engine_pool_size)
+
+
+def _image_to_string(image, lang, engine, cache=None):
+    """
+    OCR a page image, going through the cache when one is given.
+    """
+    if cache is None:
+        return engine.image_to_string(image, lang=lang)
+
+    return cache.fetch(image, lambda: engine.image_to_string(image, lang=lang), engine=engine.name, lang=lang, config="")
+
+
+def _page_text(image, lang, engine, cache=None, blank_detector=None, metrics=None, **labels):
+    """
+    OCR a page image unless the blank detector says it has no text.
+    :param metrics: Metrics receiving an OCR span for the page (optional).
+    :param labels: Labels of the OCR span, e.g. pdf and page.
+    :return: Tuple of (text, skipped).
+    """
+    if blank_detector and blank_detector.is_blank(image):
+        return "", True
+
+    with metrics.span("ocr", "page", **labels) if metrics else nullcontext():
+        return _image_to_string(image, lang, engine, cache), False
+
+
+def _text_layer_text(probe, document, pdf_path, page_no, metrics):
+    """
+    Read the embedded text layer of a page if the probe trusts it.
+    :param document: pdfplumber document of pdf_path.
+    :return: Text of the page, or None if the page needs OCR.
+    """
+    start_time = time.perf_counter()
+    page = document.pages[page_no - 1]
+    try:
+        text, reason = probe.probe(page)
+    except Exception:
+        text, reason = None, "error"
+    finally:
+        page.close()
+
+    metrics.observe("text_layer", time.perf_counter() - start_time, "page", pdf=pdf_path, page=page_no, result=reason)
+    if text is None:
+        metrics.count(f"text_layer_{reason.replace('-', '_')}")
+
+    return text
+
+
+def _page_runs(page_numbers):
+    """
+    Group sorted page numbers into (first_page, last_page) runs of consecutive pages.
+    """
+    runs = []
+    for page_no in page_numbers:
+        if runs and runs[-1][1] == page_no - 1:
+            runs[-1][1] = page_no
+        else:
+            runs.append([page_no, page_no])
+
+    return [tuple(run) for run in runs]
+
+
+def _page_list(page_numbers):
+    """
+    :return: Page numbers as a short string, e.g. "1-3, 5".
+    """
+    return ", ".join(str(first) if first == last else f"{first}-{last}" for first, last in _page_runs(page_numbers))
+
+
+def _open_worker_document(pdf_path):
+    """
+    Keep the pdfplumber document of the current file open across the pages a worker gets.
+    """
+    global _worker_document
+    if _worker_document and _worker_document[0] == pdf_path:
+        return _worker_document[1]
+
+    if _worker_document:
+        _worker_document[1].close()
+    _worker_document = (pdf_path, TextLayerProbe().open(pdf_path))
+
+    return _worker_document[1]
+
+
+def _ocr_pages(pdf_path, first_page, last_page, dpi, lang, blank_threshold=None, text_layer=False, dpi_estimator=None, raster="pgm", window_size=4):
+    """
+    Convert a run of consecutive pages. Runs inside a pool worker.
+    The embedded text layer is used when text_layer is set and the probe trusts it; the other pages are rendered
+    `window_size` at a time and OCRed.
+    :param dpi_estimator: DpiEstimator choosing the DPI from a low-resolution probe (optional). dpi is then the fallback.
+    :param raster: "pgm" maps a grayscale render of the page (see PageSource); "pil" decodes it to a PIL image.
+    :return: Tuple of (results, metrics). results is a list of (pdf_path, page_no, text, error, source, dpi) tuples,
+             one per page: exactly one of text and error is None; source is "text", "ocr" or "blank"; dpi is the
+             render DPI (None for text layer pages). metrics is the drained worker metrics for Metrics.merge().
+    """
+    results = []
+    ocr_pages = []
+    for page_no in range(first_page, last_page + 1):
+        text = None
+        if text_layer:
+            try:
+                text = _text_layer_text(TextLayerProbe(lang), _open_worker_document(pdf_path), pdf_path, page_no, _worker_metrics)
+            except Exception:
+                text = None  # Unreadable PDF structure: OCR still works from the rendered page
+        if text is None:
+            ocr_pages.append(page_no)
+        else:
+            results.append((pdf_path, page_no, text, None, "text", None))
+
+    blank_detector = BlankDetector(min_ink=blank_threshold) if blank_threshold is not None else None
+    for run_first, run_last in _page_runs(ocr_pages):
+        # Probe, render and pixel counters are recorded by the page source
+        pages = PageSource(pdf_path, dpi, window_size=window_size, first_page=run_first, last_page=run_last, metrics=_worker_metrics, dpi_estimator=dpi_estimator, raster=raster, skip_errors=True)
+        done = set()
+        try:
+            for page_no, page in pages:
+                done.add(page_no)
+                try:
+                    page_dpi = pages.page_dpi[page_no]
+                    text, skipped = _page_text(page, lang, _worker_engine, _worker_cache, blank_detector, _worker_metrics, pdf=pdf_path, page=page_no, dpi=page_dpi)
+                    results.append((pdf_path, page_no, text, None, "blank" if skipped else "ocr", page_dpi))
+                except Exception as e:
+                    results.append((pdf_path, page_no, None, str(e), "ocr", None))
+            error = None
+        except Exception as e:
+            error = str(e)
+
+        for page_no in range(run_first, run_last + 1):
+            if page_no not in done:
+                results.append((pdf_path, page_no, None, pages.page_errors.get(page_no) or error or "Page was not rendered", "ocr", None))
+
+    return results, _worker_metrics.drain()
+
 
 class PdfToText(PdfConverter):
-    def __init__(self, pdf_path=None, dpi=200, folder_path=None, output_folder=None, split_pdf=True, output_extension="txt"):
-        super().__init__(pdf_path, dpi, folder_path, output_folder, split_pdf, output_extension)
+    def __init__(self, pdf_path=None, dpi=200, folder_path=None, output_folder=None, split_pdf=True, output_extension="txt", workers=1, omp_thread_limit=1, lang="ara", window_size=4, pages_per_split=1, export_split=False, cache_path=None, resume=False, manifest=None, engine="subprocess", engine_pool_size=1, skip_blank=True, blank_threshold=0.002, metrics=None, text_layer=True, dpi_estimator=None, raster="pgm", index_path=None):
+        """
+        :param workers: Number of processes used to render and OCR pages. 1 keeps everything in this process.
+        :param omp_thread_limit: OpenMP threads allowed per tesseract process when workers > 1.
+        :param lang: Language code for OCR.
+        :param window_size: Number of pages rendered and held in memory at once, and by each worker process.
+        :param cache_path: Path to an OCR cache file. Pages whose pixels were OCRed before are not OCRed again (optional).
+        :param engine: OCR engine: "subprocess" (one tesseract process per call) or "tesserocr" (warm in-process instances).
+        :param engine_pool_size: Number of warm engine instances for engines that keep them.
+        :param skip_blank: Do not OCR pages that the blank detector finds empty.
+        :param blank_threshold: Minimum share of ink pixels for a page to be OCRed.
+        :param metrics: Metrics receiving the timing spans and counters (optional).
+        :param output_extension: "txt" writes one text file per part; "jsonl" streams every page as a record
+                                 into one container per PDF with a page index (see PageContainerReader).
+        :param text_layer: Use the embedded text layer of pages that have a trustworthy one instead of rendering and OCRing them.
+        :param dpi_estimator: DpiEstimator picking the DPI of every OCRed page from a low-resolution probe (optional).
+                              `dpi` is then only used for pages without measurable text.
+        :param raster: "pgm" renders pages to grayscale PGM files that are memory-mapped and handed to the blank
+                       detector, the cache and the engine as they are. "pil" decodes RGB PIL images instead.
+        :param index_path: Path to a search index file. Every page is added to it as soon as it is finished (optional).
+        """
+        super().__init__(pdf_path, dpi, folder_path, output_folder, split_pdf, output_extension, workers, window_size, pages_per_split, export_split, resume, manifest, metrics)
+        self.omp_thread_limit = omp_thread_limit
+        self.lang = lang
+        self.page_errors = {}
+        self.cache_path = cache_path
+        self.cache = OcrCache(cache_path, metrics=self.metrics) if cache_path else None
+        self.engine_name = engine
+        self.engine_pool_size = engine_pool_size
+        self.engine = get_engine(engine, engine_pool_size)
+        self.skip_blank = skip_blank
+        self.blank_threshold = blank_threshold
+        self.blank_detector = BlankDetector(min_ink=blank_threshold) if skip_blank else None
+        self.skipped_pages = {}
+        self.text_layer = text_layer
+        self.text_layer_probe = TextLayerProbe(lang) if text_layer else None
+        self.text_layer_document = None
+        self.page_sources = {}
+        self.containers = {}
+        self.dpi_estimator = dpi_estimator
+        self.page_dpis = {}
+        self.raster = raster
+        self.index_path = index_path
+        self.index = SearchIndex(index_path) if index_path else None
+
+    def convert(self, pdf_path, first_page=None, last_page=None):
+        self.save_pages(pdf_path, list(self.convert_pages(pdf_path, first_page, last_page)), first_page, last_page)
+
+    def convert_pages(self, pdf_path, first_page=None, last_page=None):
+        """
+        Convert a page range: text layer pages first, then the other pages rendered `window_size` at a time and OCRed.
+        :return: Generator of the (page_no, text, error, source) tuples of emit_page(), one per page as it finishes.
+        """
+        ocr_ranges = [(first_page, last_page)]
+
+        if self.text_layer:
+            try:
+                results, ocr_ranges = self.read_text_layer(pdf_path, first_page, last_page)
+                yield from results
+            except Exception as e:
+                print(f"Could not read the text layer of '{pdf_path}', using OCR: {e}")
+
+        for range_first, range_last in ocr_ranges:
+            # Render PDF pages lazily, one window at a time. Pages that fail to render are kept as page errors.
+            pages = PageSource(pdf_path, self.dpi, window_size=self.window_size, first_page=range_first, last_page=range_last, metrics=self.metrics, dpi_estimator=self.dpi_estimator, raster=self.raster, skip_errors=True)
+
+            for page_no, page in pages:
+                try:
+                    dpi = pages.page_dpi[page_no]
+                    text, skipped = _page_text(page, self.lang, self.engine, self.cache, self.blank_detector, self.metrics, pdf=pdf_path, page=page_no, dpi=dpi)
+                    yield self.emit_page(pdf_path, page_no, text, None, "blank" if skipped else "ocr", dpi)
+                except Exception as e:
+                    yield page_no, None, str(e), "ocr"
+
+            yield from ((page_no, None, error, "ocr") for page_no, error in pages.page_errors.items())
+
+    def read_text_layer(self, pdf_path, first_page=None, last_page=None):
+        """
+        Take the text of every page whose embedded text layer the probe trusts.
+        :return: Tuple of (results for the text pages, (first_page, last_page) runs of pages that still need OCR).
+        """
+        results = []
+        ocr_pages = []
+
+        # One-page parts of the same file share the open document instead of parsing it again
+        if not self.text_layer_document or self.text_layer_document[0] != pdf_path:
+            self.close_text_layer()
+            self.text_layer_document = (pdf_path, self.text_layer_probe.open(pdf_path))
+        document = self.text_layer_document[1]
+
+        for page_no in range(first_page or 1, (last_page or len(document.pages)) + 1):
+            text = _text_layer_text(self.text_layer_probe, document, pdf_path, page_no, self.metrics)
+            if text is None:
+                ocr_pages.append(page_no)
+            else:
+                results.append(self.emit_page(pdf_path, page_no, text, None, "text"))
+
+        return results, _page_runs(ocr_pages)
+
+    def close_text_layer(self):
+        """
+        Close the document kept open by read_text_layer().
+        """
+        if self.text_layer_document:
+            self.text_layer_document[1].close()
+            self.text_layer_document = None
+
+    def close(self):
+        """
+        Close the open text layer document, containers, OCR cache and search index.
+        """
+        self.close_text_layer()
+        self.close_containers()
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+        if self.index:
+            self.index.close()
+            self.index = None
+
+    def convert_many(self, parts):
+        """
+        Convert the given PDF parts, in a process pool when workers > 1.
+        Pages of every part are scheduled together, so one-page parts still keep all workers busy.
+        :param parts: List of (pdf_path, first_page, last_page) tuples. None page bounds mean the whole file.
+        """
+        try:
+            if self.workers <= 1:
+                for run in self.part_runs(parts):
+                    self.convert_run(run)
+            else:
+                self.convert_parallel(parts)
+        finally:
+            self.close_text_layer()
+            self.close_containers()
+
+        self.report_cache()
+
+    def convert_run(self, parts):
+        """
+        Convert consecutive parts of one PDF through a single page source, so one-page parts still render
+        `window_size` pages per poppler call. Each part is saved as soon as all of its pages are done.
+        :param parts: List of (pdf_path, first_page, last_page) tuples from part_runs().
+        """
+        if len(parts) == 1:
+            self.extract_from_pdf(*parts[0])
+            return
+
+        pdf_path = parts[0][0]
+        part_of = {page_no: part for part in parts for page_no in range(part[1], part[2] + 1)}
+        results = {part: [] for part in parts}
+        try:
+            for result in self.convert_pages(pdf_path, parts[0][1], parts[-1][2]):
+                part = part_of[result[0]]
+                results[part].append(result)
+                if len(results[part]) == part[2] - part[1] + 1:
+                    self.save_pages(pdf_path, results.pop(part), part[1], part[2])
+        except Exception as e:
+            self.metrics.count("part_errors", len(results))
+            print(f"An error occurred during {self.output_extension} extraction: {e}")
+
+    def convert_parallel(self, parts):
+        """
+        Render and OCR pages in a pool of `workers` processes and save each part in page order.
+        Every task is a run of up to `window_size` consecutive pages, rendered by one poppler call,
+        so one-page parts do not start poppler for every page.
+        :param parts: List of (pdf_path, first_page, last_page) tuples.
+        """
+        results = {part: [] for part in parts}
+        remaining = {}
+        part_of = {}
+        pages = {}
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_ocr_worker, initargs=(self.omp_thread_limit, self.cache_path, self.engine_name, self.engine_pool_size, self.metrics.level)) as executor:
+            futures = []
+            for part in parts:
+                pdf_path, first_page, last_page = part
+                try:
+                    last_page = last_page or pdfinfo_from_path(pdf_path)["Pages"]
+                except Exception as e:
+                    print(f"An error occurred while reading '{pdf_path}': {e}")
+                    continue
+
+                remaining[part] = last_page - (first_page or 1) + 1
+                for page_no in range(first_page or 1, last_page + 1):
+                    part_of[(pdf_path, page_no)] = part
+                    pages.setdefault(pdf_path, []).append(page_no)
+
+            for pdf_path, page_numbers in pages.items():
+                # Small files are spread over every worker; large ones go in windows of window_size pages
+                chunk = max(1, min(self.window_size, -(-len(page_numbers) // self.workers)))
+                for run_first, run_last in _page_runs(sorted(page_numbers)):
+                    for first in range(run_first, run_last + 1, chunk):
+                        futures.append(executor.submit(
+                            _ocr_pages, pdf_path, first, min(first + chunk - 1, run_last), self.dpi, self.lang, self.blank_threshold if self.skip_blank else None,
+                            self.text_layer, self.dpi_estimator, self.raster, self.window_size,
+                        ))
+
+            for future in as_completed(futures):
+                page_results, worker_metrics = future.result()
+                self.metrics.merge(worker_metrics)
+                for pdf_path, page_no, text, error, source, dpi in sorted(page_results, key=lambda result: result[1]):
+                    part = part_of[(pdf_path, page_no)]
+                    results[part].append(self.emit_page(pdf_path, page_no, text, error, source, dpi))
+
+                    # Save a part as soon as all of its pages are done, so an interrupted job keeps its progress
+                    remaining[part] -= 1
+                    if remaining[part] == 0:
+                        self.save_pages(pdf_path, results.pop(part), part[1], part[2])
+
+    def save_pages(self, pdf_path, results, first_page=None, last_page=None):
+        """
+        Save the text of all pages in page order and report pages that failed.
+        :param pdf_path: Path to the PDF file the pages belong to.
+        :param results: List of (page_no, text, error, source) tuples in any order. source is "text", "ocr" or "blank".
+        :param first_page: First page of the converted range (optional).
+        :param last_page: Last page of the converted range (optional).
+        """
+        results = sorted(results)
+        errors = [(page_no, error) for page_no, text, error, source in results if error is not None]
+        skipped_pages = [page_no for page_no, text, error, source in results if source == "blank"]
+        text_layer_pages = [page_no for page_no, text, error, source in results if source == "text"]
+
+        if self.output_extension == "jsonl":
+            # The pages were already streamed to the container by emit_page()
+            output_file_path = self.container(pdf_path).path
+        else:
+            # Save the text to the output file
+            output_file_path = self.output_file_path(pdf_path, first_page, last_page)
+            # Write to a temporary file and rename, so a reader or a second writer of the same part never sees half a file
+            temp_path = f"{output_file_path}.{socket.gethostname()}.{os.getpid()}.tmp"
+            with self.metrics.span("write", "part", pdf=pdf_path, first=first_page, last=last_page):
+                with open(temp_path, 'w', encoding='utf-8') as file:
+                    file.write(''.join(text + '\n' for page_no, text, error, source in results if error is None))
+                os.replace(temp_path, output_file_path)
+            self.metrics.count("bytes_written", os.path.getsize(output_file_path))
+            print(f"Saved file: {output_file_path}")
+
+        self.metrics.count("pages", len(results))
+        self.metrics.count("pages_text_layer", len(text_layer_pages))
+        self.metrics.count("pages_ocr", len(results) - len(text_layer_pages) - len(skipped_pages))
+        self.metrics.count("pages_skipped", len(skipped_pages))
+        self.metrics.count("page_errors", len(errors))
+
+        self.page_sources.setdefault(pdf_path, {}).update((page_no, source) for page_no, text, error, source in results)
+        self.report_page_sources(pdf_path, results)
+        if self.dpi_estimator:
+            self.report_page_dpis(pdf_path, results)
+
+        if skipped_pages:
+            self.skipped_pages.setdefault(pdf_path, []).extend(skipped_pages)
+            print(f"Skipped {len(skipped_pages)} blank page(s) in '{pdf_path}': {', '.join(map(str, skipped_pages))}")
+
+        if errors:
+            self.page_errors[pdf_path] = errors
+            self.report_page_errors(pdf_path, errors)
+        elif results:
+            self.record_output(pdf_path, results[0][0], results[-1][0], output_file_path, append_only=self.output_extension == "jsonl")
+
+    def container(self, pdf_path):
+        """
+        :return: PageContainerWriter for the PDF, opened on first use. Resumed jobs append to the existing container.
+        """
+        if pdf_path not in self.containers:
+            self.containers[pdf_path] = PageContainerWriter(self.output_file_path(pdf_path), append=self.resume)
+
+        return self.containers[pdf_path]
+
+    def emit_page(self, pdf_path, page_no, text, error, source, dpi=None):
+        """
+        Record a finished page: add it to the search index, and with jsonl output append it to the container
+        right away and drop its text from memory.
+        :param dpi: DPI the page was rendered at (None for text layer pages).
+        :return: The (page_no, text, error, source) tuple to keep for save_pages().
+        """
+        if dpi is not None:
+            self.page_dpis.setdefault(pdf_path, {})[page_no] = dpi
+
+        if self.index and error is None:
+            with self.metrics.span("index", "page", pdf=pdf_path, page=page_no):
+                self.metrics.count("words_indexed", self.index.add(self.index.unit_name(pdf_path), page_no, text))
+
+        if self.output_extension != "jsonl" or error is not None:
+            return page_no, text, error, source
+
+        record = {"pdf": os.path.basename(pdf_path), "path": os.path.abspath(pdf_path), "page": page_no, "source": source, "text": text}
+        if dpi is not None:
+            record["dpi"] = dpi
+
+        container = self.container(pdf_path)
+        written = container.bytes_written
+        with self.metrics.span("write", "page", pdf=pdf_path, page=page_no):
+            container.write(record)
+        self.metrics.count("bytes_written", container.bytes_written - written)
+
+        return page_no, None, None, source
+
+    def close_containers(self):
+        for pdf_path, container in self.containers.items():
+            container.close()
+            print(f"Saved file: {container.path}")
+        self.containers = {}
+
+    def report_page_sources(self, pdf_path, results):
+        """
+        Print which pages came from the text layer, which were OCRed and which were blank.
+        :param pdf_path: Path to the PDF file.
+        :param results: List of (page_no, text, error, source) tuples sorted by page.
+        """
+        sources = []
+        for source, name in (("text", "text layer"), ("ocr", "OCR"), ("blank", "blank")):
+            pages = [page_no for page_no, text, error, page_source in results if page_source == source]
+            if pages:
+                sources.append(f"{name} {_page_list(pages)}")
+
+        if sources:
+            print(f"Pages of '{pdf_path}' by source: {'; '.join(sources)}")
 
-    def convert(self, pdf_path):
-        start_time = time.time()
-    
-        text_data = ''
+    def report_page_dpis(self, pdf_path, results):
+        """
+        Print the DPI chosen for the rendered pages and their pixels relative to the fixed `dpi`.
+        :param pdf_path: Path to the PDF file.
+        :param results: List of (page_no, text, error, source) tuples sorted by page.
+        """
+        page_dpis = self.page_dpis.get(pdf_path, {})
+        rendered = [(page_no, page_dpis[page_no]) for page_no, text, error, source in results if page_no in page_dpis]
+        if not rendered:
+            return
 
-        # Convert PDF pages to images
-        pages = convert_from_path(pdf_path, self.dpi, thread_count=1, grayscale=False)
-        self.time_spent(f"Converted to image list: {pdf_path}", start_time)
+        by_dpi = {}
+        for page_no, dpi in rendered:
+            by_dpi.setdefault(dpi, []).append(page_no)
 
-        page_no = 1
-        for page in pages:
-            page_start = time.time()
-            text_data += pytesseract.image_to_string(page, lang='ara') + '\n'
-            self.time_spent(f"Extracted text from page {page_no}: {pdf_path}", page_start)
-            page_no += 1
+        # Pixels grow with the square of the DPI
+        share = sum(dpi * dpi for page_no, dpi in rendered) / (len(rendered) * self.dpi * self.dpi)
+        dpis = "; ".join(f"{dpi} for {_page_list(pages)}" for dpi, pages in sorted(by_dpi.items()))
+        print(f"DPI of pages in '{pdf_path}': {dpis} ({share:.0%} of the pixels at {self.dpi} DPI)")
 
-        # Save the text to the output file
-        output_file_path = self.output_file_path(pdf_path)
-        with open(output_file_path, 'w', encoding='utf-8') as file:
-            file.write(text_data)
+    def report_page_errors(self, pdf_path, errors):
+        """
+        Print the pages that could not be converted.
+        :param pdf_path: Path to the PDF file.
+        :param errors: List of (page_no, error) tuples.
+        """
+        print(f"{len(errors)} page(s) failed in '{pdf_path}':")
+        for page_no, error in errors:
+            print(f"  page {page_no}: {error}")
 
-        self.time_spent(f"Saved file: {output_file_path}", start_time)
+    def report_cache(self):
+        """
+        Print the OCR cache counters, if a cache is in use.
+        """
+        if self.cache:
+            stats = self.cache.stats()
+            print(f"OCR cache: {stats['total_hits']} hit(s), {stats['total_misses']} miss(es), {stats['entries']} entries, {stats['size']} bytes")
 
     def convert_all(self, pdf_path):
-        converter = PdfToText(pdf_path=pdf_path, dpi=self.dpi, split_pdf=self.split_pdf)
-        converter.convert_single_pdf()
\ No newline at end of file
+        converter = PdfToText(pdf_path=pdf_path, dpi=self.dpi, output_folder=self.output_folder, split_pdf=self.split_pdf, output_extension=self.output_extension, workers=self.workers, omp_thread_limit=self.omp_thread_limit, lang=self.lang, window_size=self.window_size, pages_per_split=self.pages_per_split, export_split=self.export_split, cache_path=self.cache_path, resume=self.resume, manifest=self.manifest, engine=self.engine_name, engine_pool_size=self.engine_pool_size, skip_blank=self.skip_blank, blank_threshold=self.blank_threshold, metrics=self.metrics, text_layer=self.text_layer, dpi_estimator=self.dpi_estimator, raster=self.raster, index_path=self.index_path)
+        try:
+            converter.convert_single_pdf()
+        finally:
+            converter.close()  # Release its cache and index connections before the next file
@@ -1,34 +1,47 @@
 import os
 from PyPDF2 import PdfReader, PdfWriter
 import time
+from sdk.metrics.metrics import Metrics
 
 class SplitPdf:
-    def __init__(self, pdf_path, output_folder=None, pages_per_split=1):
+    def __init__(self, pdf_path, output_folder=None, pages_per_split=1, metrics=None):
         """
         Initialize the PDF splitter.
 
         :param pdf_path: Path to the input PDF file.
         :param output_folder: Folder to save the split PDFs.
         :param pages_per_split: Number of pages per split PDF.
+        :param metrics: Metrics that receive the split span and counters (optional).
         """
         self.pdf_path = pdf_path
         self.output_folder = output_folder
         self.pages_per_split = pages_per_split
+        self.metrics = metrics or Metrics()
 
         if not self.output_folder:
             base_name = os.path.splitext(os.path.basename(self.pdf_path))[0]
             self.output_folder = os.path.join(os.path.dirname(self.pdf_path), "out", base_name, "pdf")
-            os.makedirs(self.output_folder, exist_ok=True)
 
-    def time_spent(self, message, start_time):
+    def page_ranges(self, total_pages):
         """
-        Print the time spent for an operation.
+        Page ranges covered by the split parts.
+        :param total_pages: Number of pages in the PDF.
+        :return: List of (first_page, last_page) tuples, 1-based and inclusive.
+        """
+        return [(start_page, min(start_page + self.pages_per_split - 1, total_pages)) for start_page in range(1, total_pages + 1, self.pages_per_split)]
 
-        :param message: Message to display.
-        :param start_time: Start time of the operation.
+    def part_name(self, first_page, last_page):
+        """
+        Name of the split part covering the given pages, without extension.
+        :param first_page: First page of the part (1-based).
+        :param last_page: Last page of the part (inclusive).
         """
-        spent = time.time() - start_time
-        print(f"{message} {spent:.2f} seconds.")
+        part_name = f"{os.path.splitext(os.path.basename(self.pdf_path))[0]}_{first_page}"
+
+        if first_page != last_page:
+            part_name += f"_{last_page}"
+
+        return part_name
 
     def split(self):
         """
@@ -36,7 +49,7 @@ class SplitPdf:
         :return: List of paths to the split PDFs.
         """
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
 
             # Ensure output folder exists
             if not os.path.exists(self.output_folder):
@@ -50,31 +63,29 @@ class SplitPdf:
 
             split_pdf_paths = []
 
-            for start_page in range(0, total_pages, self.pages_per_split):
+            for first_page, last_page in self.page_ranges(total_pages):
                 writer = PdfWriter()
-                end_page = min(start_page + self.pages_per_split, total_pages)
     
-                for page_num in range(start_page, end_page):
+                for page_num in range(first_page - 1, last_page):
                     writer.add_page(pdf_reader.pages[page_num])
 
-                split_pdf_name = f"{os.path.splitext(os.path.basename(self.pdf_path))[0]}_{start_page + 1}"
-
-                if self.pages_per_split == 1:
-                    split_pdf_name += f".pdf"
-                else:
-                    split_pdf_name += f"_{end_page}.pdf"
+                split_pdf_name = f"{self.part_name(first_page, last_page)}.pdf"
 
                 split_pdf_path = os.path.join(self.output_folder, split_pdf_name)
 
                 try:
                     with open(split_pdf_path, 'wb') as split_pdf_file:
                         writer.write(split_pdf_file)
-                    print(f"Saved split {start_page + 1} to {end_page} of PDF: {split_pdf_path}")
+                    print(f"Saved split {first_page} to {last_page} of PDF: {split_pdf_path}")
                     split_pdf_paths.append(split_pdf_path)
+                    self.metrics.count("bytes_written", os.path.getsize(split_pdf_path))
                 except Exception as e:
                     print(f"Error saving split PDF '{split_pdf_name}': {e}")
+                    self.metrics.count("split_errors")
 
-            self.time_spent(f"Successfully split PDF into {len(split_pdf_paths)} parts in ", start_time)
+            self.metrics.observe("split", time.perf_counter() - start_time, "document", pdf=self.pdf_path, parts=len(split_pdf_paths))
+            self.metrics.count("split_parts", len(split_pdf_paths))
+            print(f"Successfully split PDF into {len(split_pdf_paths)} parts")
          
             return split_pdf_paths
 
@@ -0,0 +1,88 @@
+import logging
+import queue
+import threading
+
+_DONE = object()
+
+class Stage:
+    def __init__(self, name, function, workers=1):
+        """
+        One step of a StagedPipeline.
+        :param name: Stage name, used in logs.
+        :param function: Callable taking one item and returning an iterable of items for the next stage.
+        :param workers: Number of threads running this stage.
+        """
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers or 1)
+
+
+class StagedPipeline:
+    def __init__(self, stages, queue_size=4):
+        """
+        Run items through a chain of stages, each with its own worker threads, connected by
+        bounded queues. A full queue blocks the stage feeding it, which caps the number of
+        items (pages, sections) in flight while every stage keeps working across page boundaries.
+
+        :param stages: List of Stage objects. The first stage receives the items of the source.
+        :param queue_size: Maximum number of items waiting in front of each stage.
+        """
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.errors = []
+        self.lock = threading.Lock()
+
+    def run(self, source):
+        """
+        Feed every item of `source` into the first stage and wait until all stages are drained.
+        :param source: Iterable of input items. It is consumed from the calling thread.
+        :return: List of (stage name, exception) for items that failed.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+        remaining = [stage.workers for stage in self.stages]
+
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                thread = threading.Thread(target=self.work, args=(index, queues, remaining), name=f"{stage.name}-worker", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in source:
+                queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+
+            for thread in threads:
+                thread.join()
+
+        return self.errors
+
+    def work(self, index, queues, remaining):
+        stage = self.stages[index]
+        output = queues[index + 1] if index + 1 < len(queues) else None
+
+        while True:
+            item = queues[index].get()
+            if item is _DONE:
+                break
+
+            try:
+                for result in stage.function(item) or ():
+                    if output is not None:
+                        output.put(result)
+            except Exception as e:
+                logging.error(f"Pipeline stage '{stage.name}' failed: {e}")
+                with self.lock:
+                    self.errors.append((stage.name, e))
+
+        # The last worker of a stage to finish tells every worker of the next stage to stop
+        with self.lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+
+        if last and output is not None:
+            for _ in range(self.stages[index + 1].workers):
+                output.put(_DONE)
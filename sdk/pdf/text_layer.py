@@ -0,0 +1,109 @@
+import re
+import unicodedata
+import pdfplumber
+
+ARABIC = re.compile(r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]")
+ARABIC_WORD = re.compile(r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]{3,}")
+LETTER = re.compile(r"[^\W\d_]")
+GARBAGE = re.compile(r"\(cid:\d+\)|[\uFFFD\uE000-\uF8FF\x00-\x08\x0B-\x1F]")
+LTR_RUN = re.compile(r"[0-9A-Za-z][0-9A-Za-z.,:/%-]*")
+
+class TextLayerProbe:
+    def __init__(self, lang="ara", min_chars=20, min_script_share=0.6, max_garbage_share=0.02, max_image_coverage=0.5, min_chars_over_image=200):
+        """
+        Decide per page whether the embedded text layer of a PDF can be used instead of OCR.
+
+        A page's text layer is accepted when it has enough characters, almost no undecodable
+        glyphs ("(cid:N)", U+FFFD, private-use code points), and, for Arabic, mostly Arabic
+        letters. Pages that are mostly covered by images with only a little text (a scan
+        with a caption or page number) are left to OCR.
+
+        Arabic presentation forms are folded to base letters (NFKC). Many producers store
+        Arabic glyphs in visual order, which reads backwards when extracted; such pages
+        are detected from the article "ال" appearing at word ends and are reversed line by line.
+
+        :param lang: Tesseract language code of the document. The script check only applies to Arabic.
+        :param min_chars: Minimum number of non-space characters.
+        :param min_script_share: Minimum share of Arabic letters among all letters.
+        :param max_garbage_share: Maximum share of undecodable characters.
+        :param max_image_coverage: Pages with images covering more of the page than this...
+        :param min_chars_over_image: ...need at least this many characters.
+        """
+        self.script = ARABIC if "ara" in lang else None
+        self.min_chars = min_chars
+        self.min_script_share = min_script_share
+        self.max_garbage_share = max_garbage_share
+        self.max_image_coverage = max_image_coverage
+        self.min_chars_over_image = min_chars_over_image
+
+    def open(self, pdf_path):
+        """
+        :return: pdfplumber document. Use it as a context manager.
+        """
+        return pdfplumber.open(pdf_path)
+
+    def probe(self, page):
+        """
+        Extract and judge the text layer of one page.
+        :param page: pdfplumber page.
+        :return: Tuple of (text, reason). text is None when the page needs OCR, and reason
+                 says why: "no-text", "few-chars", "garbled", "wrong-script" or "scanned".
+                 Accepted pages have reason "text".
+        """
+        raw_text = page.extract_text() or ""
+        garbage = len(GARBAGE.findall(raw_text))
+        text = self.normalize(GARBAGE.sub("", raw_text))
+
+        chars = sum(1 for char in text if not char.isspace())
+        if not chars:
+            return None, "no-text"
+
+        if garbage / (chars + garbage) > self.max_garbage_share:
+            return None, "garbled"
+
+        if chars < self.min_chars:
+            return None, "few-chars"
+
+        if self.script:
+            letters = len(LETTER.findall(text))
+            if not letters or len(self.script.findall(text)) / letters < self.min_script_share:
+                return None, "wrong-script"
+
+        if chars < self.min_chars_over_image and self.image_coverage(page) > self.max_image_coverage:
+            return None, "scanned"
+
+        if self.script and self.is_visual_order(text):
+            text = "\n".join(self.reverse_line(line) for line in text.split("\n"))
+
+        return text, "text"
+
+    def normalize(self, text):
+        """
+        Fold presentation forms and ligatures to base letters.
+        """
+        return unicodedata.normalize("NFKC", text)
+
+    def is_visual_order(self, text):
+        """
+        Arabic stored in visual order comes out reversed: the article "ال" ends words instead of starting them.
+        """
+        words = ARABIC_WORD.findall(text)
+        starts = sum(1 for word in words if word.startswith("ال"))
+        ends = sum(1 for word in words if word.endswith("لا"))
+
+        return ends > starts
+
+    def reverse_line(self, line):
+        """
+        Reverse a visually ordered line, keeping numbers and Latin words readable.
+        """
+        return LTR_RUN.sub(lambda match: match.group(0)[::-1], line[::-1])
+
+    def image_coverage(self, page):
+        """
+        :return: Share of the page area covered by images (overlaps counted twice, capped at 1).
+        """
+        page_area = float(page.width * page.height) or 1.0
+        image_area = sum(max(0, image["x1"] - image["x0"]) * max(0, image["bottom"] - image["top"]) for image in page.images)
+
+        return min(1.0, image_area / page_area)
@@ -0,0 +1,333 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pdf2image import pdfinfo_from_path
+from sdk.metrics.metrics import Metrics
+from sdk.pdf.pdf_to_text import PdfToText
+from sdk.img.dpi_estimator import DpiEstimator
+
+class WorkQueue:
+    def __init__(self, queue_path, lease_seconds=600, max_attempts=3):
+        """
+        Page-level task queue in a single SQLite file, shared by any number of workers.
+
+        A coordinator adds one task per page together with the conversion settings. Workers
+        on one host or many (through a shared mount) claim tasks under a lease. A task whose
+        worker dies is handed out again once its lease expires, up to `max_attempts` times.
+        Outputs are written atomically under a fixed name per page, so a page that is
+        converted twice leaves the same file behind.
+
+        The file uses the rollback journal rather than WAL, which needs shared memory and
+        does not work across hosts. Every claim runs in one IMMEDIATE transaction, which
+        relies on the file locks of the mount (fcntl locks on NFS).
+
+        :param queue_path: Path to the SQLite file.
+        :param lease_seconds: How long a claimed task belongs to its worker.
+        :param max_attempts: Tasks that failed or expired this often are marked failed.
+        """
+        self.queue_path = queue_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(queue_path)), exist_ok=True)
+
+        # Transactions are managed explicitly, so claims can take the write lock up front
+        self.connection = sqlite3.connect(queue_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=DELETE")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY, pdf TEXT NOT NULL, page INTEGER NOT NULL, state TEXT NOT NULL DEFAULT 'pending', "
+            "worker TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, finished REAL, UNIQUE (pdf, page))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, lease_until)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def set_settings(self, settings):
+        """
+        Store the converter settings every worker uses.
+        :param settings: JSON-serializable dict of PdfToText keyword arguments.
+        """
+        self.execute_many("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", [(key, json.dumps(value)) for key, value in settings.items()])
+
+    def settings(self):
+        with self.lock:
+            return {key: json.loads(value) for key, value in self.connection.execute("SELECT key, value FROM settings")}
+
+    def add_pdf(self, pdf_path):
+        """
+        Add one task per page of a PDF. Pages already in the queue keep their state.
+        :return: Number of new tasks.
+        """
+        pdf_path = os.path.abspath(pdf_path)
+        total_pages = pdfinfo_from_path(pdf_path)["Pages"]
+
+        return self.execute_many("INSERT OR IGNORE INTO tasks (pdf, page) VALUES (?, ?)", [(pdf_path, page) for page in range(1, total_pages + 1)])
+
+    def execute_many(self, sql, rows):
+        """
+        Run a statement for many rows in one transaction instead of one transaction (and one sync) per row.
+        :return: Number of changed rows.
+        """
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(sql, rows)
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+            return self.connection.total_changes - before
+
+    def add_folder(self, folder_path):
+        """
+        Add the pages of every PDF in a folder.
+        :return: Number of new tasks.
+        """
+        added = 0
+        for pdf_file in sorted(f for f in os.listdir(folder_path) if f.lower().endswith(".pdf")):
+            try:
+                added += self.add_pdf(os.path.join(folder_path, pdf_file))
+            except Exception as e:
+                print(f"An error occurred while reading '{pdf_file}': {e}")
+
+        return added
+
+    def claim(self, worker, count=1):
+        """
+        Lease up to `count` tasks: pending ones first, then ones whose lease expired.
+        :param worker: Worker id, e.g. host:pid.
+        :return: List of (task_id, pdf_path, page) tuples. Empty when nothing is left to claim.
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that used up their attempts will not be retried
+                self.connection.execute(
+                    "UPDATE tasks SET state = 'failed', error = COALESCE(error, 'lease expired') WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (now, self.max_attempts),
+                )
+                tasks = self.connection.execute(
+                    "SELECT id, pdf, page FROM tasks WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) ORDER BY id LIMIT ?",
+                    (now, count),
+                ).fetchall()
+                self.connection.executemany(
+                    "UPDATE tasks SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    [(worker, now + self.lease_seconds, task_id) for task_id, pdf_path, page in tasks],
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        return tasks
+
+    def renew(self, task_ids, worker):
+        """
+        Extend the leases of tasks that this worker still holds.
+        """
+        if task_ids:
+            self.execute_many(
+                "UPDATE tasks SET lease_until = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                [(time.time() + self.lease_seconds, task_id, worker) for task_id in task_ids],
+            )
+
+    def complete(self, task_id, worker):
+        """
+        Mark a task done if this worker still holds it. A worker whose lease expired may still complete
+        the task while nobody else claimed it: the output of a page does not depend on which worker wrote it.
+        Once another worker claimed it, that worker completes it.
+        :return: Whether the task was marked done.
+        """
+        with self.lock:
+            return self.connection.execute(
+                "UPDATE tasks SET state = 'done', error = NULL, finished = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                (time.time(), task_id, worker),
+            ).rowcount == 1
+
+    def fail(self, task_id, worker, error):
+        """
+        Hand a failed task back to the queue, or mark it failed after max_attempts.
+        Does nothing if another worker claimed the task since, so its lease is not taken away.
+        :return: Whether the failure was recorded.
+        """
+        with self.lock:
+            return self.connection.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, error = ?, lease_until = NULL WHERE id = ? AND worker = ? AND state = 'leased'",
+                (self.max_attempts, str(error), task_id, worker),
+            ).rowcount == 1
+
+    def retry_failed(self):
+        """
+        Put failed tasks back with fresh attempts.
+        :return: Number of tasks re-queued.
+        """
+        with self.lock:
+            return self.connection.execute("UPDATE tasks SET state = 'pending', attempts = 0, worker = NULL, lease_until = NULL WHERE state = 'failed'").rowcount
+
+    def counts(self):
+        """
+        :return: Dict of state -> number of tasks. Leases that expired count as pending.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT CASE WHEN state = 'leased' AND lease_until < ? THEN 'pending' ELSE state END, COUNT(*) FROM tasks GROUP BY 1",
+                (time.time(),),
+            ).fetchall()
+
+        return {state: rows_count for state, rows_count in rows}
+
+    def print_status(self):
+        """
+        Print tasks per state, throughput and failed pages.
+        """
+        counts = self.counts()
+        total = sum(counts.values())
+        print(f"Queue '{self.queue_path}': {total} page(s), {', '.join(f'{state} {count}' for state, count in sorted(counts.items())) or 'empty'}")
+
+        with self.lock:
+            first, last, done = self.connection.execute("SELECT MIN(finished), MAX(finished), COUNT(finished) FROM tasks WHERE state = 'done'").fetchone()
+            workers = self.connection.execute("SELECT COUNT(DISTINCT worker) FROM tasks WHERE state = 'leased' AND lease_until >= ?", (time.time(),)).fetchone()[0]
+            failed = self.connection.execute("SELECT pdf, page, error FROM tasks WHERE state = 'failed' ORDER BY id LIMIT 20").fetchall()
+
+        if done > 1 and last > first:
+            print(f"Throughput: {(done - 1) / (last - first) * 60:.1f} page(s)/min, {workers} worker(s) holding leases")
+
+        for pdf_path, page, error in failed:
+            print(f"  failed: {pdf_path} page {page}: {error}")
+
+    def close(self):
+        self.connection.close()
+
+
+class QueueWorker:
+    def __init__(self, queue_path, worker_id=None, batch_size=1, metrics=None):
+        """
+        Claim pages from a WorkQueue and convert them with the settings stored in the queue,
+        until no task is left.
+
+        Each page is written to the same file a `pdf2text` run with one page per file would
+        write (out/<name>/txt/<name>_<page>.txt unless the queue sets an output folder).
+
+        :param queue_path: Path to the queue file.
+        :param worker_id: Id recorded on leases. Defaults to host:pid.
+        :param batch_size: Tasks claimed at once. Larger batches mean fewer queue transactions.
+        :param metrics: Metrics receiving the timing spans and counters. Defaults to an in-memory summary.
+        """
+        self.queue = WorkQueue(queue_path)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = max(1, batch_size)
+        self.metrics = metrics or Metrics()
+        self.settings = self.queue.settings()
+        self.converter = None
+
+    def converter_for(self, pdf_path):
+        """
+        :return: PdfToText for the PDF. Consecutive tasks of one PDF share it and its open text layer.
+        """
+        if self.converter is None or self.converter.pdf_path != pdf_path:
+            self.close_converter()
+            settings = dict(self.settings)
+            auto_dpi = settings.pop("auto_dpi", None)
+            self.converter = PdfToText(
+                pdf_path=pdf_path,
+                split_pdf=True,
+                pages_per_split=1,
+                metrics=self.metrics,
+                dpi_estimator=DpiEstimator(**auto_dpi) if auto_dpi else None,
+                **settings,
+            )
+
+        return self.converter
+
+    def close_converter(self):
+        if self.converter is not None:
+            self.converter.close()
+            self.converter = None
+
+    def run(self):
+        """
+        Work until the queue has nothing left to claim.
+        :return: Tuple of (pages done, pages failed) by this worker.
+        """
+        done = failed = 0
+        while True:
+            tasks = self.queue.claim(self.worker_id, self.batch_size)
+            if not tasks:
+                break
+
+            for index, (task_id, pdf_path, page) in enumerate(tasks):
+                # Pages another worker took over after this worker's lease expired are counted by that worker
+                error = self.convert_page(pdf_path, page)
+                if error is None:
+                    done += self.queue.complete(task_id, self.worker_id)
+                else:
+                    failed += self.queue.fail(task_id, self.worker_id, error)
+
+                # Keep the leases of the rest of the batch alive
+                self.queue.renew([task[0] for task in tasks[index + 1:]], self.worker_id)
+
+        self.close_converter()
+        self.queue.close()
+
+        return done, failed
+
+    def convert_page(self, pdf_path, page):
+        """
+        :return: None on success, else the error message.
+        """
+        try:
+            converter = self.converter_for(pdf_path)
+            converter.convert(pdf_path, page, page)
+        except Exception as e:
+            return str(e)
+
+        errors = converter.page_errors.pop(pdf_path, None)
+        if errors:
+            return "; ".join(error for page_no, error in errors)
+
+        return None
+
+
+def _run_worker(queue_path, batch_size, metrics_level):
+    """
+    Process entry point of run_workers().
+    :return: Tuple of (pages done, pages failed, drained metrics).
+    """
+    # Several workers share the CPUs of this host
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    worker = QueueWorker(queue_path, batch_size=batch_size, metrics=Metrics(metrics_level))
+    done, failed = worker.run()
+
+    return done, failed, worker.metrics.drain()
+
+
+def run_workers(queue_path, processes=1, batch_size=1, metrics=None):
+    """
+    Drain a queue with `processes` worker processes on this host. No broker is needed:
+    the processes coordinate through the queue file only, exactly like workers on other hosts.
+    :return: Tuple of (pages done, pages failed).
+    """
+    metrics = metrics or Metrics()
+
+    if processes <= 1:
+        worker = QueueWorker(queue_path, batch_size=batch_size, metrics=metrics)
+        return worker.run()
+
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_run_worker, queue_path, batch_size, metrics.level) for _ in range(processes)]
+        for future in futures:
+            worker_done, worker_failed, worker_metrics = future.result()
+            done += worker_done
+            failed += worker_failed
+            metrics.merge(worker_metrics)
+
+    return done, failed
@@ -0,0 +1,65 @@
+import re
+
+# Harakat, tanween, shadda, sukun, superscript alef and Quranic annotation marks
+MARKS = "\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED"
+TASHKEEL = re.compile(f"[{MARKS}]")
+TATWEEL = "\u0640"
+# Marks are not \w, so they are listed to keep a vocalized word in one piece
+WORD = re.compile(f"[\\w{MARKS}]+")
+
+# Letter variants folded to one form, so a search matches however the word was written or OCRed
+LETTER_VARIANTS = {
+    "\u0622": "\u0627",  # alef with madda
+    "\u0623": "\u0627",  # alef with hamza above
+    "\u0625": "\u0627",  # alef with hamza below
+    "\u0671": "\u0627",  # alef wasla
+    "\u0624": "\u0648",  # waw with hamza
+    "\u0626": "\u064A",  # yaa with hamza
+    "\u0649": "\u064A",  # alef maksura
+    "\u06CC": "\u064A",  # Farsi yeh
+    "\u0629": "\u0647",  # taa marbuta
+}
+
+
+class ArabicNormalizer:
+    def __init__(self, letter_variants=None):
+        """
+        Fold Arabic text to one searchable form.
+
+        Tashkeel and tatweel are removed, alef, hamza, yaa and taa marbuta variants are
+        unified, Arabic-Indic digits become ASCII digits and other scripts are case-folded.
+        Text and queries go through the same normalizer, so "إِسْلامٌ" finds "اسلام".
+
+        :param letter_variants: Dict of letter -> replacement. Defaults to LETTER_VARIANTS.
+        """
+        table = dict(LETTER_VARIANTS if letter_variants is None else letter_variants)
+        table[TATWEEL] = ""
+        table.update({chr(0x0660 + digit): str(digit) for digit in range(10)})  # Arabic-Indic
+        table.update({chr(0x06F0 + digit): str(digit) for digit in range(10)})  # Extended Arabic-Indic
+        self.table = str.maketrans(table)
+
+    def normalize(self, text):
+        """
+        :return: Normalized text.
+        """
+        return TASHKEEL.sub("", text.translate(self.table)).casefold()
+
+    def tokens(self, text):
+        """
+        Split text into normalized words.
+        :return: List of (position, offset, term) tuples: the word index, the character offset of
+                 the word in the original text, and the normalized word.
+        """
+        tokens = []
+        for match in WORD.finditer(text):
+            term = self.normalize(match.group())
+            if term:
+                tokens.append((len(tokens), match.start(), term))
+
+        return tokens
+
+    def terms(self, text):
+        """
+        :return: Normalized words of a query, in order.
+        """
+        return [term for position, offset, term in self.tokens(text)]
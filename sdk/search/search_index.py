@@ -0,0 +1,236 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+from sdk.search.arabic_normalizer import ArabicNormalizer
+
+# Highest code point, so term >= "x" AND term < "x" + LAST_CHAR selects every term starting with "x"
+LAST_CHAR = "\U0010FFFF"
+
+class SearchIndex:
+    def __init__(self, index_path, normalizer=None, snippet_chars=40):
+        """
+        Incremental inverted index of extracted text, stored in a single SQLite file.
+
+        Text is indexed per unit: a page from pdf2text or a section from the section
+        extractor. Words are normalized with ArabicNormalizer, and for every (term, unit)
+        pair one row holds the word positions and character offsets of the term in that
+        unit. Queries therefore read a few index rows instead of scanning the text, and
+        phrases and snippets come from the stored positions.
+
+        Adding a unit that is already indexed replaces it, so pages can be indexed as
+        soon as they finish and again when a job is re-run. Every unit is committed on
+        its own, so an interrupted job keeps what it indexed.
+
+        :param index_path: Path to the SQLite file.
+        :param normalizer: ArabicNormalizer applied to text and queries. Defaults to ArabicNormalizer().
+        :param snippet_chars: Characters of context on each side of a hit in snippets.
+        """
+        self.index_path = index_path
+        self.normalizer = normalizer or ArabicNormalizer()
+        self.snippet_chars = snippet_chars
+        self.term_ids = {}
+        self.lock = threading.Lock()
+
+        index_dir = os.path.dirname(os.path.abspath(index_path))
+        os.makedirs(index_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(index_path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS units (id INTEGER PRIMARY KEY, pdf TEXT NOT NULL, page INTEGER NOT NULL, section TEXT NOT NULL, text TEXT NOT NULL, UNIQUE (pdf, page, section))"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE)")
+        # hits: little-endian uint32 (position, offset) pairs of the term in the unit
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS postings (term_id INTEGER NOT NULL, unit_id INTEGER NOT NULL, hits BLOB NOT NULL, PRIMARY KEY (term_id, unit_id)) WITHOUT ROWID"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS postings_unit ON postings (unit_id)")
+        self.connection.commit()
+
+    def unit_name(self, pdf_path):
+        """
+        Name a PDF is indexed under: its path relative to the folder of the index file, with forward slashes,
+        so books with the same file name in different folders stay apart and re-runs from anywhere replace
+        the same units.
+        :param pdf_path: Path to the PDF file.
+        """
+        try:
+            name = os.path.relpath(os.path.abspath(pdf_path), os.path.dirname(os.path.abspath(self.index_path)))
+        except ValueError:  # Another drive on Windows
+            name = os.path.abspath(pdf_path)
+
+        return name.replace(os.sep, "/")
+
+    def add(self, pdf, page, text, section="", commit=True):
+        """
+        Index the text of a page or section, replacing what was indexed for it before.
+        :param pdf: Name of the PDF file, see unit_name().
+        :param page: Page number.
+        :param text: Extracted text.
+        :param section: Section name, e.g. "0_1". Empty for whole pages.
+        :param commit: Commit right away. Bulk loads pass False and call commit() every few hundred units,
+                       because every commit rewrites the index pages of all the terms of the unit.
+        :return: Number of words indexed.
+        """
+        hits = {}
+        for position, offset, term in self.normalizer.tokens(text or ""):
+            hits.setdefault(term, []).append((position, offset))
+
+        with self.lock:
+            try:
+                row = self.connection.execute("SELECT id FROM units WHERE pdf = ? AND page = ? AND section = ?", (pdf, page, section)).fetchone()
+                if row:
+                    unit_id = row[0]
+                    self.connection.execute("UPDATE units SET text = ? WHERE id = ?", (text or "", unit_id))
+                    self.connection.execute("DELETE FROM postings WHERE unit_id = ?", (unit_id,))
+                else:
+                    unit_id = self.connection.execute("INSERT INTO units (pdf, page, section, text) VALUES (?, ?, ?, ?)", (pdf, page, section, text or "")).lastrowid
+
+                term_ids = self.ids_for(list(hits))
+                self.connection.executemany(
+                    "INSERT INTO postings (term_id, unit_id, hits) VALUES (?, ?, ?)",
+                    [(term_ids[term], unit_id, np.asarray(term_hits, dtype="<u4").tobytes()) for term, term_hits in hits.items()],
+                )
+                if commit:
+                    self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                self.term_ids = {}  # Ids of terms added in this transaction are gone
+                raise
+
+        return sum(len(term_hits) for term_hits in hits.values())
+
+    def commit(self):
+        with self.lock:
+            self.connection.commit()
+
+    def ids_for(self, terms):
+        """
+        Look up the ids of terms, adding the new ones. Ids never change, so they are remembered.
+        Call with the lock held.
+        :return: Dict of term -> id.
+        """
+        new_terms = [term for term in terms if term not in self.term_ids]
+        if new_terms:
+            self.connection.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", [(term,) for term in new_terms])
+            for start in range(0, len(new_terms), 500):
+                chunk = new_terms[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                self.term_ids.update((term, term_id) for term_id, term in self.connection.execute(f"SELECT id, term FROM terms WHERE term IN ({placeholders})", chunk))
+
+        return {term: self.term_ids[term] for term in terms}
+
+    def search(self, query, limit=20, phrase=False, prefix=False):
+        """
+        Find the pages and sections containing every word of a query.
+        :param query: Words to find. They are normalized like the indexed text.
+        :param limit: Maximum number of hits returned.
+        :param phrase: Only match the words next to each other, in query order.
+        :param prefix: Match every word that starts with a query word.
+        :return: Tuple of (hits, total). hits is a list of dicts with pdf, page, section, offset and snippet,
+                 ordered by PDF, page and section; total is the number of matching units.
+        """
+        terms = self.normalizer.terms(query)
+        if not terms:
+            return [], 0
+
+        with self.lock:
+            term_ids = [self.matching_ids(term, prefix) for term in terms]
+            if not all(term_ids):
+                return [], 0
+
+            # Units holding every term, from the postings alone. Phrases are then checked unit by unit.
+            subqueries = " INTERSECT ".join(f"SELECT unit_id FROM postings WHERE term_id IN ({','.join(map(str, ids))})" for ids in term_ids)
+            units_query = f"SELECT id, pdf, page, section FROM units WHERE id IN ({subqueries}) ORDER BY pdf, page, section"
+            if phrase:
+                units = self.connection.execute(units_query).fetchall()
+            else:
+                total = self.connection.execute(f"SELECT COUNT(*) FROM ({subqueries})").fetchone()[0]
+                units = self.connection.execute(f"{units_query} LIMIT ?", (limit,)).fetchall()
+
+            hits = []
+            matches = 0
+            for unit_id, pdf, page, section in units:
+                offset = self.match_offset(unit_id, term_ids, phrase)
+                if offset is None:
+                    continue
+
+                matches += 1
+                if len(hits) < limit:
+                    hits.append({"pdf": pdf, "page": page, "section": section, "offset": offset, "snippet": self.snippet(unit_id, offset)})
+
+            if phrase:
+                total = matches
+
+        return hits, total
+
+    def matching_ids(self, term, prefix=False):
+        """
+        :return: Ids of the indexed terms equal to `term`, or starting with it when prefix is set.
+        """
+        if prefix:
+            rows = self.connection.execute("SELECT id FROM terms WHERE term >= ? AND term < ?", (term, term + LAST_CHAR))
+        else:
+            rows = self.connection.execute("SELECT id FROM terms WHERE term = ?", (term,))
+
+        return [row[0] for row in rows]
+
+    def hits(self, unit_id, ids):
+        """
+        :return: (n, 2) array of (position, offset) of any of the term ids in a unit, sorted by position.
+        """
+        placeholders = ",".join("?" * len(ids))
+        blobs = [row[0] for row in self.connection.execute(f"SELECT hits FROM postings WHERE unit_id = ? AND term_id IN ({placeholders})", (unit_id, *ids))]
+        hits = np.concatenate([np.frombuffer(blob, dtype="<u4") for blob in blobs]).reshape(-1, 2) if blobs else np.empty((0, 2), dtype="<u4")
+
+        return hits[np.argsort(hits[:, 0], kind="stable")]
+
+    def match_offset(self, unit_id, term_ids, phrase):
+        """
+        :return: Character offset of the first match in a unit, or None if the phrase does not occur.
+        """
+        first = self.hits(unit_id, term_ids[0])
+        if not phrase or len(term_ids) == 1:
+            return int(first[0, 1]) if len(first) else None
+
+        # A phrase starts at position p when term i occurs at p + i for every i
+        starts = first[:, 0].astype(np.int64)
+        for index, ids in enumerate(term_ids[1:], 1):
+            starts = np.intersect1d(starts, self.hits(unit_id, ids)[:, 0].astype(np.int64) - index)
+            if not len(starts):
+                return None
+
+        return int(first[np.searchsorted(first[:, 0], starts[0]), 1])
+
+    def snippet(self, unit_id, offset):
+        """
+        :return: The whole words around a character offset of a unit, on one line.
+        """
+        start = max(0, offset - self.snippet_chars)
+        length = 2 * self.snippet_chars
+        text = self.connection.execute("SELECT substr(text, ?, ?) FROM units WHERE id = ?", (start + 1, length, unit_id)).fetchone()[0]
+
+        words = text.split()
+        if start > 0 and len(words) > 1 and not text[0].isspace():
+            words = words[1:]  # Cut off at the start
+        if len(text) == length and len(words) > 1 and not text[-1].isspace():
+            words = words[:-1]  # Cut off at the end
+
+        return " ".join(words)
+
+    def stats(self):
+        """
+        :return: Dict with the number of indexed units, distinct terms and postings.
+        """
+        with self.lock:
+            return {
+                table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("units", "terms", "postings")
+            }
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
@@ -0,0 +1,62 @@
+import os
+import cv2
+import numpy as np
+from sdk.img.blank_detector import BlankDetector
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+
+def blank_page():
+    # A4 at 200 DPI
+    return np.full((2339, 1654), 255, np.uint8)
+
+
+def stroke_page(width):
+    """
+    Lines of "words" drawn with strokes `width` pixels wide.
+    """
+    page = blank_page()
+    for y in range(200, 2100, 40):
+        for x in range(150, 1450, 80):
+            for k in range(0, 50, 6):
+                cv2.line(page, (x + k, y), (x + k, y + 18), 0, width)
+            cv2.line(page, (x, y + 18), (x + 50, y + 18), 0, width)
+    return page
+
+
+def test_thin_strokes_are_text():
+    detector = BlankDetector()
+    for width in (1, 2, 3):
+        assert not detector.is_blank(stroke_page(width))
+
+
+def test_specks_and_noise_are_blank():
+    page = blank_page()
+    page[1000, 800:803] = 0
+    page[500:502, 300] = 0
+    page[np.random.default_rng(0).random(page.shape) < 0.001] = 0
+
+    assert BlankDetector().is_blank(page)
+
+
+def test_single_rule_is_blank():
+    for thickness in (1, 2):
+        page = blank_page()
+        page[1100:1100 + thickness, 200:1450] = 0
+        assert BlankDetector().is_blank(page)
+
+
+def test_scanned_page_is_text_and_margin_is_blank():
+    page = cv2.imread(os.path.join(DATA, "page-001.png"), cv2.IMREAD_GRAYSCALE)
+
+    assert not BlankDetector().is_blank(page)
+    assert BlankDetector().is_blank(page[:, :40])
+
+
+def test_small_dense_block_is_text_as_a_detected_block():
+    block = np.full((60, 80), 255, np.uint8)
+    cv2.putText(block, "12", (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+    detector = BlankDetector()
+
+    assert detector.is_blank(block)
+    assert not detector.is_blank(block, min_components=1)
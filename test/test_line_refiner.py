@@ -0,0 +1,52 @@
+import numpy as np
+from sdk.ocr.line_refiner import LineRefiner
+from sdk.ocr.ocr_result import OcrResult, OcrWord
+
+
+class ConfidentEngine:
+    """
+    Returns one confident word for any crop.
+    """
+    name = "fake"
+
+    def recognize(self, image, lang="ara", config=""):
+        return OcrResult([OcrWord("كتاب", 2, 2, 20, 10, 95, 1, 1, 1)])
+
+
+def weak_result():
+    return OcrResult([OcrWord("كتب", 10, 10, 30, 12, 20, 1, 1, 1), OcrWord("العلم", 50, 10, 30, 12, 90, 1, 1, 2)])
+
+
+def test_refines_weak_lines_at_a_higher_resolution():
+    rendered = []
+    page = lambda: rendered.append(1) or np.full((400, 400), 255, np.uint8)
+
+    result = LineRefiner(ConfidentEngine()).refine(weak_result(), (0, 0, 200, 100), page, 2.0)
+
+    assert rendered == [1]
+    assert [word.text for word in result.words] == ["كتاب", "العلم"]
+
+
+def test_no_second_pass_at_the_same_or_lower_resolution():
+    rendered = []
+    page = lambda: rendered.append(1) or np.full((400, 400), 255, np.uint8)
+    first = weak_result()
+
+    for scale in (1.0, 0.75):
+        assert LineRefiner(ConfidentEngine()).refine(first, (0, 0, 200, 100), page, scale) is first
+    assert rendered == []
+
+
+def test_whole_region_uses_the_first_pass_config():
+    configs = []
+
+    class RecordingEngine(ConfidentEngine):
+        def recognize(self, image, lang="ara", config=""):
+            configs.append(config)
+            return super().recognize(image, lang, config)
+
+    first = OcrResult([OcrWord("كتب", 10, 10, 30, 12, 20, 1, 1, 1)])
+    page = lambda: np.full((400, 400), 255, np.uint8)
+    LineRefiner(RecordingEngine(), config="--psm 6 --oem 3").refine(first, (0, 0, 200, 100), page, 2.0)
+
+    assert configs == ["--psm 6 --oem 3"]
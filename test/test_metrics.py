@@ -0,0 +1,44 @@
+import json
+from sdk.metrics.metrics import Metrics
+
+
+def lines(path):
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_trace_events_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    metrics = Metrics("trace", jsonl_path=path, flush_events=10, flush_seconds=60)
+
+    for page in range(25):
+        metrics.observe("ocr", 0.01, page=page)
+        assert len(metrics.events) < 10
+
+    assert [event["page"] for event in lines(path)] == list(range(20))
+
+    metrics.flush()
+    events = lines(path)
+    assert [event["page"] for event in events[:-1]] == list(range(25))
+    assert events[-1]["event"] == "summary"
+    assert events[-1]["stages"]["ocr/page"]["count"] == 25
+
+
+def test_merged_events_are_written_after_some_time(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    metrics = Metrics("trace", jsonl_path=path, flush_events=1000, flush_seconds=0)
+    worker = Metrics("trace")
+    worker.observe("render", 0.5, pdf="a.pdf", page=1)
+
+    metrics.merge(worker.drain())
+
+    assert metrics.events == []
+    assert lines(path)[0]["stage"] == "render"
+
+
+def test_trace_without_file_keeps_events():
+    metrics = Metrics("trace", flush_events=1)
+    metrics.observe("ocr", 0.01)
+    metrics.observe("ocr", 0.02)
+
+    assert len(metrics.events) == 2
@@ -0,0 +1,63 @@
+import numpy as np
+from sdk.ocr.ocr_cache import OcrCache
+
+
+def stored_size(cache):
+    return cache.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+
+def test_size_counter_follows_puts_and_evictions(tmp_path):
+    cache = OcrCache(str(tmp_path / "cache.sqlite"), max_size=1000)
+    for index in range(30):
+        cache.put(f"key{index % 20}", "x" * (10 + index))
+        assert cache.stats()["size"] == stored_size(cache) <= 1000
+
+    cache.close()
+    reopened = OcrCache(str(tmp_path / "cache.sqlite"), max_size=1000)
+    assert reopened.stats()["size"] == stored_size(reopened)
+
+
+def test_size_counter_of_an_older_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = OcrCache(path)
+    cache.put("key", "x" * 50)
+    cache.connection.execute("DELETE FROM counters WHERE name = 'size'")
+    cache.connection.commit()
+    cache.close()
+
+    assert OcrCache(path).stats()["size"] == 52
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = OcrCache(str(tmp_path / "cache.sqlite"), max_size=100, flush_every=1)
+    cache.put("old", "x" * 40)
+    cache.put("used", "x" * 40)
+    cache.get("old")
+    cache.put("new", "x" * 40)
+
+    assert cache.get("old") == "x" * 40
+    assert cache.get("used") is None
+    assert cache.get("new") == "x" * 40
+
+
+def test_lookups_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = OcrCache(path, flush_every=100, flush_seconds=60)
+    cache.put("key", "text")
+    changes = cache.connection.total_changes
+
+    for _ in range(10):
+        assert cache.get("key") == "text"
+    assert cache.get("other") is None
+    assert cache.connection.total_changes == changes
+
+    cache.close()
+    stats = OcrCache(path).stats()
+    assert (stats["total_hits"], stats["total_misses"]) == (10, 1)
+
+
+def test_key_includes_engine(tmp_path):
+    cache = OcrCache(str(tmp_path / "cache.sqlite"))
+    image = np.zeros((10, 10), np.uint8)
+
+    assert cache.key(image, engine="subprocess", lang="ara", config="") != cache.key(image, engine="tesserocr", lang="ara", config="")
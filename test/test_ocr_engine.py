@@ -0,0 +1,79 @@
+import sys
+import threading
+import types
+import pytest
+from sdk.ocr.ocr_engine import TesserocrEngine, api_options, parse_config
+
+
+def test_parse_config():
+    options = parse_config("--psm 1 --oem 3 -c preserve_interword_spaces=1")
+
+    assert options == {"psm": 1, "oem": 3, "variables": {"preserve_interword_spaces": "1"}}
+
+
+def test_api_options_pass_psm_and_oem_as_ints():
+    kwargs, variables = api_options("ara", "--psm 1 --oem 3")
+
+    assert kwargs == {"lang": "ara", "psm": 1, "oem": 3}
+    assert type(kwargs["psm"]) is int and type(kwargs["oem"]) is int
+    assert variables == {}
+
+
+def test_api_options_single_line():
+    kwargs, variables = api_options("ara", "--psm 7 -c tessedit_do_invert=0", tessdata_path="/usr/share/tessdata")
+
+    assert kwargs == {"lang": "ara", "path": "/usr/share/tessdata", "psm": 7}
+    assert variables == {"tessedit_do_invert": "0"}
+
+
+def test_api_options_without_config():
+    assert api_options("ara", "") == ({"lang": "ara"}, {})
+
+
+class FakeApi:
+    """
+    Stands in for tesserocr.PyTessBaseAPI. Fails to start while `failures` is positive.
+    """
+    failures = 0
+    ended = 0
+
+    def __init__(self, lang="ara", **kwargs):
+        if FakeApi.failures:
+            FakeApi.failures -= 1
+            raise RuntimeError(f"Failed loading language '{lang}'")
+
+    def SetVariable(self, name, value):
+        pass
+
+    def End(self):
+        FakeApi.ended += 1
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=FakeApi))
+    FakeApi.failures = FakeApi.ended = 0
+    return TesserocrEngine(pool_size=1)
+
+
+def test_failed_start_frees_its_pool_slot(engine):
+    FakeApi.failures = 1
+    with pytest.raises(RuntimeError):
+        engine.acquire("ara", "--psm 1")
+
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(engine.acquire("ara", "--psm 1")))
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert isinstance(acquired[0][1], FakeApi)
+
+
+def test_instance_released_after_close_is_ended(engine):
+    key, api = engine.acquire("ara", "--psm 1")
+    engine.close()
+
+    engine.release(key, api)
+
+    assert FakeApi.ended == 1
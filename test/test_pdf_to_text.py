@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import pytest
+from PIL import Image
+from sdk.pdf import page_source, pdf_converter, pdf_to_text
+from sdk.pdf.pdf_to_text import PdfToText
+
+PAGES = 10
+
+
+@pytest.fixture
+def renders(tmp_path, monkeypatch):
+    """
+    Stubs poppler and OCR. Every poppler call appends its page range to renders.log.
+    """
+    log_path = str(tmp_path / "renders.log")
+
+    def convert_from_path(pdf_path, dpi, first_page=None, last_page=None, **kwargs):
+        with open(log_path, "a", encoding="utf-8") as file:
+            file.write(f"{first_page} {last_page}\n")
+        return [Image.new("L", (20, 20), 255) for _ in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(page_source, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(page_source, "pdfinfo_from_path", lambda pdf_path: {"Pages": PAGES})
+    monkeypatch.setattr(pdf_converter, "pdfinfo_from_path", lambda pdf_path: {"Pages": PAGES})
+    monkeypatch.setattr(pdf_to_text, "pdfinfo_from_path", lambda pdf_path: {"Pages": PAGES})
+    monkeypatch.setattr(pdf_to_text, "_page_text", lambda image, lang, engine, cache=None, blank_detector=None, metrics=None, **labels: (f"page {labels['page']}", False))
+
+    def read():
+        with open(log_path, encoding="utf-8") as file:
+            return sorted(tuple(map(int, line.split())) for line in file)
+
+    return read
+
+
+def convert(tmp_path, workers):
+    pdf_path = str(tmp_path / "book.pdf")
+    open(pdf_path, "wb").close()
+    converter = PdfToText(pdf_path=pdf_path, workers=workers, window_size=4, pages_per_split=1, text_layer=False, raster="pil")
+    converter.convert_single_pdf()
+    converter.close()
+
+    text_folder = os.path.join(converter.output_folder, "txt")
+    return sorted(os.listdir(text_folder)), converter
+
+
+def test_one_page_parts_share_render_windows(tmp_path, renders):
+    files, converter = convert(tmp_path, workers=1)
+
+    assert renders() == [(1, 4), (5, 8), (9, 10)]
+    assert len(files) == PAGES
+    assert converter.page_errors == {}
+    assert converter.page_errors == {}
+    assert converter.manifest.is_done(converter.pdf_path, 10, 10)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the stubs reach the worker processes through fork")
+def test_workers_render_windows_of_pages(tmp_path, renders):
+    files, converter = convert(tmp_path, workers=2)
+
+    assert renders() == [(1, 4), (5, 8), (9, 10)]
+    assert len(files) == PAGES
+    assert converter.page_errors == {}
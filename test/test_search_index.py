@@ -0,0 +1,13 @@
+from sdk.search.search_index import SearchIndex
+
+
+def test_same_file_name_in_different_folders_stays_apart(tmp_path):
+    index = SearchIndex(str(tmp_path / "lisan.sqlite"))
+    for volume in ("vol1", "vol2"):
+        index.add(index.unit_name(str(tmp_path / volume / "book.pdf")), 1, f"كتاب {volume}")
+
+    hits, total = index.search("كتاب")
+
+    assert total == 2
+    assert [hit["pdf"] for hit in hits] == ["vol1/book.pdf", "vol2/book.pdf"]
+    index.close()
@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+import time
+from collections import Counter
+import pytest
+from sdk.pdf import work_queue
+from sdk.pdf.work_queue import QueueWorker, WorkQueue, run_workers
+
+PAGES = {"a.pdf": 12, "b.pdf": 9}
+BAD_PAGE = ("b.pdf", 4)
+
+
+class FakeConverter:
+    """
+    Stands in for PdfToText: logs every converted page instead of rendering and OCRing it.
+    """
+    def __init__(self, pdf_path=None, output_folder=None, **kwargs):
+        self.pdf_path = pdf_path
+        self.log_path = os.path.join(output_folder, "converted.log")
+        self.page_errors = {}
+
+    def convert(self, pdf_path, first_page=None, last_page=None):
+        if (os.path.basename(pdf_path), first_page) == BAD_PAGE:
+            raise RuntimeError("cannot render page")
+
+        time.sleep(0.01)
+        with open(self.log_path, "a", encoding="utf-8") as file:
+            file.write(f"{os.path.basename(pdf_path)} {first_page} {os.getpid()}\n")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def queue_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(work_queue, "pdfinfo_from_path", lambda pdf_path: {"Pages": PAGES[os.path.basename(pdf_path)]})
+    monkeypatch.setattr(work_queue, "PdfToText", FakeConverter)
+
+    path = str(tmp_path / "queue.sqlite")
+    queue = WorkQueue(path)
+    for name in PAGES:
+        queue.add_pdf(str(tmp_path / name))
+    queue.set_settings({"output_folder": str(tmp_path)})
+    queue.close()
+
+    return path
+
+
+def states(queue_path):
+    queue = WorkQueue(queue_path)
+    rows = queue.connection.execute("SELECT pdf, page, state, attempts, error FROM tasks").fetchall()
+    queue.close()
+
+    return {(os.path.basename(pdf), page): (state, attempts, error) for pdf, page, state, attempts, error in rows}
+
+
+def converted(queue_path):
+    with open(os.path.join(os.path.dirname(queue_path), "converted.log"), encoding="utf-8") as file:
+        return [tuple(line.split()) for line in file]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the stubs reach the worker processes through fork")
+def test_processes_convert_every_page_once(queue_path):
+    done, failed = run_workers(queue_path, processes=4, batch_size=2)
+
+    tasks = states(queue_path)
+    good = [key for key in tasks if key != BAD_PAGE]
+    assert done == len(good)
+    assert failed == 3
+    assert all(tasks[key][0] == "done" for key in good)
+
+    pages = Counter((pdf, int(page)) for pdf, page, pid in converted(queue_path))
+    assert set(pages) == set(good)
+    assert set(pages.values()) == {1}
+    assert len({pid for pdf, page, pid in converted(queue_path)}) > 1
+
+
+def test_expired_lease_is_reclaimed(queue_path):
+    stalled = WorkQueue(queue_path, lease_seconds=0.01)
+    [(task_id, pdf_path, page)] = stalled.claim("stalled")
+    time.sleep(0.05)
+
+    done, failed = QueueWorker(queue_path, worker_id="healthy").run()
+
+    assert states(queue_path)[(os.path.basename(pdf_path), page)][0] == "done"
+    assert done == sum(PAGES.values()) - 1
+
+    # The stalled worker comes back late: it can neither complete nor fail the page again
+    assert not stalled.complete(task_id, "stalled")
+    assert not stalled.fail(task_id, "stalled", "late")
+    assert states(queue_path)[(os.path.basename(pdf_path), page)][0] == "done"
+    stalled.close()
+
+
+def test_late_failure_keeps_the_new_lease(queue_path):
+    stalled = WorkQueue(queue_path, lease_seconds=0.01)
+    [(task_id, pdf_path, page)] = stalled.claim("stalled")
+    time.sleep(0.05)
+
+    other = WorkQueue(queue_path)
+    assert other.claim("other")[0][0] == task_id
+
+    assert not stalled.fail(task_id, "stalled", "timed out")
+    worker = other.connection.execute("SELECT state, worker FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    assert worker == ("leased", "other")
+
+    # A third worker does not get the page while "other" holds it
+    third = WorkQueue(queue_path)
+    assert task_id not in [task[0] for task in third.claim("third", count=100)]
+
+    for queue in (stalled, other, third):
+        queue.close()
+
+
+def test_failing_page_ends_failed_after_max_attempts(queue_path):
+    done, failed = QueueWorker(queue_path, worker_id="only").run()
+
+    state, attempts, error = states(queue_path)[BAD_PAGE]
+    assert (state, attempts) == ("failed", 3)
+    assert "cannot render page" in error
+    assert failed == 3
+    assert done == sum(PAGES.values()) - 1